@@ -0,0 +1,32 @@
+"""Indices para listagens do catalogo
+
+Revision ID: 3f9c2a7d41b8
+Revises: 80e6ee7ed535
+Create Date: 2026-10-17 10:12:31.482117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d41b8'
+down_revision: Union[str, Sequence[str], None] = '80e6ee7ed535'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_produtos_status_created_at', 'produtos', ['status', 'created_at'], unique=False)
+    op.create_index('ix_produtos_status_categoria_created_at', 'produtos', ['status', 'categoria_id', 'created_at'], unique=False)
+    op.create_index('ix_produtos_status_visualizacoes', 'produtos', ['status', 'visualizacoes'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_produtos_status_visualizacoes', table_name='produtos')
+    op.drop_index('ix_produtos_status_categoria_created_at', table_name='produtos')
+    op.drop_index('ix_produtos_status_created_at', table_name='produtos')
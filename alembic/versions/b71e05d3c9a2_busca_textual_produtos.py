@@ -0,0 +1,66 @@
+"""Busca textual de produtos (FTS5)
+
+Revision ID: b71e05d3c9a2
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-17 11:03:52.917340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e05d3c9a2'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a7d41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+            nome, descricao, marca,
+            content='produtos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_ai AFTER INSERT ON produtos BEGIN
+            INSERT INTO produtos_fts(rowid, nome, descricao, marca)
+            VALUES (new.id, new.nome, new.descricao, new.marca);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_ad AFTER DELETE ON produtos BEGIN
+            INSERT INTO produtos_fts(produtos_fts, rowid, nome, descricao, marca)
+            VALUES ('delete', old.id, old.nome, old.descricao, old.marca);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_au
+        AFTER UPDATE OF nome, descricao, marca ON produtos BEGIN
+            INSERT INTO produtos_fts(produtos_fts, rowid, nome, descricao, marca)
+            VALUES ('delete', old.id, old.nome, old.descricao, old.marca);
+            INSERT INTO produtos_fts(rowid, nome, descricao, marca)
+            VALUES (new.id, new.nome, new.descricao, new.marca);
+        END
+    """)
+    # Indexa os produtos já existentes
+    op.execute("INSERT INTO produtos_fts(produtos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS produtos_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS produtos_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS produtos_fts_ai")
+    op.execute("DROP TABLE IF EXISTS produtos_fts")
@@ -0,0 +1,108 @@
+"""Estatísticas do dashboard mantidas por triggers
+
+Revision ID: e8b3f0a4c7d2
+Revises: d1e7a5c93b42
+Create Date: 2026-10-17 18:24:10.553817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3f0a4c7d2'
+down_revision: Union[str, Sequence[str], None] = 'd1e7a5c93b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = {
+    'produtos_stats_ai': """
+        AFTER INSERT ON produtos BEGIN
+            INSERT INTO estatisticas (chave, valor) VALUES ('produtos', 1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor + 1;
+            INSERT INTO estatisticas (chave, valor)
+            VALUES ('produtos:' || coalesce(new.status, ''), 1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor + 1;
+        END
+    """,
+    'produtos_stats_ad': """
+        AFTER DELETE ON produtos BEGIN
+            INSERT INTO estatisticas (chave, valor) VALUES ('produtos', -1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor - 1;
+            INSERT INTO estatisticas (chave, valor)
+            VALUES ('produtos:' || coalesce(old.status, ''), -1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor - 1;
+        END
+    """,
+    'produtos_stats_au': """
+        AFTER UPDATE OF status ON produtos WHEN old.status IS NOT new.status BEGIN
+            INSERT INTO estatisticas (chave, valor)
+            VALUES ('produtos:' || coalesce(old.status, ''), -1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor - 1;
+            INSERT INTO estatisticas (chave, valor)
+            VALUES ('produtos:' || coalesce(new.status, ''), 1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor + 1;
+        END
+    """,
+    'categorias_stats_ai': """
+        AFTER INSERT ON categorias BEGIN
+            INSERT INTO estatisticas (chave, valor) VALUES ('categorias', 1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor + 1;
+        END
+    """,
+    'categorias_stats_ad': """
+        AFTER DELETE ON categorias BEGIN
+            INSERT INTO estatisticas (chave, valor) VALUES ('categorias', -1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor - 1;
+        END
+    """,
+    'usuarios_stats_ai': """
+        AFTER INSERT ON usuarios BEGIN
+            INSERT INTO estatisticas (chave, valor) VALUES ('usuarios', 1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor + 1;
+        END
+    """,
+    'usuarios_stats_ad': """
+        AFTER DELETE ON usuarios BEGIN
+            INSERT INTO estatisticas (chave, valor) VALUES ('usuarios', -1)
+            ON CONFLICT (chave) DO UPDATE SET valor = valor - 1;
+        END
+    """,
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('estatisticas',
+    sa.Column('chave', sa.String(length=50), nullable=False),
+    sa.Column('valor', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('chave')
+    )
+
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for nome, corpo in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {corpo}")
+    # Contagem dos dados já existentes
+    op.execute("""
+        INSERT OR REPLACE INTO estatisticas (chave, valor)
+        SELECT 'produtos', count(*) FROM produtos
+        UNION ALL
+        SELECT 'produtos:' || coalesce(status, ''), count(*)
+        FROM produtos GROUP BY status
+        UNION ALL
+        SELECT 'categorias', count(*) FROM categorias
+        UNION ALL
+        SELECT 'usuarios', count(*) FROM usuarios
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        for nome in TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {nome}")
+    op.drop_table('estatisticas')
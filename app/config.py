@@ -1,3 +1,5 @@
+from typing import Dict, List, Tuple, Union
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,12 +9,101 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     SECRET_KEY: str = "sua_chave_secreta_muito_segura_aqui_2024"
     DATABASE_URL: str = "sqlite:///./brecho.db"
+    # Engine assíncrona das rotas; vazio = derivada da DATABASE_URL
+    ASYNC_DATABASE_URL: str = ""
+
+    # Pool de conexões (vale para as duas engines)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # segundos esperando uma conexão livre
+
+    # PRAGMAs aplicados em cada conexão SQLite ({} = padrões do SQLite)
+    SQLITE_PRAGMAS: Dict[str, Union[int, str]] = {
+        "journal_mode": "WAL",  # leitores não bloqueiam atrás do escritor
+        "synchronous": "NORMAL",  # seguro com WAL, fsync só no checkpoint
+        "busy_timeout": 5000,  # ms esperando o lock antes de "database is locked"
+        "cache_size": -20000,  # negativo = KiB (~20 MB por conexão)
+        "mmap_size": 134217728,  # 128 MB
+        "temp_store": "MEMORY",
+    }
 
     # JWT Settings
     JWT_SECRET_KEY: str = "jwt_secret_key_super_segura_2024"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_TIME: int = 30  # dias
 
+    # Senhas: custo do bcrypt e pool dedicado ao hash
+    BCRYPT_ROUNDS: int = 12  # hashes com outro custo são refeitos no login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # além disso o login responde 503
+
+    # Limite de taxa por rota (token bucket): (rajada, fichas repostas por minuto)
+    RATE_LIMITS: Dict[str, Tuple[int, float]] = {
+        "login": (10, 10.0),  # por IP
+        "login_conta": (5, 5.0),  # por email tentado, de qualquer IP
+        "register": (5, 5.0),
+        "change_password": (5, 5.0),
+        "listar_produtos": (60, 120.0),
+        "produtos_por_categoria": (60, 120.0),
+        "lancamentos": (60, 120.0),
+        "produtos_mais_vistos": (60, 120.0),
+    }
+    RATE_LIMIT_MAX_KEYS: int = 10000  # chaves guardadas por limite
+    # IPs dos proxies reversos confiáveis: só deles o X-Forwarded-For é aceito
+    # como IP do cliente (vazio: o IP da conexão, sem ler o header)
+    RATE_LIMIT_TRUSTED_PROXIES: List[str] = []
+
+    # Contadores de visualizações/favoritos (gravação em lote)
+    COUNTER_FLUSH_INTERVAL: float = 5.0  # segundos entre gravações
+    COUNTER_MAX_PENDING: int = 1000  # incrementos em memória antes de gravar
+
+    # Cache das leituras do catálogo (produtos e categorias)
+    CATALOG_CACHE_MAX_ITEMS: int = 512  # consultas distintas guardadas
+    CATALOG_CACHE_TTL: float = 60.0  # segundos
+
+    # Cache dos usuários autenticados (get_current_user)
+    USER_CACHE_MAX_ITEMS: int = 1024  # usuários distintos guardados
+    USER_CACHE_TTL: float = 30.0  # segundos
+
+    # Cache-Control por rota do catálogo ("default" vale para as demais)
+    CACHE_CONTROL: Dict[str, str] = {
+        "default": "no-cache",
+        "listar_produtos": "public, max-age=30, stale-while-revalidate=60",
+        "produtos_por_categoria": "public, max-age=30, stale-while-revalidate=60",
+        "lancamentos": "public, max-age=30, stale-while-revalidate=60",
+        "produtos_mais_vistos": "public, max-age=60",
+        "obter_produto": "public, max-age=0, must-revalidate",
+        "listar_categorias": "public, max-age=300",
+    }
+
+    # Reservas do checkout: prazo e varredura das expiradas
+    RESERVATION_TTL: float = 1800.0  # segundos até a peça voltar à vitrine
+    RESERVATION_SWEEP_INTERVAL: float = 30.0  # segundos entre varreduras
+    RESERVATION_SWEEP_BATCH: int = 200  # peças por transação
+    RESERVATION_SWEEP_MAX_BATCHES: int = 10  # lotes por varredura
+
+    # Números de pedido: quantos cada processo reserva por ida ao banco
+    ORDER_NUMBER_BLOCK: int = 100
+
+    # Analytics de vendas (agregados diários recalculados por um job de fundo)
+    ANALYTICS_ROLLUP_INTERVAL: float = 300.0  # segundos entre execuções
+    ANALYTICS_ROLLUP_LAG: float = 60.0  # a marca d'água fica esse tanto atrás
+
+    # Imagens: processos gerando as versões (thumb, card, zoom) dos uploads
+    IMAGE_WORKERS: int = 2
+    UPLOAD_MAX_BYTES: int = 15 * 1024 * 1024  # 15 MB por imagem
+
+    # Importação de produtos em lote (CSV/NDJSON)
+    IMPORT_CHUNK_SIZE: int = 500  # linhas por INSERT/commit
+    IMPORT_MAX_ERRORS: int = 1000  # erros detalhados no relatório
+    IMPORT_MAX_BYTES: int = 200 * 1024 * 1024  # 200 MB por arquivo
+
+    # Carrinho
+    CART_STORE_BACKEND: str = "database"  # "database" ou "memory"
+    CART_COOKIE_MAX_AGE: int = 86400 * 7  # 7 dias
+    CART_SWEEP_INTERVAL: float = 3600.0  # segundos entre limpezas de carrinhos vencidos
+    CART_SWEEP_BATCH: int = 500  # carrinhos apagados por transação
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,89 @@
-from sqlalchemy import create_engine
+import re
+from typing import Dict, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Drivers assíncronos equivalentes aos da DATABASE_URL
+DRIVERS_ASYNC = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_IDENTIFICADOR = re.compile(r"^[A-Za-z_]+$")
+_VALOR_PRAGMA = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def url_async(url: str) -> str:
+    """Troca o driver da URL síncrona pelo equivalente assíncrono"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise ValueError(f"Sem driver assíncrono configurado para {backend}")
+    return url.set(drivername=DRIVERS_ASYNC[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+def opcoes_pool(url: str) -> dict:
+    """Configuração do pool a partir das settings
+
+    SQLite em memória usa um pool próprio (uma conexão) e não aceita tamanho.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+def aplicar_pragmas(engine: Engine, pragmas: Dict[str, Union[int, str]]):
+    """Executa os PRAGMAs em toda conexão nova do pool (só SQLite)"""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    for nome, valor in pragmas.items():
+        if not _IDENTIFICADOR.match(nome) or not _VALOR_PRAGMA.match(str(valor)):
+            raise ValueError(f"PRAGMA inválido: {nome}={valor}")
+
+    @event.listens_for(engine, "connect")
+    def _executar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nome}={valor}")
+        cursor.close()
+
+
+def criar_engine(url: str, pragmas=settings.SQLITE_PRAGMAS, **kwargs) -> Engine:
+    engine = create_engine(url, **{**opcoes_pool(url), **kwargs})
+    aplicar_pragmas(engine, pragmas)
+    return engine
+
+
+def criar_async_engine(url: str, pragmas=settings.SQLITE_PRAGMAS, **kwargs):
+    async_engine = create_async_engine(url, **{**opcoes_pool(url), **kwargs})
+    aplicar_pragmas(async_engine.sync_engine, pragmas)
+    return async_engine
+
+
+# Engine síncrona: scripts (populate_data), Alembic e rotas de escrita
+engine = criar_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrona: leituras quentes (catálogo, carrinho) sem ocupar threads
+async_engine = criar_async_engine(
+    settings.ASYNC_DATABASE_URL or url_async(settings.DATABASE_URL)
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -12,3 +91,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,26 +1,45 @@
+import asyncio
+import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Adiciona o diretório raiz ao path
 root_dir = Path(__file__).parent.parent
 sys.path.append(str(root_dir))
 
+import orjson
 from fastapi import FastAPI, Depends, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db, engine
+from app.database.connection import get_async_db, async_engine, engine
 from app.models.categoria import Categoria
 from app.models import Base
 from app.config import get_settings
+from app.services.catalogo_cache import em_cache_async
+from app.services.http_cache import representar, resposta_condicional
+from app.services.paginacao import HEADER_PROXIMO_CURSOR
+from app.services import (
+    analytics_service,
+    carrinho_store,
+    contadores,
+    imagens,
+    limite_taxa,
+    reservas,
+    senhas,
+)
 
 # Importar routers
 from app.routes.produtos import router as produtos_router
 from app.routes.auth import router as auth_router
 from app.routes.usuarios import router as usuarios_router
 from app.routes.carrinho import router as carrinho_router
+from app.routes.pedidos import router as pedidos_router
 from app.routes.admin import router as admin_router
 
 # Importar para templates
@@ -35,11 +54,36 @@ settings = get_settings()
 # Criar tabelas
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tarefas de fundo
+    tarefa_contadores = asyncio.create_task(contadores.gravar_periodicamente())
+    tarefa_analytics = asyncio.create_task(analytics_service.atualizar_periodicamente())
+    tarefa_reservas = asyncio.create_task(reservas.varrer_periodicamente())
+    tarefa_carrinhos = asyncio.create_task(carrinho_store.limpar_periodicamente())
+
+    yield
+
+    tarefa_contadores.cancel()
+    tarefa_analytics.cancel()
+    tarefa_reservas.cancel()
+    tarefa_carrinhos.cancel()
+    # Grava o que ficou pendente antes de desligar
+    contadores.agregador.flush()
+    # Termina as imagens já enfileiradas (grava o resultado nos produtos)
+    imagens.encerrar()
+    senhas.pool_senhas.encerrar()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="API completa para e-commerce de brechó especializado em roupas vintage e sustentáveis",
     debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Middleware CORS
@@ -49,9 +93,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[HEADER_PROXIMO_CURSOR],
 )
 
-# Servir arquivos estáticos
+# Servir arquivos estáticos (imagens dos produtos com cache permanente)
+os.makedirs(imagens.DIRETORIO_IMAGENS, exist_ok=True)
+app.mount(
+    imagens.URL_IMAGENS,
+    imagens.ImagensImutaveis(directory=imagens.DIRETORIO_IMAGENS),
+    name="imagens_produtos",
+)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # Registrar rotas
@@ -59,9 +110,17 @@ app.include_router(auth_router)
 app.include_router(usuarios_router)
 app.include_router(produtos_router)
 app.include_router(carrinho_router)
+app.include_router(pedidos_router)
 app.include_router(admin_router)
 
 
+# Limite de tamanho dos uploads (imagens e importação), por rota
+app.middleware("http")(imagens.limitar_uploads)
+
+# Limite de taxa por IP (token bucket), antes de qualquer outro trabalho
+app.middleware("http")(limite_taxa.limitar_requisicoes)
+
+
 # Middleware para log de requisições
 @app.middleware("http")
 async def log_requests(request, call_next):
@@ -81,17 +140,28 @@ def api_info():
             "categorias": "/categorias",
             "auth": "/auth",
             "usuarios": "/usuarios",
+            "pedidos": "/pedidos",
             "docs": "/docs",
         },
     }
 
 
 @app.get("/categorias")
-def listar_categorias(db: Session = Depends(get_db)):
+async def listar_categorias(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
     """Lista todas as categorias disponíveis"""
+
+    async def consultar():
+        categorias = (await db.scalars(select(Categoria))).all()
+        corpo = orjson.dumps(
+            {"categorias": jsonable_encoder(categorias), "total": len(categorias)}
+        )
+        return representar(corpo)
+
     try:
-        categorias = db.query(Categoria).all()
-        return {"categorias": categorias, "total": len(categorias)}
+        representacao = await em_cache_async("listar_categorias", consultar)
+        return resposta_condicional(request, representacao, "listar_categorias")
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Erro ao buscar categorias: {str(e)}"
@@ -2,9 +2,19 @@ from .base import Base, BaseModel
 from .categoria import Categoria
 from .usuario import Usuario, TipoUsuario
 from .endereco import Endereco
-from .produto import Produto, StatusProduto, CondicaoProduto, TamanhoProduto
+from .produto import (
+    Produto,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+    StatusImagem,
+)
 from .pedido import Pedido, StatusPedido, FormaPagamento
 from .item_pedido import ItemPedido
+from .carrinho import Carrinho
+from .estatistica import Estatistica
+from .venda_diaria import VendaDiaria, ProgressoRollup
+from .sequencia import Sequencia
 
 # Lista de todos os modelos para facilitar importação
 __all__ = [
@@ -16,10 +26,16 @@ __all__ = [
     "Endereco",
     "Produto",
     "StatusProduto",
+    "StatusImagem",
     "CondicaoProduto",
     "TamanhoProduto",
     "Pedido",
     "StatusPedido",
     "FormaPagamento",
     "ItemPedido",
+    "Carrinho",
+    "Estatistica",
+    "VendaDiaria",
+    "ProgressoRollup",
+    "Sequencia",
 ]
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, JSON, DateTime, Index, text
+from .base import BaseModel
+
+
+class Carrinho(BaseModel):
+    __tablename__ = "carrinhos"
+    __table_args__ = (
+        # Limpeza dos carrinhos de visitante vencidos: só as linhas com prazo
+        Index(
+            "ix_carrinhos_expira_em",
+            "expira_em",
+            sqlite_where=text("expira_em IS NOT NULL"),
+            postgresql_where=text("expira_em IS NOT NULL"),
+        ),
+    )
+
+    # Identificador opaco do carrinho (vai assinado no cookie)
+    token = Column(String(32), unique=True, nullable=False, index=True)
+    # Carrinho persistente do usuário logado; nulo para visitantes
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), unique=True)
+    itens = Column(JSON, nullable=False, default=dict)  # {produto_id: quantidade}
+    # Visitantes: quando o cookie vence (renovado a cada gravação); nulo para usuários
+    expira_em = Column(DateTime(timezone=True))
@@ -0,0 +1,91 @@
+from sqlalchemy import Column, String, Integer, DDL, event
+from .base import Base
+from .categoria import Categoria
+from .produto import Produto
+from .usuario import Usuario
+
+
+class Estatistica(Base):
+    """Contadores do dashboard do admin, mantidos pelos triggers abaixo"""
+
+    __tablename__ = "estatisticas"
+
+    # "produtos", "produtos:<STATUS>", "categorias", "usuarios"
+    chave = Column(String(50), primary_key=True)
+    valor = Column(Integer, nullable=False, default=0)
+
+
+# Os triggers ficam no banco (SQLite) e valem para qualquer escrita: rotas,
+# scripts, importações em lote e SQL direto. O status entra pelo nome do enum,
+# como o SQLAlchemy grava.
+def _somar(chave: str, delta: int) -> str:
+    return (
+        f"INSERT INTO estatisticas (chave, valor) VALUES ({chave}, {delta}) "
+        f"ON CONFLICT (chave) DO UPDATE SET valor = valor + ({delta});"
+    )
+
+
+_STATUS_NOVO = "'produtos:' || coalesce(new.status, '')"
+_STATUS_ANTIGO = "'produtos:' || coalesce(old.status, '')"
+
+ESTATISTICAS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS produtos_stats_ai AFTER INSERT ON produtos BEGIN
+        {_somar("'produtos'", 1)}
+        {_somar(_STATUS_NOVO, 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS produtos_stats_ad AFTER DELETE ON produtos BEGIN
+        {_somar("'produtos'", -1)}
+        {_somar(_STATUS_ANTIGO, -1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS produtos_stats_au AFTER UPDATE OF status ON produtos
+    WHEN old.status IS NOT new.status BEGIN
+        {_somar(_STATUS_ANTIGO, -1)}
+        {_somar(_STATUS_NOVO, 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categorias_stats_ai AFTER INSERT ON categorias BEGIN
+        {_somar("'categorias'", 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categorias_stats_ad AFTER DELETE ON categorias BEGIN
+        {_somar("'categorias'", -1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS usuarios_stats_ai AFTER INSERT ON usuarios BEGIN
+        {_somar("'usuarios'", 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS usuarios_stats_ad AFTER DELETE ON usuarios BEGIN
+        {_somar("'usuarios'", -1)}
+    END
+    """,
+    # Contagem inicial (a tabela pode ser criada num banco que já tem dados)
+    """
+    INSERT OR REPLACE INTO estatisticas (chave, valor)
+    SELECT 'produtos', count(*) FROM produtos
+    UNION ALL
+    SELECT 'produtos:' || coalesce(status, ''), count(*) FROM produtos GROUP BY status
+    UNION ALL
+    SELECT 'categorias', count(*) FROM categorias
+    UNION ALL
+    SELECT 'usuarios', count(*) FROM usuarios
+    """,
+]
+
+# Criada depois das tabelas contadas, para os triggers e a contagem inicial
+for _tabela in (Produto, Categoria, Usuario):
+    Estatistica.__table__.add_is_dependent_on(_tabela.__table__)
+
+for _ddl in ESTATISTICAS_DDL:
+    event.listen(
+        Estatistica.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite")
+    )
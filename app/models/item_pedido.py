@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 
 class ItemPedido(BaseModel):
     __tablename__ = "itens_pedido"
+    __table_args__ = (
+        Index("ix_itens_pedido_pedido_id", "pedido_id"),
+        # Varredor de reservas: pedido mais recente de cada peça
+        Index("ix_itens_pedido_produto_id_pedido_id", "produto_id", "pedido_id"),
+        # Job de analytics: itens alterados desde a marca d'água
+        Index("ix_itens_pedido_updated_at", "updated_at"),
+    )
 
     pedido_id = Column(Integer, ForeignKey("pedidos.id"), nullable=False)
     produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False)
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Enum, ForeignKey, Text
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Float,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Text,
+    Index,
+)
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -23,8 +33,13 @@ class FormaPagamento(enum.Enum):
 
 class Pedido(BaseModel):
     __tablename__ = "pedidos"
+    __table_args__ = (
+        # Job de analytics: pedidos alterados desde a marca d'água e por dia
+        Index("ix_pedidos_updated_at", "updated_at"),
+        Index("ix_pedidos_created_at", "created_at"),
+    )
 
-    numero_pedido = Column(String(20), unique=True, nullable=False)  # Ex: BR2024001
+    numero_pedido = Column(String(20), unique=True, nullable=False)  # Ex: BR00001234
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     endereco_entrega_id = Column(Integer, ForeignKey("enderecos.id"), nullable=False)
 
@@ -58,8 +73,7 @@ class Pedido(BaseModel):
     )
 
     def gerar_numero_pedido(self):
-        """Gera número único do pedido"""
-        from datetime import datetime
+        """Gera número único do pedido (sequência reservada em blocos)"""
+        from app.services.numeracao import proximo_numero_pedido
 
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"BR{timestamp}"
+        return proximo_numero_pedido()
@@ -1,4 +1,19 @@
-from sqlalchemy import Column, String, Boolean, Integer, Float, Text, Enum, ForeignKey
+from sqlalchemy import (
+    Column,
+    String,
+    Boolean,
+    Integer,
+    Float,
+    Text,
+    DateTime,
+    Enum,
+    JSON,
+    ForeignKey,
+    Index,
+    DDL,
+    event,
+    text,
+)
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -28,8 +43,34 @@ class TamanhoProduto(enum.Enum):
     UNICO = "unico"
 
 
+class StatusImagem(enum.Enum):
+    PROCESSANDO = "processando"
+    PRONTA = "pronta"
+    ERRO = "erro"
+
+
 class Produto(BaseModel):
     __tablename__ = "produtos"
+    __table_args__ = (
+        # Vitrine: filtra por status e ordena por data (lançamentos, listagem)
+        Index("ix_produtos_status_created_at", "status", "created_at"),
+        # Listagem por categoria
+        Index(
+            "ix_produtos_status_categoria_created_at",
+            "status",
+            "categoria_id",
+            "created_at",
+        ),
+        # Mais vistos
+        Index("ix_produtos_status_visualizacoes", "status", "visualizacoes"),
+        # Expiração de reservas: índice parcial, só as peças com prazo
+        Index(
+            "ix_produtos_reservado_ate",
+            "reservado_ate",
+            sqlite_where=text("reservado_ate IS NOT NULL"),
+            postgresql_where=text("reservado_ate IS NOT NULL"),
+        ),
+    )
 
     nome = Column(String(200), nullable=False)
     descricao = Column(Text)
@@ -40,6 +81,8 @@ class Produto(BaseModel):
     preco_original = Column(Float)  # Preço quando novo
     preco_venda = Column(Float, nullable=False)
     status = Column(Enum(StatusProduto), default=StatusProduto.DISPONIVEL)
+    # Prazo da reserva feita no checkout; nulo fora dela (ou reserva manual)
+    reservado_ate = Column(DateTime(timezone=True))
 
     # Específico para brechó
     ano_aproximado = Column(Integer)  # Ano aproximado da peça
@@ -50,6 +93,9 @@ class Produto(BaseModel):
     # Imagens (URLs separadas por vírgula ou JSON)
     imagem_principal = Column(String(500))
     imagens_adicionais = Column(Text)  # JSON com URLs das imagens
+    # Versões geradas pelo pipeline: {"card": {"webp": url, "jpeg": url}, ...}
+    imagem_rendicoes = Column(JSON)
+    imagem_status = Column(Enum(StatusImagem))
 
     # Relacionamentos
     categoria_id = Column(Integer, ForeignKey("categorias.id"), nullable=False)
@@ -59,3 +105,42 @@ class Produto(BaseModel):
     # Métricas
     visualizacoes = Column(Integer, default=0)
     favoritado = Column(Integer, default=0)
+
+
+# Índice de busca textual (SQLite FTS5) espelhando nome, descrição e marca.
+# Os triggers mantêm o índice sincronizado com a tabela de produtos.
+PRODUTOS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+        nome, descricao, marca,
+        content='produtos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_ai AFTER INSERT ON produtos BEGIN
+        INSERT INTO produtos_fts(rowid, nome, descricao, marca)
+        VALUES (new.id, new.nome, new.descricao, new.marca);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_ad AFTER DELETE ON produtos BEGIN
+        INSERT INTO produtos_fts(produtos_fts, rowid, nome, descricao, marca)
+        VALUES ('delete', old.id, old.nome, old.descricao, old.marca);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_au
+    AFTER UPDATE OF nome, descricao, marca ON produtos BEGIN
+        INSERT INTO produtos_fts(produtos_fts, rowid, nome, descricao, marca)
+        VALUES ('delete', old.id, old.nome, old.descricao, old.marca);
+        INSERT INTO produtos_fts(rowid, nome, descricao, marca)
+        VALUES (new.id, new.nome, new.descricao, new.marca);
+    END
+    """,
+]
+
+for _ddl in PRODUTOS_FTS_DDL:
+    event.listen(
+        Produto.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite")
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Integer
+from .base import Base
+
+
+class Sequencia(Base):
+    """Contadores de numeração (ex.: números de pedido), reservados em blocos"""
+
+    __tablename__ = "sequencias"
+
+    nome = Column(String(50), primary_key=True)
+    # Primeiro valor ainda não entregue a nenhum processo
+    proximo = Column(Integer, nullable=False)
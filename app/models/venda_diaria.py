@@ -0,0 +1,46 @@
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Float,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+)
+from .base import Base
+from .pedido import FormaPagamento, StatusPedido
+
+
+class VendaDiaria(Base):
+    """Vendas agregadas por dia (recalculadas pelo job de analytics)
+
+    Linhas com ``categoria_id`` somam os itens da categoria (receita dos
+    itens, pedidos que contêm a categoria). Linhas com ``categoria_id`` nulo
+    somam os pedidos inteiros (total com frete e desconto), para que as
+    contagens por dia, pagamento e status não repitam pedidos com peças de
+    várias categorias.
+    """
+
+    __tablename__ = "vendas_diarias"
+    __table_args__ = (Index("ix_vendas_diarias_dia_categoria", "dia", "categoria_id"),)
+
+    id = Column(Integer, primary_key=True)
+    dia = Column(Date, nullable=False)  # data de criação do pedido (UTC)
+    categoria_id = Column(Integer, ForeignKey("categorias.id"))
+    forma_pagamento = Column(Enum(FormaPagamento))
+    status = Column(Enum(StatusPedido))
+
+    pedidos = Column(Integer, nullable=False, default=0)
+    itens = Column(Integer, nullable=False, default=0)
+    receita = Column(Float, nullable=False, default=0.0)
+
+
+class ProgressoRollup(Base):
+    """Marca d'água dos jobs incrementais: até onde as alterações já entraram"""
+
+    __tablename__ = "progresso_rollups"
+
+    nome = Column(String(50), primary_key=True)
+    processado_ate = Column(DateTime(timezone=True), nullable=False)
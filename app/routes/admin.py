@@ -1,20 +1,63 @@
 # Painel Admin
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    UploadFile,
+    File,
+    Form,
+    Query,
+    Response,
+)
 from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from pydantic import BaseModel
 from typing import Optional, List
-import os
-import uuid
-from PIL import Image
-
-from app.database.connection import get_db
-from app.models.produto import Produto, StatusProduto, CondicaoProduto, TamanhoProduto
+from datetime import date, datetime, timedelta, timezone
+
+from app.config import settings
+from app.database.connection import get_async_db, get_db
+from app.models.produto import (
+    Produto,
+    StatusImagem,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
 from app.models.categoria import Categoria
 from app.models.usuario import Usuario
 from app.routes.auth import get_current_admin_user
+from app.services.analytics_service import (
+    AgrupamentoVendas,
+    atualizar_vendas_diarias,
+    consultar_vendas,
+    processado_ate,
+)
+from app.services.catalogo_cache import estatisticas_catalogo, invalidar_catalogo
+from app.services.estatisticas_service import ler_estatisticas
+from app.services.imagens import (
+    Original,
+    limites_upload,
+    processar_em_segundo_plano,
+    salvar_original,
+)
+from app.services.importacao import (
+    FormatoImportacao,
+    detectar_formato,
+    importar_produtos,
+    ler_registros,
+)
+from app.services.limite_taxa import estatisticas_limites
+from app.services.numeracao import estatisticas_numeracao
+from app.services.operacoes_lote import RegraPreco, SeletorProdutos, aplicar_em_lote
+from app.services.paginacao import paginar, definir_proximo_cursor
+from app.services.produto_service import consultar_produtos, serializar_produto_admin
+from app.services.reservas import varredor
+from app.services.senhas import pool_senhas
+from app.services.usuarios_cache import estatisticas_usuarios
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -27,6 +70,21 @@ class AdminStats(BaseModel):
     total_usuarios: int
 
 
+class LinhaVendas(BaseModel):
+    chave: Optional[str]
+    pedidos: int
+    itens: int
+    receita: float
+
+
+class RelatorioVendas(BaseModel):
+    inicio: date
+    fim: date
+    agrupar_por: AgrupamentoVendas
+    processado_ate: Optional[datetime]  # alterações depois disso ainda não entraram
+    linhas: List[LinhaVendas]
+
+
 class ProdutoAdmin(BaseModel):
     nome: str
     descricao: Optional[str] = None
@@ -41,46 +99,67 @@ class ProdutoAdmin(BaseModel):
     historia_peca: Optional[str] = None
 
 
-def save_admin_image(file: UploadFile) -> str:
-    """Salvar imagem do admin"""
-    upload_dir = "app/static/images/produtos"
-    os.makedirs(upload_dir, exist_ok=True)
+class OperacaoLote(BaseModel):
+    seletor: SeletorProdutos
+    status: Optional[StatusProduto] = None
+    preco: Optional[RegraPreco] = None
+    simular: bool = False  # só conta, sem alterar
 
-    file_extension = file.filename.split(".")[-1].lower()
-    filename = f"admin_{uuid.uuid4().hex[:8]}.{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
 
-    with open(file_path, "wb") as buffer:
-        buffer.write(file.file.read())
+class ResultadoLote(BaseModel):
+    simulacao: bool
+    selecionados: Optional[int]  # só na simulação
+    alterados: int
+    reservadas_ignoradas: int = 0  # em checkout pendente: status não muda
 
-    # Redimensionar
-    with Image.open(file_path) as img:
-        img.thumbnail((800, 800), Image.Resampling.LANCZOS)
-        img.save(file_path, optimize=True, quality=85)
 
-    return f"/static/images/produtos/{filename}"
+async def save_admin_image(file: UploadFile) -> Original:
+    """Salvar o original da imagem do admin (versões geradas depois do commit)"""
+    return await salvar_original(file)
 
 
 @router.get("/dashboard", response_model=AdminStats)
 def admin_dashboard(
     admin: Usuario = Depends(get_current_admin_user), db: Session = Depends(get_db)
 ):
-    """Dashboard com estatísticas"""
-    return AdminStats(
-        total_produtos=db.query(Produto).count(),
-        produtos_disponiveis=db.query(Produto)
-        .filter(Produto.status == StatusProduto.DISPONIVEL)
-        .count(),
-        produtos_vendidos=db.query(Produto)
-        .filter(Produto.status == StatusProduto.VENDIDO)
-        .count(),
-        total_categorias=db.query(Categoria).count(),
-        total_usuarios=db.query(Usuario).count(),
+    """Dashboard com estatísticas (contadores mantidos pelo banco)"""
+    return AdminStats(**ler_estatisticas(db))
+
+
+@router.get("/analytics/vendas", response_model=RelatorioVendas)
+def analytics_vendas(
+    inicio: Optional[date] = Query(None),
+    fim: Optional[date] = Query(None),
+    agrupar_por: AgrupamentoVendas = Query(AgrupamentoVendas.DIA),
+    incluir_cancelados: bool = Query(False),
+    admin: Usuario = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Vendas por dia, categoria, pagamento ou status (padrão: últimos 30 dias)"""
+    fim = fim or datetime.now(timezone.utc).date()
+    inicio = inicio or fim - timedelta(days=29)
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="Início depois do fim")
+
+    return RelatorioVendas(
+        inicio=inicio,
+        fim=fim,
+        agrupar_por=agrupar_por,
+        processado_ate=processado_ate(db),
+        linhas=consultar_vendas(db, inicio, fim, agrupar_por, incluir_cancelados),
     )
 
 
+@router.post("/analytics/atualizar")
+def atualizar_analytics(
+    admin: Usuario = Depends(get_current_admin_user), db: Session = Depends(get_db)
+):
+    """Atualiza os agregados agora, sem esperar o próximo ciclo do job"""
+    return {"dias_recalculados": atualizar_vendas_diarias(db)}
+
+
 @router.post("/produtos", status_code=201)
-def criar_produto_admin(
+async def criar_produto_admin(
     nome: str = Form(),
     descricao: str = Form(None),
     marca: str = Form(None),
@@ -94,12 +173,12 @@ def criar_produto_admin(
     historia_peca: str = Form(None),
     imagem: UploadFile = File(None),
     admin: Usuario = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Criar novo produto (admin)"""
 
     # Verificar categoria
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
+    categoria = await db.get(Categoria, categoria_id)
     if not categoria:
         raise HTTPException(status_code=400, detail="Categoria inválida")
 
@@ -119,16 +198,66 @@ def criar_produto_admin(
     )
 
     # Salvar imagem se fornecida
+    original = None
     if imagem and imagem.filename:
-        produto.imagem_principal = save_admin_image(imagem)
+        original = await save_admin_image(imagem)
+        produto.imagem_principal = original.url
+        produto.imagem_status = StatusImagem.PROCESSANDO
 
     db.add(produto)
-    db.commit()
-    db.refresh(produto)
+    await db.commit()
+    invalidar_catalogo()
+
+    if original:
+        processar_em_segundo_plano(produto.id, original)
 
     return {"message": "Produto criado", "produto_id": produto.id}
 
 
+@router.post("/produtos/import")
+def importar_produtos_admin(
+    arquivo: UploadFile = File(),
+    formato: Optional[FormatoImportacao] = Query(None),
+    admin: Usuario = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Importar produtos em lote de um CSV ou NDJSON (admin)"""
+
+    # Envio sem Content-Length passa pelo middleware: confere o tamanho lido
+    if arquivo.size is not None and arquivo.size > settings.IMPORT_MAX_BYTES:
+        _, mensagem = limites_upload()["importar_produtos_admin"]
+        raise HTTPException(status_code=413, detail=mensagem)
+
+    formato = formato or detectar_formato(arquivo.filename)
+    if formato is None:
+        raise HTTPException(
+            status_code=400, detail="Formato não reconhecido (use .csv ou .ndjson)"
+        )
+
+    relatorio = importar_produtos(
+        db, ler_registros(arquivo.file, formato), ProdutoAdmin
+    )
+    if relatorio["importadas"]:
+        invalidar_catalogo()
+    return relatorio
+
+
+@router.post("/produtos/lote", response_model=ResultadoLote)
+def operar_produtos_em_lote(
+    operacao: OperacaoLote,
+    admin: Usuario = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Alterar status e/ou preço de vários produtos num UPDATE só (admin)"""
+
+    resultado = aplicar_em_lote(
+        db, operacao.seletor, operacao.status, operacao.preco, operacao.simular
+    )
+    if resultado["alterados"] and not resultado["simulacao"]:
+        invalidar_catalogo()
+    return resultado
+
+
 @router.put("/produtos/{produto_id}")
 def atualizar_produto_admin(
     produto_id: int,
@@ -159,6 +288,7 @@ def atualizar_produto_admin(
         produto.status = status
 
     db.commit()
+    invalidar_catalogo()
     return {"message": "Produto atualizado"}
 
 
@@ -176,33 +306,38 @@ def deletar_produto_admin(
 
     produto.status = StatusProduto.INATIVO
     db.commit()
+    invalidar_catalogo()
 
     return {"message": "Produto removido"}
 
 
 @router.get("/produtos")
 def listar_produtos_admin(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     admin: Usuario = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     """Listar produtos para admin"""
 
-    produtos = db.query(Produto).offset(skip).limit(limit).all()
-    result = []
-
-    for produto in produtos:
-        result.append(
-            {
-                "id": produto.id,
-                "nome": produto.nome,
-                "preco_venda": produto.preco_venda,
-                "status": produto.status.value,
-                "categoria": produto.categoria.nome,
-                "created_at": produto.created_at.strftime("%d/%m/%Y"),
-                "imagem": produto.imagem_principal,
-            }
-        )
-
-    return result
+    produtos, proximo = paginar(
+        consultar_produtos(db), [(Produto.id, False)], limit, skip=skip, cursor=cursor
+    )
+    definir_proximo_cursor(response, proximo)
+
+    return [serializar_produto_admin(produto) for produto in produtos]
+
+
+@router.get("/metricas")
+def metricas(admin: Usuario = Depends(get_current_admin_user)):
+    """Métricas internas (acertos/falhas dos caches) para dimensionamento"""
+    return {
+        "cache_catalogo": estatisticas_catalogo(),
+        "cache_usuarios": estatisticas_usuarios(),
+        "hash_senhas": pool_senhas.estatisticas(),
+        "limite_taxa": estatisticas_limites(),
+        "numeros_pedido": estatisticas_numeracao(),
+        "reservas": varredor.estatisticas(),
+    }
@@ -3,17 +3,35 @@ Sistema de Autenticação JWT - Versão Simplificada
 """
 
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException, status, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Request, Response
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 
-from app.database.connection import get_db
+from app.database.connection import get_async_db, get_db
 from app.models.usuario import Usuario, TipoUsuario
 from app.config import get_settings
+from app.services.carrinho_store import (
+    COOKIE_CARRINHO,
+    CarrinhoStore,
+    definir_cookie_carrinho,
+    get_carrinho_store,
+    verificar_carrinho_id,
+)
+from app.services.limite_taxa import exigir_limite
+from app.services.senhas import (
+    gerar_hash,
+    gerar_hash_async,
+    precisa_rehash,
+    verificar_senha,
+    verificar_senha_async,
+)
+from app.services.usuarios_cache import invalidar_usuario, usuario_por_email
 
 settings = get_settings()
 
@@ -21,7 +39,6 @@ settings = get_settings()
 router = APIRouter(prefix="/auth", tags=["autenticação"])
 
 # Configurações de segurança
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
@@ -47,29 +64,16 @@ class UserResponse(BaseModel):
     tipo: str
     ativo: bool
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-# Funções utilitárias
+# Funções utilitárias (síncronas; as rotas usam as versões do pool de senhas)
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    import bcrypt
-
-    try:
-        return bcrypt.checkpw(
-            plain_password.encode("utf-8"), hashed_password.encode("utf-8")
-        )
-    except:
-        # Fallback para pwd_context se houver problemas
-        return pwd_context.verify(plain_password, hashed_password)
+    return verificar_senha(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    import bcrypt
-
-    password_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+    return gerar_hash(password)
 
 
 def create_access_token(data: dict) -> str:
@@ -94,7 +98,7 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-    user = db.query(Usuario).filter(Usuario.email == email).first()
+    user = usuario_por_email(db, email)
     if user is None:
         raise HTTPException(status_code=401, detail="Usuário não encontrado")
 
@@ -118,34 +122,61 @@ def get_current_admin_user(
 
 
 # ENDPOINTS
+def mesclar_carrinho_no_login(
+    request: Request, response: Response, store: CarrinhoStore, usuario_id: int
+):
+    """Carrinho de visitante é mesclado no carrinho persistente do usuário"""
+    carrinho_usuario = store.carrinho_do_usuario(usuario_id)
+    carrinho_visitante = verificar_carrinho_id(request.cookies.get(COOKIE_CARRINHO))
+    if carrinho_visitante and not store.pertence_a_usuario(carrinho_visitante):
+        store.mesclar(carrinho_visitante, carrinho_usuario)
+    definir_cookie_carrinho(response, carrinho_usuario)
+
+
 @router.post("/login", response_model=Token)
-def login(
-    username: str = Form(), password: str = Form(), db: Session = Depends(get_db)
+async def login(
+    request: Request,
+    response: Response,
+    username: str = Form(),
+    password: str = Form(),
+    db: AsyncSession = Depends(get_async_db),
+    store: CarrinhoStore = Depends(get_carrinho_store),
 ):
     """Login com email e senha"""
+    # Além do limite por IP (middleware), tentativas por conta
+    exigir_limite("login_conta", username.strip().casefold())
+
     # Buscar usuário
-    user = db.query(Usuario).filter(Usuario.email == username).first()
-    if not user or not verify_password(password, user.senha_hash):
+    user = await db.scalar(select(Usuario).where(Usuario.email == username))
+    if not user or not await verificar_senha_async(password, user.senha_hash):
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
 
     if not user.ativo:
         raise HTTPException(status_code=401, detail="Usuário inativo")
 
+    # Hash gravado com outro custo: refaz com o BCRYPT_ROUNDS atual
+    if precisa_rehash(user.senha_hash):
+        user.senha_hash = await gerar_hash_async(password)
+        await db.commit()
+        invalidar_usuario(user.email)
+
     # Criar token
     token = create_access_token(data={"sub": user.email, "user_id": user.id})
 
+    await run_in_threadpool(mesclar_carrinho_no_login, request, response, store, user.id)
+
     return Token(access_token=token, user_id=user.id, user_name=user.nome)
 
 
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """Registrar novo usuário"""
     # Verificar se email já existe
-    if db.query(Usuario).filter(Usuario.email == user_data.email).first():
+    if await db.scalar(select(Usuario.id).where(Usuario.email == user_data.email)):
         raise HTTPException(status_code=400, detail="Email já cadastrado")
 
     # Criar usuário
-    hashed_password = get_password_hash(user_data.senha)
+    hashed_password = await gerar_hash_async(user_data.senha)
     new_user = Usuario(
         nome=user_data.nome,
         email=user_data.email,
@@ -156,8 +187,8 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return UserResponse(
         id=new_user.id,
@@ -181,6 +212,8 @@ def get_my_profile(current_user: Usuario = Depends(get_current_active_user)):
 
 
 @router.post("/logout")
-def logout():
+def logout(response: Response):
     """Logout (frontend deve descartar o token)"""
+    # Desvincula o navegador do carrinho persistente do usuário
+    response.delete_cookie(COOKIE_CARRINHO)
     return {"message": "Logout realizado com sucesso"}
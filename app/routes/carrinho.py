@@ -1,13 +1,23 @@
 # Sistema de Carrinho (Sessão)
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import json
 
-from app.database.connection import get_db
-from app.models.produto import Produto
+from app.database.connection import get_async_db, get_db
+from app.models.produto import Produto, StatusProduto
+from app.services.carrinho_service import CarrinhoResponse, precificar_carrinho
+from app.services.carrinho_store import (
+    COOKIE_CARRINHO,
+    CarrinhoStore,
+    definir_cookie_carrinho,
+    get_carrinho_store,
+    novo_carrinho_id,
+    verificar_carrinho_id,
+)
 
 router = APIRouter(prefix="/carrinho", tags=["carrinho"])
 
@@ -17,26 +27,46 @@ class CarrinhoItem(BaseModel):
     quantidade: int = 1
 
 
-class CarrinhoResponse(BaseModel):
-    produto_id: int
-    nome: str
-    preco: float
-    quantidade: int
-    subtotal: float
-    imagem: Optional[str] = None
+# Cookie antigo, com o carrinho inteiro em JSON (lido só para migração)
+COOKIE_CARRINHO_LEGADO = "carrinho"
+
 
+# Funções para gerenciar carrinho: itens no servidor, cookie só com o id assinado
+def obter_carrinho_id(request: Request) -> Optional[str]:
+    return verificar_carrinho_id(request.cookies.get(COOKIE_CARRINHO))
 
-# Função para gerenciar carrinho na sessão
-def get_carrinho(request: Request) -> Dict:
-    carrinho_json = request.cookies.get("carrinho", "{}")
+
+def carrinho_legado(request: Request) -> Dict:
+    carrinho_json = request.cookies.get(COOKIE_CARRINHO_LEGADO, "{}")
     try:
         return json.loads(carrinho_json)
     except:
         return {}
 
 
-def set_carrinho(response: Response, carrinho: Dict):
-    response.set_cookie("carrinho", json.dumps(carrinho), max_age=86400 * 7)  # 7 dias
+def get_carrinho(request: Request, store: CarrinhoStore) -> Dict:
+    carrinho_id = obter_carrinho_id(request)
+    if carrinho_id:
+        return store.obter(carrinho_id)
+
+    return carrinho_legado(request)
+
+
+async def get_carrinho_async(request: Request, store: CarrinhoStore) -> Dict:
+    carrinho_id = obter_carrinho_id(request)
+    if carrinho_id:
+        return await store.obter_async(carrinho_id)
+
+    return carrinho_legado(request)
+
+
+def set_carrinho(request: Request, response: Response, store: CarrinhoStore, carrinho: Dict):
+    carrinho_id = obter_carrinho_id(request) or novo_carrinho_id()
+    store.salvar(carrinho_id, carrinho)
+    definir_cookie_carrinho(response, carrinho_id)
+
+    if COOKIE_CARRINHO_LEGADO in request.cookies:
+        response.delete_cookie(COOKIE_CARRINHO_LEGADO)
 
 
 @router.post("/adicionar")
@@ -45,99 +75,114 @@ def adicionar_ao_carrinho(
     request: Request,
     response: Response,
     db: Session = Depends(get_db),
+    store: CarrinhoStore = Depends(get_carrinho_store),
 ):
     """Adicionar produto ao carrinho"""
-    # Verificar se produto existe
-    produto = db.query(Produto).filter(Produto.id == item.produto_id).first()
-    if not produto:
+    # Verificar se produto existe e ainda está à venda
+    status = db.query(Produto.status).filter(Produto.id == item.produto_id).scalar()
+    if status is None:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
+    if status != StatusProduto.DISPONIVEL:
+        raise HTTPException(status_code=409, detail="Produto indisponível")
 
     # Para brechó, quantidade sempre 1
-    carrinho = get_carrinho(request)
+    carrinho = get_carrinho(request, store)
     carrinho[str(item.produto_id)] = 1  # Sempre quantidade 1 para brechó
-    set_carrinho(response, carrinho)
+    set_carrinho(request, response, store, carrinho)
 
     return {"message": "Produto adicionado ao carrinho", "total_items": len(carrinho)}
 
 
 @router.delete("/remover/{produto_id}")
-def remover_do_carrinho(produto_id: int, request: Request, response: Response):
+def remover_do_carrinho(
+    produto_id: int,
+    request: Request,
+    response: Response,
+    store: CarrinhoStore = Depends(get_carrinho_store),
+):
     """Remover produto do carrinho"""
-    carrinho = get_carrinho(request)
+    carrinho = get_carrinho(request, store)
     if str(produto_id) in carrinho:
         del carrinho[str(produto_id)]
-        set_carrinho(response, carrinho)
+        set_carrinho(request, response, store, carrinho)
         return {"message": "Produto removido do carrinho"}
 
     raise HTTPException(status_code=404, detail="Produto não está no carrinho")
 
 
 @router.get("/", response_model=List[CarrinhoResponse])
-def ver_carrinho(request: Request, db: Session = Depends(get_db)):
+async def ver_carrinho(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    store: CarrinhoStore = Depends(get_carrinho_store),
+):
     """Ver itens do carrinho"""
-    carrinho = get_carrinho(request)
+    carrinho = await get_carrinho_async(request, store)
     if not carrinho:
         return []
 
-    itens = []
-    for produto_id, quantidade in carrinho.items():
-        produto = db.query(Produto).filter(Produto.id == int(produto_id)).first()
-        if produto:
-            itens.append(
-                CarrinhoResponse(
-                    produto_id=produto.id,
-                    nome=produto.nome,
-                    preco=produto.preco_venda,
-                    quantidade=quantidade,
-                    subtotal=produto.preco_venda * quantidade,
-                    imagem=produto.imagem_principal,
-                )
-            )
-
-    return itens
+    return (await db.run_sync(precificar_carrinho, carrinho)).itens
 
 
 @router.get("/total")
-def total_carrinho(request: Request, db: Session = Depends(get_db)):
+async def total_carrinho(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    store: CarrinhoStore = Depends(get_carrinho_store),
+):
     """Calcular total do carrinho"""
-    carrinho = get_carrinho(request)
-    total = 0
-    total_items = 0
+    carrinho = await db.run_sync(
+        precificar_carrinho, await get_carrinho_async(request, store)
+    )
 
-    for produto_id, quantidade in carrinho.items():
-        produto = db.query(Produto).filter(Produto.id == int(produto_id)).first()
-        if produto:
-            total += produto.preco_venda * quantidade
-            total_items += quantidade
-
-    return {"total": total, "total_items": total_items, "items_count": len(carrinho)}
+    return {
+        "total": carrinho.total,
+        "total_items": carrinho.total_items,
+        "items_count": carrinho.items_count,
+        "indisponiveis": carrinho.indisponiveis,
+    }
 
 
 @router.delete("/limpar")
-def limpar_carrinho(response: Response):
+def limpar_carrinho(
+    request: Request,
+    response: Response,
+    store: CarrinhoStore = Depends(get_carrinho_store),
+):
     """Limpar todo o carrinho"""
-    response.delete_cookie("carrinho")
+    carrinho_id = obter_carrinho_id(request)
+    if carrinho_id:
+        # Carrinho de usuário continua existindo, só fica vazio
+        store.salvar(carrinho_id, {})
+    response.delete_cookie(COOKIE_CARRINHO_LEGADO)
     return {"message": "Carrinho limpo"}
 
 
 @router.get("/whatsapp")
-def gerar_link_whatsapp(request: Request, db: Session = Depends(get_db)):
+def gerar_link_whatsapp(
+    request: Request,
+    db: Session = Depends(get_db),
+    store: CarrinhoStore = Depends(get_carrinho_store),
+):
     """Gerar link do WhatsApp com pedido"""
-    carrinho = get_carrinho(request)
+    carrinho = get_carrinho(request, store)
     if not carrinho:
         raise HTTPException(status_code=400, detail="Carrinho vazio")
 
+    # Só peças ainda disponíveis entram no pedido
+    precificado = precificar_carrinho(db, carrinho)
+    if not precificado.disponiveis:
+        raise HTTPException(
+            status_code=400, detail="Nenhum produto do carrinho está disponível"
+        )
+
     # Montar mensagem
     mensagem = "🛍️ *Pedido do Brechó Cata Roupas* 🛍️\n\n"
-    total = 0
-
-    for produto_id, quantidade in carrinho.items():
-        produto = db.query(Produto).filter(Produto.id == int(produto_id)).first()
-        if produto:
-            subtotal = produto.preco_venda * quantidade
-            mensagem += f"• {produto.nome}\n"
-            mensagem += f"  💰 R$ {produto.preco_venda:.2f}\n\n"
-            total += subtotal
+    total = precificado.total
+
+    for item in precificado.disponiveis:
+        mensagem += f"• {item.nome}\n"
+        mensagem += f"  💰 R$ {item.preco:.2f}\n\n"
 
     mensagem += f"💯 *TOTAL: R$ {total:.2f}*\n\n"
     mensagem += "📞 Gostaria de finalizar este pedido!\n"
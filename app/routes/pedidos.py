@@ -0,0 +1,86 @@
+"""
+Rotas de pedidos (checkout)
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Request
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy.orm import Session
+
+from app.database.connection import get_db
+from app.models.pedido import FormaPagamento, StatusPedido
+from app.models.usuario import Usuario
+from app.routes.auth import get_current_active_user
+from app.routes.carrinho import get_carrinho, obter_carrinho_id
+from app.services.carrinho_store import CarrinhoStore, get_carrinho_store
+from app.services.catalogo_cache import invalidar_catalogo
+from app.services.pedido_service import finalizar_pedido
+
+router = APIRouter(prefix="/pedidos", tags=["pedidos"])
+
+
+# Schemas
+class CheckoutRequest(BaseModel):
+    endereco_entrega_id: int
+    forma_pagamento: FormaPagamento
+    # Vazio: todas as peças do carrinho
+    produto_ids: Optional[List[int]] = None
+    observacoes: Optional[str] = None
+
+
+class ItemPedidoResponse(BaseModel):
+    produto_id: int
+    preco_unitario: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PedidoResponse(BaseModel):
+    id: int
+    numero_pedido: str
+    status: StatusPedido
+    forma_pagamento: Optional[FormaPagamento]
+    subtotal: float
+    total: float
+    created_at: datetime
+    itens: List[ItemPedidoResponse]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+@router.post("/checkout", response_model=PedidoResponse, status_code=201)
+def checkout(
+    dados: CheckoutRequest,
+    request: Request,
+    current_user: Usuario = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    store: CarrinhoStore = Depends(get_carrinho_store),
+):
+    """Cria o pedido reservando as peças (409 se alguma já foi vendida/reservada)"""
+    carrinho = get_carrinho(request, store)
+    produto_ids = dados.produto_ids
+    if produto_ids is None:
+        produto_ids = [int(i) for i in carrinho if str(i).isdigit()]
+
+    pedido = finalizar_pedido(
+        db,
+        current_user.id,
+        produto_ids,
+        dados.endereco_entrega_id,
+        dados.forma_pagamento,
+        dados.observacoes,
+    )
+    invalidar_catalogo()
+
+    # Peças compradas saem do carrinho
+    carrinho_id = obter_carrinho_id(request)
+    if carrinho_id:
+        comprados = {str(item.produto_id) for item in pedido.itens}
+        store.salvar(
+            carrinho_id,
+            {k: v for k, v in carrinho.items() if str(k) not in comprados},
+        )
+
+    return PedidoResponse.model_validate(pedido)
@@ -2,19 +2,51 @@
 CRUD completo de produtos para o Brechó Cata Roupas
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    File,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
-import os
-import uuid
-from PIL import Image
 
-from app.database.connection import get_db
-from app.models.produto import Produto, StatusProduto, CondicaoProduto, TamanhoProduto
+from app.database.connection import get_async_db, get_db
+from app.models.produto import (
+    Produto,
+    StatusImagem,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
 from app.models.categoria import Categoria
+from app.services.busca_service import aplicar_busca
+from app.services.catalogo_cache import em_cache_async, invalidar_catalogo
+from app.services.contadores import agregador
+from app.services.http_cache import (
+    definir_validadores,
+    gerar_etag,
+    maior_data,
+    nao_modificado,
+    representar,
+    resposta_condicional,
+)
+from app.services.imagens import processar_em_segundo_plano, salvar_original
+from app.services.paginacao import paginar, definir_proximo_cursor
+from app.services.produto_service import (
+    ProdutoResponse,
+    consultar_produtos,
+    json_produtos,
+    resposta_produto,
+)
 
 # Router para produtos
 router = APIRouter(prefix="/produtos", tags=["produtos"])
@@ -54,34 +86,6 @@ class ProdutoUpdate(BaseModel):
     historia_peca: Optional[str] = None
 
 
-class ProdutoResponse(BaseModel):
-    id: int
-    nome: str
-    descricao: Optional[str]
-    marca: Optional[str]
-    cor_principal: Optional[str]
-    tamanho: TamanhoProduto
-    condicao: CondicaoProduto
-    preco_original: Optional[float]
-    preco_venda: float
-    status: StatusProduto
-    categoria_id: int
-    categoria_nome: Optional[str] = None
-    ano_aproximado: Optional[int]
-    material: Optional[str]
-    cuidados: Optional[str]
-    historia_peca: Optional[str]
-    imagem_principal: Optional[str]
-    imagens_adicionais: Optional[str]
-    visualizacoes: int
-    favoritado: int
-    created_at: str
-    updated_at: str
-
-    class Config:
-        from_attributes = True
-
-
 class ProdutoFilter(BaseModel):
     categoria_id: Optional[int] = None
     tamanho: Optional[TamanhoProduto] = None
@@ -94,36 +98,40 @@ class ProdutoFilter(BaseModel):
 
 
 # Funções auxiliares
-def save_image(file: UploadFile, produto_id: int) -> str:
-    """Salva imagem do produto e retorna o caminho"""
-    # Criar diretório se não existir
-    upload_dir = "app/static/images/produtos"
-    os.makedirs(upload_dir, exist_ok=True)
-
-    # Gerar nome único
-    file_extension = file.filename.split(".")[-1].lower()
-    filename = f"produto_{produto_id}_{uuid.uuid4().hex[:8]}.{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
-
-    # Salvar arquivo
-    with open(file_path, "wb") as buffer:
-        buffer.write(file.file.read())
-
-    # Redimensionar imagem
-    with Image.open(file_path) as img:
-        img.thumbnail((800, 800), Image.Resampling.LANCZOS)
-        img.save(file_path, optimize=True, quality=85)
-
-    return f"/static/images/produtos/{filename}"
+async def pagina_em_cache(
+    request: Request, db: AsyncSession, consulta: str, buscar, **parametros
+):
+    """Serve a página do cache do catálogo (200 ou 304)
+
+    ``buscar`` recebe uma Session síncrona e devolve (produtos, cursor). Na
+    falha do cache ela roda com ``run_sync`` sobre a conexão assíncrona, então
+    as queries do ORM são as mesmas das rotas síncronas sem ocupar uma thread.
+    A página vai para o cache já serializada e com o ETag (sem Last-Modified:
+    ver ``http_cache``).
+    """
+
+    def calcular(sessao: Session):
+        produtos, proximo = buscar(sessao)
+        corpo = json_produtos(produtos)
+        return representar(corpo), proximo
+
+    representacao, proximo = await em_cache_async(
+        consulta, lambda: db.run_sync(calcular), **parametros
+    )
+    resposta = resposta_condicional(request, representacao, consulta)
+    definir_proximo_cursor(resposta, proximo)
+    return resposta
 
 
 # ENDPOINTS
 
 
 @router.get("/", response_model=List[ProdutoResponse])
-def listar_produtos(
+async def listar_produtos(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     categoria_id: Optional[int] = Query(None),
     tamanho: Optional[TamanhoProduto] = Query(None),
     condicao: Optional[CondicaoProduto] = Query(None),
@@ -132,83 +140,102 @@ def listar_produtos(
     preco_max: Optional[float] = Query(None, ge=0),
     marca: Optional[str] = Query(None),
     busca: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Lista produtos com filtros opcionais"""
-    query = db.query(Produto).join(Categoria, Produto.categoria_id == Categoria.id)
-
-    # Aplicar filtros
-    if categoria_id:
-        query = query.filter(Produto.categoria_id == categoria_id)
-
-    if tamanho:
-        query = query.filter(Produto.tamanho == tamanho)
-
-    if condicao:
-        query = query.filter(Produto.condicao == condicao)
-
-    if status:
-        query = query.filter(Produto.status == status)
-
-    if preco_min:
-        query = query.filter(Produto.preco_venda >= preco_min)
-
-    if preco_max:
-        query = query.filter(Produto.preco_venda <= preco_max)
-
-    if marca:
-        query = query.filter(Produto.marca.ilike(f"%{marca}%"))
-
-    if busca:
-        query = query.filter(
-            or_(
-                Produto.nome.ilike(f"%{busca}%"),
-                Produto.descricao.ilike(f"%{busca}%"),
-                Produto.marca.ilike(f"%{busca}%"),
-            )
-        )
-
-    # Ordenar por criação (mais recentes primeiro)
-    query = query.order_by(Produto.created_at.desc())
-
-    produtos = query.offset(skip).limit(limit).all()
-
-    # Adicionar nome da categoria
-    result = []
-    for produto in produtos:
-        produto_dict = produto.__dict__.copy()
-        produto_dict["categoria_nome"] = produto.categoria.nome
-        produto_dict["created_at"] = produto.created_at.isoformat()
-        produto_dict["updated_at"] = produto.updated_at.isoformat()
-        result.append(ProdutoResponse(**produto_dict))
-
-    return result
+    """Lista produtos com filtros opcionais
+
+    Com ``busca``, a ordem é a relevância de cada peça e depois os mais
+    recentes. A relevância depende só da própria peça (não do BM25, que muda
+    a cada escrita no catálogo), então o cursor não pula nem repete itens
+    quando outras peças são cadastradas ou editadas entre as páginas.
+    """
+
+    def consultar(db: Session):
+        query = consultar_produtos(db)
+
+        # Aplicar filtros
+        if categoria_id:
+            query = query.filter(Produto.categoria_id == categoria_id)
+
+        if tamanho:
+            query = query.filter(Produto.tamanho == tamanho)
+
+        if condicao:
+            query = query.filter(Produto.condicao == condicao)
+
+        if status:
+            query = query.filter(Produto.status == status)
+
+        if preco_min:
+            query = query.filter(Produto.preco_venda >= preco_min)
+
+        if preco_max:
+            query = query.filter(Produto.preco_venda <= preco_max)
+
+        if marca:
+            query = query.filter(Produto.marca.ilike(f"%{marca}%"))
+
+        # Ordenar por criação (mais recentes primeiro)
+        chaves = [(Produto.created_at, True), (Produto.id, True)]
+
+        # Busca textual ordena primeiro pela relevância (nota por peça, que
+        # não muda com escritas em outras peças: o cursor continua válido)
+        if busca:
+            query, relevancia = aplicar_busca(query, busca)
+            if relevancia is not None:
+                chaves.insert(0, (relevancia, True))
+
+        produtos, proximo = paginar(query, chaves, limit, skip=skip, cursor=cursor)
+        return produtos, proximo
+
+    return await pagina_em_cache(
+        request,
+        db,
+        "listar_produtos",
+        consultar,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        categoria_id=categoria_id,
+        tamanho=tamanho,
+        condicao=condicao,
+        status=status,
+        preco_min=preco_min,
+        preco_max=preco_max,
+        marca=marca,
+        busca=busca,
+    )
 
 
 @router.get("/{produto_id}", response_model=ProdutoResponse)
-def obter_produto(produto_id: int, db: Session = Depends(get_db)):
+async def obter_produto(
+    request: Request, produto_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """Obtém um produto específico e incrementa visualizações"""
-    produto = (
-        db.query(Produto)
-        .join(Categoria, Produto.categoria_id == Categoria.id)
-        .filter(Produto.id == produto_id)
-        .first()
-    )
+
+    def buscar(db: Session):
+        return consultar_produtos(db).filter(Produto.id == produto_id).first()
+
+    produto = await db.run_sync(buscar)
 
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
 
-    # Incrementar visualizações
-    produto.visualizacoes += 1
-    db.commit()
+    # Incrementar visualizações: vai para o agregador, sem transação de escrita
+    pendentes = await agregador.incrementar_async(produto.id, "visualizacoes")
 
-    # Adicionar nome da categoria
-    produto_dict = produto.__dict__.copy()
-    produto_dict["categoria_nome"] = produto.categoria.nome
-    produto_dict["created_at"] = produto.created_at.isoformat()
-    produto_dict["updated_at"] = produto.updated_at.isoformat()
+    # Validadores vêm do updated_at (contadores não alteram a versão do produto)
+    ultima_modificacao = maior_data([produto.updated_at])
+    etag = gerar_etag(f"{produto.id}:{produto.updated_at}".encode("utf-8"))
+    if nao_modificado(request, etag, ultima_modificacao):
+        resposta = Response(status_code=304)
+    else:
+        db.expunge(produto)
+        produto.visualizacoes = (produto.visualizacoes or 0) + pendentes
+        resposta = resposta_produto(produto)
 
-    return ProdutoResponse(**produto_dict)
+    definir_validadores(resposta, etag, ultima_modificacao, "obter_produto")
+    return resposta
 
 
 @router.post("/", response_model=ProdutoResponse, status_code=201)
@@ -221,18 +248,13 @@ def criar_produto(produto: ProdutoCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Categoria não encontrada")
 
     # Criar produto
-    db_produto = Produto(**produto.dict())
+    db_produto = Produto(**produto.model_dump())
     db.add(db_produto)
     db.commit()
+    invalidar_catalogo()
     db.refresh(db_produto)
 
-    # Adicionar nome da categoria
-    produto_dict = db_produto.__dict__.copy()
-    produto_dict["categoria_nome"] = categoria.nome
-    produto_dict["created_at"] = db_produto.created_at.isoformat()
-    produto_dict["updated_at"] = db_produto.updated_at.isoformat()
-
-    return ProdutoResponse(**produto_dict)
+    return resposta_produto(db_produto, status_code=201)
 
 
 @router.put("/{produto_id}", response_model=ProdutoResponse)
@@ -256,23 +278,15 @@ def atualizar_produto(
             raise HTTPException(status_code=400, detail="Categoria não encontrada")
 
     # Atualizar campos fornecidos
-    update_data = produto_update.dict(exclude_unset=True)
+    update_data = produto_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(produto, field, value)
 
     db.commit()
+    invalidar_catalogo()
     db.refresh(produto)
 
-    # Buscar categoria para adicionar nome
-    categoria = db.query(Categoria).filter(Categoria.id == produto.categoria_id).first()
-
-    # Adicionar nome da categoria
-    produto_dict = produto.__dict__.copy()
-    produto_dict["categoria_nome"] = categoria.nome if categoria else None
-    produto_dict["created_at"] = produto.created_at.isoformat()
-    produto_dict["updated_at"] = produto.updated_at.isoformat()
-
-    return ProdutoResponse(**produto_dict)
+    return resposta_produto(produto)
 
 
 @router.delete("/{produto_id}")
@@ -286,17 +300,20 @@ def deletar_produto(produto_id: int, db: Session = Depends(get_db)):
     # Soft delete - marca como inativo
     produto.status = StatusProduto.INATIVO
     db.commit()
+    invalidar_catalogo()
 
     return {"message": "Produto removido com sucesso"}
 
 
 @router.post("/{produto_id}/imagem-principal")
-def upload_imagem_principal(
-    produto_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)
+async def upload_imagem_principal(
+    produto_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Upload da imagem principal do produto"""
 
-    produto = db.query(Produto).filter(Produto.id == produto_id).first()
+    produto = await db.get(Produto, produto_id)
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
 
@@ -304,115 +321,130 @@ def upload_imagem_principal(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Arquivo deve ser uma imagem")
 
-    # Salvar imagem
+    # Salvar o original; as versões (thumb, card, zoom) saem em segundo plano
     try:
-        image_path = save_image(file, produto_id)
-        produto.imagem_principal = image_path
-        db.commit()
-
-        return {"message": "Imagem principal atualizada", "url": image_path}
-
+        original = await salvar_original(file)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao salvar imagem: {str(e)}")
 
+    produto.imagem_principal = original.url
+    produto.imagem_rendicoes = None
+    produto.imagem_status = StatusImagem.PROCESSANDO
+    await db.commit()
+    invalidar_catalogo()
+    processar_em_segundo_plano(produto_id, original)
+
+    return {
+        "message": "Imagem principal atualizada",
+        "url": original.url,
+        "status": StatusImagem.PROCESSANDO.value,
+    }
+
 
 @router.post("/{produto_id}/favoritar")
 def favoritar_produto(produto_id: int, db: Session = Depends(get_db)):
     """Adiciona produto aos favoritos (incrementa contador)"""
 
-    produto = db.query(Produto).filter(Produto.id == produto_id).first()
+    produto = db.query(Produto.favoritado).filter(Produto.id == produto_id).first()
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
 
-    produto.favoritado += 1
-    db.commit()
+    pendentes = agregador.incrementar(produto_id, "favoritado")
+    total_favoritos = (produto.favoritado or 0) + pendentes
 
-    return {"message": "Produto favoritado", "total_favoritos": produto.favoritado}
+    return {"message": "Produto favoritado", "total_favoritos": total_favoritos}
 
 
 @router.get("/categoria/{categoria_id}", response_model=List[ProdutoResponse])
-def produtos_por_categoria(
+async def produtos_por_categoria(
+    request: Request,
     categoria_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Lista produtos de uma categoria específica"""
 
-    # Verificar se categoria existe
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
-    if not categoria:
-        raise HTTPException(status_code=404, detail="Categoria não encontrada")
+    def consultar(db: Session):
+        # Verificar se categoria existe (o 404 não vai para o cache)
+        categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
+        if not categoria:
+            raise HTTPException(status_code=404, detail="Categoria não encontrada")
 
-    produtos = (
-        db.query(Produto)
-        .filter(
+        query = consultar_produtos(db).filter(
             and_(
                 Produto.categoria_id == categoria_id,
                 Produto.status == StatusProduto.DISPONIVEL,
             )
         )
-        .order_by(Produto.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+        produtos, proximo = paginar(
+            query,
+            [(Produto.created_at, True), (Produto.id, True)],
+            limit,
+            skip=skip,
+            cursor=cursor,
+        )
+        return produtos, proximo
+
+    return await pagina_em_cache(
+        request,
+        db,
+        "produtos_por_categoria",
+        consultar,
+        categoria_id=categoria_id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
     )
 
-    # Adicionar nome da categoria
-    result = []
-    for produto in produtos:
-        produto_dict = produto.__dict__.copy()
-        produto_dict["categoria_nome"] = categoria.nome
-        produto_dict["created_at"] = produto.created_at.isoformat()
-        produto_dict["updated_at"] = produto.updated_at.isoformat()
-        result.append(ProdutoResponse(**produto_dict))
-
-    return result
-
 
 @router.get("/mais-vistos/", response_model=List[ProdutoResponse])
-def produtos_mais_vistos(
-    limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)
+async def produtos_mais_vistos(
+    request: Request,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Lista produtos mais visualizados"""
 
-    produtos = (
-        db.query(Produto)
-        .filter(Produto.status == StatusProduto.DISPONIVEL)
-        .order_by(Produto.visualizacoes.desc())
-        .limit(limit)
-        .all()
-    )
-
-    result = []
-    for produto in produtos:
-        produto_dict = produto.__dict__.copy()
-        produto_dict["categoria_nome"] = produto.categoria.nome
-        produto_dict["created_at"] = produto.created_at.isoformat()
-        produto_dict["updated_at"] = produto.updated_at.isoformat()
-        result.append(ProdutoResponse(**produto_dict))
+    def consultar(db: Session):
+        produtos = (
+            consultar_produtos(db)
+            .filter(Produto.status == StatusProduto.DISPONIVEL)
+            .order_by(Produto.visualizacoes.desc())
+            .limit(limit)
+            .all()
+        )
+        return produtos, None
 
-    return result
+    return await pagina_em_cache(
+        request, db, "produtos_mais_vistos", consultar, limit=limit
+    )
 
 
 @router.get("/lancamentos/", response_model=List[ProdutoResponse])
-def lancamentos(limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+async def lancamentos(
+    request: Request,
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Lista produtos mais recentes (lançamentos)"""
 
-    produtos = (
-        db.query(Produto)
-        .filter(Produto.status == StatusProduto.DISPONIVEL)
-        .order_by(Produto.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-
-    result = []
-    for produto in produtos:
-        produto_dict = produto.__dict__.copy()
-        produto_dict["categoria_nome"] = produto.categoria.nome
-        produto_dict["created_at"] = produto.created_at.isoformat()
-        produto_dict["updated_at"] = produto.updated_at.isoformat()
-        result.append(ProdutoResponse(**produto_dict))
+    def consultar(db: Session):
+        query = consultar_produtos(db).filter(
+            Produto.status == StatusProduto.DISPONIVEL
+        )
+        produtos, proximo = paginar(
+            query,
+            [(Produto.created_at, True), (Produto.id, True)],
+            limit,
+            cursor=cursor,
+        )
+        return produtos, proximo
 
-    return result
+    return await pagina_em_cache(
+        request, db, "lancamentos", consultar, limit=limit, cursor=cursor
+    )
@@ -2,19 +2,19 @@
 Rotas para gerenciamento de usuários
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, EmailStr, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 
 from app.database.connection import get_db
 from app.models.usuario import Usuario, TipoUsuario
-from app.routes.auth import (
-    get_current_active_user,
-    get_current_admin_user,
-    get_password_hash,
-)
+from app.routes.auth import get_current_active_user, get_current_admin_user
+from app.services.paginacao import paginar, definir_proximo_cursor
+from app.services.senhas import gerar_hash_async, verificar_senha_async
+from app.services.usuarios_cache import invalidar_usuario
 
 # Router para usuários
 router = APIRouter(prefix="/usuarios", tags=["usuários"])
@@ -38,8 +38,10 @@ class UserResponse(BaseModel):
     email_verificado: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+_lista_usuarios = TypeAdapter(List[UserResponse])
 
 
 class PasswordChange(BaseModel):
@@ -53,7 +55,7 @@ class PasswordChange(BaseModel):
 @router.get("/perfil", response_model=UserResponse)
 def get_user_profile(current_user: Usuario = Depends(get_current_active_user)):
     """Obtém perfil do usuário logado"""
-    return UserResponse.from_orm(current_user)
+    return UserResponse.model_validate(current_user)
 
 
 @router.put("/perfil", response_model=UserResponse)
@@ -78,34 +80,37 @@ def update_user_profile(
             )
 
     # Atualizar campos fornecidos
-    update_data = user_update.dict(exclude_unset=True)
+    update_data = user_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(current_user, field, value)
 
     db.commit()
+    invalidar_usuario(current_user.email)
     db.refresh(current_user)
 
-    return UserResponse.from_orm(current_user)
+    return UserResponse.model_validate(current_user)
 
 
 @router.post("/alterar-senha")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
     current_user: Usuario = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Altera senha do usuário"""
-    from app.routes.auth import verify_password
-
     # Verificar senha atual
-    if not verify_password(password_data.senha_atual, current_user.senha_hash):
+    senha_ok = await verificar_senha_async(
+        password_data.senha_atual, current_user.senha_hash
+    )
+    if not senha_ok:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Senha atual incorreta"
         )
 
-    # Atualizar senha
-    current_user.senha_hash = get_password_hash(password_data.senha_nova)
-    db.commit()
+    # Atualizar senha (o commit da sessão síncrona vai para o threadpool)
+    current_user.senha_hash = await gerar_hash_async(password_data.senha_nova)
+    await run_in_threadpool(db.commit)
+    invalidar_usuario(current_user.email)
 
     return {"message": "Senha alterada com sucesso"}
 
@@ -117,12 +122,24 @@ def change_password(
 def list_users(
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     admin_user: Usuario = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     """Lista todos os usuários (apenas admin)"""
-    users = db.query(Usuario).offset(skip).limit(limit).all()
-    return [UserResponse.from_orm(user) for user in users]
+    users, proximo = paginar(
+        db.query(Usuario), [(Usuario.id, False)], limit, skip=skip, cursor=cursor
+    )
+
+    # Serializa direto para JSON; devolver a Response evita a revalidação
+    resposta = Response(
+        _lista_usuarios.dump_json(
+            _lista_usuarios.validate_python(users, from_attributes=True)
+        ),
+        media_type="application/json",
+    )
+    definir_proximo_cursor(resposta, proximo)
+    return resposta
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -137,7 +154,7 @@ def get_user_by_id(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado"
         )
-    return UserResponse.from_orm(user)
+    return UserResponse.model_validate(user)
 
 
 @router.put("/{user_id}/ativo")
@@ -156,6 +173,7 @@ def toggle_user_status(
 
     user.ativo = ativo
     db.commit()
+    invalidar_usuario(user.email)
 
     status_text = "ativado" if ativo else "desativado"
     return {"message": f"Usuário {status_text} com sucesso"}
@@ -177,6 +195,7 @@ def change_user_type(
 
     user.tipo = tipo
     db.commit()
+    invalidar_usuario(user.email)
 
     return {"message": f"Tipo do usuário alterado para {tipo.value}"}
 
@@ -197,5 +216,6 @@ def delete_user(
     # Soft delete - marca como inativo
     user.ativo = False
     db.commit()
+    invalidar_usuario(user.email)
 
     return {"message": "Usuário removido com sucesso"}
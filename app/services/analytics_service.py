@@ -0,0 +1,234 @@
+"""
+Analytics de vendas a partir de agregados diários
+
+As consultas do painel leem ``vendas_diarias`` (poucas linhas por dia) em vez
+de varrer pedidos e itens. Um job de fundo mantém a tabela de forma
+incremental: a cada ciclo pega os pedidos e itens com ``updated_at`` depois
+da marca d'água, descobre os dias deles e recalcula só esses dias inteiros
+(apaga e insere de novo, na mesma transação). Recalcular o dia todo deixa o
+job idempotente e trata mudanças de status, que movem o pedido de linha.
+
+A marca fica ``ANALYTICS_ROLLUP_LAG`` segundos antes de agora: uma transação
+que gravou ``updated_at`` pouco antes de confirmar ainda entra no ciclo
+seguinte. Os dias são em UTC.
+"""
+
+import asyncio
+import enum
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import and_, delete, distinct, func, insert, null, select, union
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.models.categoria import Categoria
+from app.models.item_pedido import ItemPedido
+from app.models.pedido import Pedido, StatusPedido
+from app.models.produto import Produto
+from app.models.venda_diaria import ProgressoRollup, VendaDiaria
+
+logger = logging.getLogger(__name__)
+
+NOME_ROLLUP = "vendas_diarias"
+
+# Dias recalculados por comando (limite de parâmetros do IN)
+DIAS_POR_LOTE = 200
+
+COLUNAS_ROLLUP = [
+    "dia",
+    "categoria_id",
+    "forma_pagamento",
+    "status",
+    "pedidos",
+    "itens",
+    "receita",
+]
+
+
+class AgrupamentoVendas(enum.Enum):
+    DIA = "dia"
+    CATEGORIA = "categoria"
+    FORMA_PAGAMENTO = "forma_pagamento"
+    STATUS = "status"
+
+
+def _utc(valor: datetime) -> datetime:
+    """O SQLite devolve as datas sem fuso; todas são gravadas em UTC"""
+    return valor if valor.tzinfo else valor.replace(tzinfo=timezone.utc)
+
+
+def _dia(valor: Any) -> date:
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def _dias_alterados(
+    db: Session, desde: Optional[datetime], ate: datetime
+) -> Set[date]:
+    dia = func.date(Pedido.created_at)
+    if desde is None:
+        # Primeira execução: todo o histórico
+        consulta = select(dia).distinct()
+    else:
+        consulta = union(
+            select(dia).where(Pedido.updated_at > desde, Pedido.updated_at <= ate),
+            select(dia)
+            .join(ItemPedido, ItemPedido.pedido_id == Pedido.id)
+            .where(ItemPedido.updated_at > desde, ItemPedido.updated_at <= ate),
+        )
+    return {_dia(valor) for (valor,) in db.execute(consulta) if valor}
+
+
+def _recalcular(db: Session, dias: List[date]):
+    dia = func.date(Pedido.created_at).label("dia")
+    # O intervalo usa o índice de created_at; o IN escolhe os dias
+    do_lote = and_(
+        Pedido.created_at >= datetime.combine(min(dias), time.min, timezone.utc),
+        func.date(Pedido.created_at).in_([d.isoformat() for d in dias]),
+    )
+
+    por_categoria = (
+        select(
+            dia,
+            Produto.categoria_id,
+            Pedido.forma_pagamento,
+            Pedido.status,
+            func.count(distinct(Pedido.id)),
+            func.sum(ItemPedido.quantidade),
+            func.sum(ItemPedido.subtotal),
+        )
+        .join(ItemPedido, ItemPedido.pedido_id == Pedido.id)
+        .join(Produto, Produto.id == ItemPedido.produto_id)
+        .where(do_lote)
+        .group_by(dia, Produto.categoria_id, Pedido.forma_pagamento, Pedido.status)
+    )
+
+    por_pedido = (
+        select(
+            dia,
+            Pedido.forma_pagamento,
+            Pedido.status,
+            Pedido.total,
+            func.coalesce(func.sum(ItemPedido.quantidade), 0).label("itens"),
+        )
+        .outerjoin(ItemPedido, ItemPedido.pedido_id == Pedido.id)
+        .where(do_lote)
+        .group_by(Pedido.id)
+        .subquery()
+    )
+    totais = select(
+        por_pedido.c.dia,
+        null(),
+        por_pedido.c.forma_pagamento,
+        por_pedido.c.status,
+        func.count(),
+        func.sum(por_pedido.c.itens),
+        func.sum(por_pedido.c.total),
+    ).group_by(por_pedido.c.dia, por_pedido.c.forma_pagamento, por_pedido.c.status)
+
+    db.execute(delete(VendaDiaria).where(VendaDiaria.dia.in_(dias)))
+    db.execute(insert(VendaDiaria).from_select(COLUNAS_ROLLUP, por_categoria))
+    db.execute(insert(VendaDiaria).from_select(COLUNAS_ROLLUP, totais))
+
+
+def atualizar_vendas_diarias(db: Session, agora: Optional[datetime] = None) -> int:
+    """Recalcula os dias com pedidos alterados desde a marca; retorna quantos"""
+    ate = (agora or datetime.now(timezone.utc)) - timedelta(
+        seconds=settings.ANALYTICS_ROLLUP_LAG
+    )
+    progresso = db.get(ProgressoRollup, NOME_ROLLUP)
+    desde = _utc(progresso.processado_ate) if progresso else None
+    if desde is not None and desde >= ate:
+        return 0
+
+    dias = sorted(_dias_alterados(db, desde, ate))
+    if desde is None:
+        db.execute(delete(VendaDiaria))
+    for i in range(0, len(dias), DIAS_POR_LOTE):
+        _recalcular(db, dias[i : i + DIAS_POR_LOTE])
+
+    if progresso is None:
+        progresso = ProgressoRollup(nome=NOME_ROLLUP, processado_ate=ate)
+        db.add(progresso)
+    progresso.processado_ate = ate
+    db.commit()
+    return len(dias)
+
+
+def processado_ate(db: Session) -> Optional[datetime]:
+    progresso = db.get(ProgressoRollup, NOME_ROLLUP)
+    return _utc(progresso.processado_ate) if progresso else None
+
+
+def _chave(valor: Any) -> Optional[str]:
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def consultar_vendas(
+    db: Session,
+    inicio: date,
+    fim: date,
+    agrupar_por: AgrupamentoVendas,
+    incluir_cancelados: bool = False,
+) -> List[Dict[str, Any]]:
+    """Pedidos, itens e receita no período, somando as linhas diárias"""
+    chave = {
+        AgrupamentoVendas.DIA: VendaDiaria.dia,
+        AgrupamentoVendas.CATEGORIA: Categoria.nome,
+        AgrupamentoVendas.FORMA_PAGAMENTO: VendaDiaria.forma_pagamento,
+        AgrupamentoVendas.STATUS: VendaDiaria.status,
+    }[agrupar_por]
+
+    consulta = (
+        select(
+            chave,
+            func.sum(VendaDiaria.pedidos),
+            func.sum(VendaDiaria.itens),
+            func.sum(VendaDiaria.receita),
+        )
+        .where(VendaDiaria.dia >= inicio, VendaDiaria.dia <= fim)
+        .group_by(chave)
+        .order_by(chave)
+    )
+    if agrupar_por is AgrupamentoVendas.CATEGORIA:
+        consulta = consulta.join(Categoria, Categoria.id == VendaDiaria.categoria_id)
+    else:
+        consulta = consulta.where(VendaDiaria.categoria_id.is_(None))
+    if not incluir_cancelados:
+        consulta = consulta.where(
+            VendaDiaria.status.is_distinct_from(StatusPedido.CANCELADO)
+        )
+
+    return [
+        {
+            "chave": _chave(valor),
+            "pedidos": pedidos,
+            "itens": itens,
+            "receita": round(receita or 0.0, 2),
+        }
+        for valor, pedidos, itens, receita in db.execute(consulta)
+    ]
+
+
+def _executar_job() -> int:
+    with SessionLocal() as db:
+        return atualizar_vendas_diarias(db)
+
+
+async def atualizar_periodicamente(
+    intervalo: float = settings.ANALYTICS_ROLLUP_INTERVAL,
+):
+    """Tarefa de fundo: atualiza os agregados a cada ``intervalo`` segundos"""
+    while True:
+        try:
+            await run_in_threadpool(_executar_job)
+        except Exception:
+            logger.exception("Falha ao atualizar vendas_diarias")
+        await asyncio.sleep(intervalo)
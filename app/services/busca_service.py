@@ -0,0 +1,79 @@
+"""
+Busca textual de produtos
+
+No SQLite usa o índice FTS5 ``produtos_fts``; em outros bancos cai para ILIKE
+por termo.
+
+A relevância não é o BM25 do FTS5: ele depende das estatísticas do índice
+inteiro (frequência dos termos, tamanho médio dos documentos), então qualquer
+escrita no catálogo muda a nota de todas as peças, e o cursor da paginação
+(que guarda a nota da última peça da página) pularia ou repetiria itens. A
+nota usada soma o peso de cada coluna em que todos os termos aparecem
+(``PESOS_COLUNAS``): depende só da própria peça, e só muda se ela for editada.
+"""
+
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, or_, text
+from sqlalchemy.orm import Query
+
+from app.models.produto import Produto
+
+# Peso de cada coluna do índice na relevância
+PESOS_COLUNAS = {"nome": 10.0, "descricao": 1.0, "marca": 5.0}
+
+
+def extrair_termos(busca: str) -> List[str]:
+    """Quebra a busca em termos alfanuméricos (descarta sintaxe FTS)"""
+    return re.findall(r"\w+", busca.lower())
+
+
+def montar_consulta_fts(termos: List[str]) -> str:
+    """Monta a expressão MATCH: todos os termos, aceitando prefixo"""
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+
+def aplicar_busca(query: Query, busca: str) -> Tuple[Query, Optional[Any]]:
+    """Filtra a query pelos termos de busca
+
+    Retorna a query e a coluna de relevância (maior é mais relevante) para ser
+    usada na ordenação, ou ``None`` quando não há ranking disponível.
+    """
+    termos = extrair_termos(busca)
+    if not termos:
+        return query, None
+
+    if query.session.bind.dialect.name != "sqlite":
+        for termo in termos:
+            query = query.filter(
+                or_(
+                    Produto.nome.ilike(f"%{termo}%"),
+                    Produto.descricao.ilike(f"%{termo}%"),
+                    Produto.marca.ilike(f"%{termo}%"),
+                )
+            )
+        return query, None
+
+    consulta = montar_consulta_fts(termos)
+    # Uma subconsulta por coluna (filtro de coluna do FTS5): todos os termos nela
+    nota = " + ".join(
+        f"{peso} * (rowid IN (SELECT rowid FROM produtos_fts "
+        f"WHERE produtos_fts MATCH :{coluna}))"
+        for coluna, peso in PESOS_COLUNAS.items()
+    )
+    resultados = (
+        text(
+            f"SELECT rowid AS produto_id, {nota} AS relevancia "
+            "FROM produtos_fts WHERE produtos_fts MATCH :consulta"
+        )
+        .bindparams(
+            consulta=consulta,
+            **{coluna: f"{{{coluna}}} : ({consulta})" for coluna in PESOS_COLUNAS},
+        )
+        .columns(produto_id=Integer, relevancia=Float)
+        .subquery("busca")
+    )
+
+    query = query.join(resultados, resultados.c.produto_id == Produto.id)
+    return query, resultados.c.relevancia
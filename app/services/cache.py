@@ -0,0 +1,102 @@
+"""
+Cache em memória com despejo LRU e expiração por TTL
+
+Genérico e thread-safe (as rotas síncronas rodam no threadpool). Guarda
+contadores de acertos/falhas/despejos para dimensionar ``max_itens``.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    def __init__(
+        self,
+        max_itens: int,
+        ttl: float,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.relogio = relogio
+        self._lock = threading.Lock()
+        self._itens: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.expirados = 0
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                self.falhas += 1
+                return padrao
+
+            expira_em, valor = item
+            if expira_em <= self.relogio():
+                del self._itens[chave]
+                self.expirados += 1
+                self.falhas += 1
+                return padrao
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any, ttl: Optional[float] = None):
+        expira_em = self.relogio() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._itens[chave] = (expira_em, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.despejos += 1
+
+    def obter_ou_calcular(self, chave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache ou calcula e guarda
+
+        O cálculo roda fora do lock: duas requisições simultâneas podem calcular
+        o mesmo valor, mas nenhuma fica bloqueada esperando a outra.
+        """
+        valor = self.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = calcular()
+            self.definir(chave, valor)
+        return valor
+
+    async def obter_ou_calcular_async(
+        self, chave: Hashable, calcular: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Versão para rotas assíncronas: ``calcular`` é uma corrotina"""
+        valor = self.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = await calcular()
+            self.definir(chave, valor)
+        return valor
+
+    def remover(self, chave: Hashable):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "ttl": self.ttl,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "despejos": self.despejos,
+                "expirados": self.expirados,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            }
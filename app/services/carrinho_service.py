@@ -0,0 +1,105 @@
+"""
+Precificação do carrinho
+
+Resolve o carrinho inteiro com um único ``SELECT ... WHERE id IN (...)``,
+carregando só as colunas necessárias, e devolve itens, totais e a
+disponibilidade de cada peça de uma vez.
+"""
+
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.models.produto import Produto, StatusProduto
+
+
+class CarrinhoResponse(BaseModel):
+    produto_id: int
+    nome: str
+    preco: float
+    quantidade: int
+    subtotal: float
+    imagem: Optional[str] = None
+    disponivel: bool = True
+
+
+class CarrinhoPrecificado(BaseModel):
+    itens: List[CarrinhoResponse]
+    total: float
+    total_items: int
+    items_count: int
+    indisponiveis: List[int]
+
+    @property
+    def disponiveis(self) -> List[CarrinhoResponse]:
+        return [item for item in self.itens if item.disponivel]
+
+
+def _ids_do_carrinho(carrinho: Dict) -> List[int]:
+    ids = []
+    for produto_id in carrinho:
+        try:
+            ids.append(int(produto_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def precificar_carrinho(db: Session, carrinho: Dict) -> CarrinhoPrecificado:
+    """Monta itens e totais do carrinho numa única consulta
+
+    Peças vendidas, reservadas ou inativas continuam na lista, marcadas como
+    indisponíveis e fora do total; ids que não existem mais são ignorados.
+    """
+    ids = _ids_do_carrinho(carrinho)
+    linhas = {}
+    if ids:
+        linhas = {
+            linha.id: linha
+            for linha in db.query(
+                Produto.id,
+                Produto.nome,
+                Produto.preco_venda,
+                Produto.imagem_principal,
+                Produto.status,
+            ).filter(Produto.id.in_(ids))
+        }
+
+    itens = []
+    indisponiveis = []
+    total = 0.0
+    total_items = 0
+    for produto_id in ids:
+        linha = linhas.get(produto_id)
+        if linha is None:
+            continue
+
+        quantidade = int(carrinho.get(str(produto_id), 1))
+        disponivel = linha.status == StatusProduto.DISPONIVEL
+        subtotal = linha.preco_venda * quantidade
+        itens.append(
+            CarrinhoResponse(
+                produto_id=linha.id,
+                nome=linha.nome,
+                preco=linha.preco_venda,
+                quantidade=quantidade,
+                subtotal=subtotal,
+                imagem=linha.imagem_principal,
+                disponivel=disponivel,
+            )
+        )
+
+        if disponivel:
+            total += subtotal
+            total_items += quantidade
+        else:
+            indisponiveis.append(linha.id)
+
+    return CarrinhoPrecificado(
+        itens=itens,
+        total=total,
+        total_items=total_items,
+        items_count=len(carrinho),
+        indisponiveis=indisponiveis,
+    )
@@ -0,0 +1,280 @@
+"""
+Armazenamento do carrinho no servidor
+
+O cliente guarda apenas um id de carrinho curto e assinado no cookie; os itens
+ficam num backend plugável:
+
+- ``BancoCarrinhoStore``: tabela ``carrinhos`` no banco da aplicação (SQLite
+  por padrão), usado em produção;
+- ``MemoriaCarrinhoStore``: dicionário em memória, para testes.
+
+O carrinho do usuário logado é persistente e o carrinho de visitante é
+mesclado nele no login, então ele acompanha o usuário entre dispositivos.
+
+O carrinho de visitante vence junto com o cookie: cada gravação renova o
+prazo (``expira_em``) por ``CART_COOKIE_MAX_AGE``, e uma tarefa de fundo
+(iniciada no lifespan) apaga os vencidos em lotes de ``CART_SWEEP_BATCH``.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from fastapi import Response
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database.connection import AsyncSessionLocal, SessionLocal
+from app.models.carrinho import Carrinho
+
+logger = logging.getLogger(__name__)
+
+COOKIE_CARRINHO = "carrinho_id"
+
+
+# Assinatura do id do carrinho
+def _assinatura(carrinho_id: str) -> str:
+    digest = hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), carrinho_id.encode("utf-8"), hashlib.sha256
+    ).digest()
+    return base64.urlsafe_b64encode(digest[:12]).decode("ascii")
+
+
+def assinar_carrinho_id(carrinho_id: str) -> str:
+    return f"{carrinho_id}.{_assinatura(carrinho_id)}"
+
+
+def verificar_carrinho_id(token: Optional[str]) -> Optional[str]:
+    """Retorna o id do carrinho se a assinatura do cookie for válida"""
+    if not token or "." not in token:
+        return None
+    carrinho_id, assinatura = token.rsplit(".", 1)
+    if not hmac.compare_digest(assinatura, _assinatura(carrinho_id)):
+        return None
+    return carrinho_id
+
+
+def novo_carrinho_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def prazo_visitante() -> datetime:
+    """Vencimento de um carrinho de visitante gravado agora (o mesmo do cookie)"""
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.CART_COOKIE_MAX_AGE)
+
+
+def definir_cookie_carrinho(response: Response, carrinho_id: str):
+    response.set_cookie(
+        COOKIE_CARRINHO,
+        assinar_carrinho_id(carrinho_id),
+        max_age=settings.CART_COOKIE_MAX_AGE,
+        httponly=True,
+        samesite="lax",
+    )
+
+
+class CarrinhoStore(ABC):
+    """Interface dos backends de carrinho"""
+
+    @abstractmethod
+    def obter(self, carrinho_id: str) -> Dict[str, int]:
+        """Itens do carrinho (vazio se não existir)"""
+
+    async def obter_async(self, carrinho_id: str) -> Dict[str, int]:
+        """Leitura para rotas assíncronas (padrão: ``obter`` no threadpool)"""
+        return await run_in_threadpool(self.obter, carrinho_id)
+
+    @abstractmethod
+    def salvar(self, carrinho_id: str, itens: Dict[str, int]):
+        """Grava os itens, criando o carrinho se necessário"""
+
+    @abstractmethod
+    def remover(self, carrinho_id: str):
+        """Apaga o carrinho"""
+
+    @abstractmethod
+    def carrinho_do_usuario(self, usuario_id: int) -> str:
+        """Id do carrinho persistente do usuário (cria se não existir)"""
+
+    @abstractmethod
+    def pertence_a_usuario(self, carrinho_id: str) -> bool:
+        """Indica se é o carrinho persistente de algum usuário"""
+
+    def remover_expirados(self, agora: Optional[datetime] = None) -> int:
+        """Apaga um lote de carrinhos de visitante vencidos; devolve quantos"""
+        return 0
+
+    def mesclar(self, origem_id: str, destino_id: str) -> Dict[str, int]:
+        """Move os itens do carrinho de origem para o de destino"""
+        if origem_id == destino_id:
+            return self.obter(destino_id)
+
+        itens = self.obter(destino_id)
+        itens.update(self.obter(origem_id))
+        self.salvar(destino_id, itens)
+        self.remover(origem_id)
+        return itens
+
+
+class MemoriaCarrinhoStore(CarrinhoStore):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._carrinhos: Dict[str, Dict[str, int]] = {}
+        self._usuarios: Dict[int, str] = {}
+
+    def obter(self, carrinho_id: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._carrinhos.get(carrinho_id, {}))
+
+    async def obter_async(self, carrinho_id: str) -> Dict[str, int]:
+        return self.obter(carrinho_id)
+
+    def salvar(self, carrinho_id: str, itens: Dict[str, int]):
+        with self._lock:
+            self._carrinhos[carrinho_id] = dict(itens)
+
+    def remover(self, carrinho_id: str):
+        with self._lock:
+            self._carrinhos.pop(carrinho_id, None)
+
+    def carrinho_do_usuario(self, usuario_id: int) -> str:
+        with self._lock:
+            if usuario_id not in self._usuarios:
+                self._usuarios[usuario_id] = novo_carrinho_id()
+            return self._usuarios[usuario_id]
+
+    def pertence_a_usuario(self, carrinho_id: str) -> bool:
+        with self._lock:
+            return carrinho_id in self._usuarios.values()
+
+
+class BancoCarrinhoStore(CarrinhoStore):
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        async_session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ):
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+
+    def obter(self, carrinho_id: str) -> Dict[str, int]:
+        with self.session_factory() as db:
+            itens = (
+                db.query(Carrinho.itens).filter(Carrinho.token == carrinho_id).scalar()
+            )
+            return dict(itens or {})
+
+    async def obter_async(self, carrinho_id: str) -> Dict[str, int]:
+        async with self.async_session_factory() as db:
+            itens = await db.scalar(
+                select(Carrinho.itens).where(Carrinho.token == carrinho_id)
+            )
+            return dict(itens or {})
+
+    def salvar(self, carrinho_id: str, itens: Dict[str, int]):
+        with self.session_factory() as db:
+            carrinho = db.query(Carrinho).filter(Carrinho.token == carrinho_id).first()
+            if carrinho:
+                carrinho.itens = dict(itens)
+                if carrinho.usuario_id is None:
+                    carrinho.expira_em = prazo_visitante()
+            else:
+                db.add(
+                    Carrinho(
+                        token=carrinho_id, itens=dict(itens), expira_em=prazo_visitante()
+                    )
+                )
+            db.commit()
+
+    def remover(self, carrinho_id: str):
+        with self.session_factory() as db:
+            db.query(Carrinho).filter(Carrinho.token == carrinho_id).delete()
+            db.commit()
+
+    def carrinho_do_usuario(self, usuario_id: int) -> str:
+        with self.session_factory() as db:
+            consulta = db.query(Carrinho.token).filter(Carrinho.usuario_id == usuario_id)
+            token = consulta.scalar()
+            if token:
+                return token
+
+            token = novo_carrinho_id()
+            db.add(Carrinho(token=token, usuario_id=usuario_id, itens={}))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Outro login do mesmo usuário criou o carrinho junto: usa o dele
+                db.rollback()
+                return consulta.scalar()
+            return token
+
+    def pertence_a_usuario(self, carrinho_id: str) -> bool:
+        with self.session_factory() as db:
+            usuario_id = (
+                db.query(Carrinho.usuario_id)
+                .filter(Carrinho.token == carrinho_id)
+                .scalar()
+            )
+            return usuario_id is not None
+
+    def remover_expirados(
+        self, agora: Optional[datetime] = None, lote: int = settings.CART_SWEEP_BATCH
+    ) -> int:
+        agora = agora or datetime.now(timezone.utc)
+        vencidos = (
+            select(Carrinho.id)
+            .where(Carrinho.expira_em.is_not(None), Carrinho.expira_em <= agora)
+            .limit(lote)
+            .scalar_subquery()
+        )
+        with self.session_factory() as db:
+            removidos = db.execute(
+                delete(Carrinho)
+                .where(Carrinho.id.in_(vencidos))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return removidos
+
+
+BACKENDS = {
+    "database": BancoCarrinhoStore,
+    "memory": MemoriaCarrinhoStore,
+}
+
+
+def criar_carrinho_store(backend: str = settings.CART_STORE_BACKEND) -> CarrinhoStore:
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de carrinho desconhecido: {backend}")
+    return BACKENDS[backend]()
+
+
+carrinho_store = criar_carrinho_store()
+
+
+def get_carrinho_store() -> CarrinhoStore:
+    """Dependência das rotas (substituível nos testes)"""
+    return carrinho_store
+
+
+async def limpar_periodicamente(intervalo: float = settings.CART_SWEEP_INTERVAL):
+    """Tarefa de fundo: apaga os carrinhos de visitante vencidos, lote a lote"""
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            lote_cheio = settings.CART_SWEEP_BATCH
+            while await run_in_threadpool(carrinho_store.remover_expirados) >= lote_cheio:
+                await asyncio.sleep(0)
+        except Exception:
+            logger.exception("Falha ao apagar carrinhos vencidos")
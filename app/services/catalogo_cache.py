@@ -0,0 +1,101 @@
+"""
+Cache das leituras públicas do catálogo
+
+As listagens de produtos e categorias são guardadas já serializadas, com a
+chave formada pela versão do catálogo, o nome da consulta e os parâmetros
+normalizados. Toda escrita em produtos/categorias chama
+``invalidar_catalogo()``, que incrementa a versão: as entradas antigas deixam
+de ser alcançáveis e saem pelo LRU ou pelo TTL.
+
+A versão é por processo; com vários workers, o TTL limita por quanto tempo
+um worker pode servir o catálogo antigo. Contadores de visualizações e
+favoritos não invalidam o cache e também ficam defasados no máximo um TTL.
+"""
+
+import itertools
+import threading
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.config import settings
+from app.services.busca_service import extrair_termos
+from app.services.cache import CacheLRU
+
+cache_catalogo = CacheLRU(
+    max_itens=settings.CATALOG_CACHE_MAX_ITEMS, ttl=settings.CATALOG_CACHE_TTL
+)
+
+_versoes = itertools.count(1)
+_lock = threading.Lock()
+_versao = next(_versoes)
+
+
+def versao_catalogo() -> int:
+    return _versao
+
+
+def invalidar_catalogo():
+    """Chamar depois do commit de qualquer escrita em produtos ou categorias"""
+    global _versao
+    with _lock:
+        _versao = next(_versoes)
+
+
+def _normalizar_marca(marca: str) -> str:
+    # O LIKE do SQLite só ignora a caixa de letras ASCII
+    return marca.casefold() if marca.isascii() else marca
+
+
+# Texto livre cujas variações dão o mesmo resultado: a busca só usa os termos
+# (em minúsculas), e a marca é filtrada com ILIKE. Os demais parâmetros, como
+# o cursor (base64, sensível à caixa), entram na chave como vieram.
+NORMALIZACAO_TEXTO: Dict[str, Callable[[str], str]] = {
+    "busca": lambda busca: " ".join(extrair_termos(busca)),
+    "marca": _normalizar_marca,
+}
+
+
+def _normalizar(nome: str, valor: Any) -> Hashable:
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, str) and nome in NORMALIZACAO_TEXTO:
+        return NORMALIZACAO_TEXTO[nome](valor)
+    return valor
+
+
+def chave_catalogo(consulta: str, **parametros) -> Tuple:
+    """Chave da consulta: versão atual + parâmetros normalizados e ordenados
+
+    Valores vazios viram ``None``, como os filtros das rotas já tratam.
+    """
+    normalizados = tuple(
+        sorted(
+            (nome, _normalizar(nome, valor) or None)
+            for nome, valor in parametros.items()
+        )
+    )
+    return (versao_catalogo(), consulta, normalizados)
+
+
+def em_cache(consulta: str, calcular: Callable[[], Any], **parametros) -> Any:
+    """Resultado da consulta em cache, calculado com ``calcular`` na falha
+
+    A chave é montada antes do cálculo: se o catálogo mudar no meio, o
+    resultado fica guardado na versão antiga e não é servido depois.
+    """
+    return cache_catalogo.obter_ou_calcular(
+        chave_catalogo(consulta, **parametros), calcular
+    )
+
+
+async def em_cache_async(
+    consulta: str, calcular: Callable[[], Awaitable[Any]], **parametros
+) -> Any:
+    """Igual a ``em_cache``, para rotas assíncronas"""
+    return await cache_catalogo.obter_ou_calcular_async(
+        chave_catalogo(consulta, **parametros), calcular
+    )
+
+
+def estatisticas_catalogo() -> dict:
+    return {"versao": versao_catalogo(), **cache_catalogo.estatisticas()}
@@ -0,0 +1,176 @@
+"""
+Contadores de visualizações e favoritos com escrita adiada (write-behind)
+
+Cada visualização/favorito só incrementa um contador em memória. Os valores
+acumulados são gravados periodicamente num único lote de
+``UPDATE produtos SET visualizacoes = visualizacoes + :n`` por produto, então
+uma leitura de página não vira mais uma transação de escrita e incrementos
+concorrentes não se perdem no read-modify-write.
+
+Quando o acúmulo chega em ``COUNTER_MAX_PENDING``, a requisição só avisa a
+tarefa de fundo, que grava o lote na hora; a requisição nunca espera nem
+falha por causa da gravação. Sem a tarefa (scripts, testes), quem estourou o
+limite grava, mas uma falha só é registrada, e depois dela a requisição não
+tenta de novo antes de ``COUNTER_FLUSH_INTERVAL``.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import bindparam, func, update
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database.connection import engine
+from app.models.produto import Produto
+
+logger = logging.getLogger(__name__)
+
+CAMPOS = ("visualizacoes", "favoritado")
+
+_produtos = Produto.__table__
+
+# Um UPDATE por produto, executado em lote (executemany) numa transação
+_UPDATE_CONTADORES = (
+    update(_produtos)
+    .where(_produtos.c.id == bindparam("b_id"))
+    .values(
+        {
+            **{
+                campo: func.coalesce(_produtos.c[campo], 0) + bindparam(f"b_{campo}")
+                for campo in CAMPOS
+            },
+            # Métrica não é edição do produto: preserva updated_at
+            "updated_at": _produtos.c.updated_at,
+        }
+    )
+)
+
+
+class AgregadorContadores:
+    def __init__(self, bind, max_pendentes: int):
+        self.bind = bind
+        self.max_pendentes = max_pendentes
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pendentes: Dict[int, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(CAMPOS, 0)
+        )
+        self._total = 0
+        # Avisa a tarefa de fundo que o lote encheu (None: ela não está rodando)
+        self._avisar: Optional[Callable[[], None]] = None
+        self._ultima_falha: Optional[float] = None
+        self.falhas = 0
+
+    def _acumular(self, produto_id: int, campo: str, n: int):
+        if campo not in CAMPOS:
+            raise ValueError(f"Contador desconhecido: {campo}")
+
+        with self._lock:
+            self._pendentes[produto_id][campo] += n
+            self._total += n
+            pendente = self._pendentes[produto_id][campo]
+            cheio = self._total >= self.max_pendentes
+        return pendente, cheio
+
+    def incrementar(self, produto_id: int, campo: str, n: int = 1) -> int:
+        """Acumula o incremento e retorna o total ainda não gravado do campo"""
+        pendente, cheio = self._acumular(produto_id, campo, n)
+
+        # Limite de memória atingido: a tarefa de fundo grava o lote
+        if cheio:
+            if self._avisar is not None:
+                self._avisar()
+            else:
+                self._flush_sem_falha()
+        return pendente
+
+    async def incrementar_async(self, produto_id: int, campo: str, n: int = 1) -> int:
+        """Igual a ``incrementar``; o lote é gravado fora do event loop"""
+        pendente, cheio = self._acumular(produto_id, campo, n)
+
+        if cheio:
+            if self._avisar is not None:
+                self._avisar()
+            else:
+                await run_in_threadpool(self._flush_sem_falha)
+        return pendente
+
+    def _flush_sem_falha(self) -> int:
+        """Flush no caminho da requisição: falha fica no log, não na resposta"""
+        if (
+            self._ultima_falha is not None
+            and time.monotonic() - self._ultima_falha < settings.COUNTER_FLUSH_INTERVAL
+        ):
+            return 0
+        try:
+            return self.flush()
+        except Exception:
+            return 0
+
+    def pendentes(self, produto_id: int, campo: str) -> int:
+        with self._lock:
+            contadores = self._pendentes.get(produto_id)
+            return contadores[campo] if contadores else 0
+
+    def flush(self) -> int:
+        """Grava os incrementos acumulados; retorna quantos produtos atualizou"""
+        with self._flush_lock:
+            with self._lock:
+                lote, self._pendentes = self._pendentes, defaultdict(
+                    lambda: dict.fromkeys(CAMPOS, 0)
+                )
+                self._total = 0
+
+            if not lote:
+                return 0
+
+            parametros = [
+                {"b_id": produto_id, **{f"b_{c}": n for c, n in contadores.items()}}
+                for produto_id, contadores in lote.items()
+            ]
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(_UPDATE_CONTADORES, parametros)
+                self._ultima_falha = None
+            except Exception:
+                logger.exception("Falha ao gravar contadores; lote devolvido")
+                self._ultima_falha = time.monotonic()
+                self.falhas += 1
+                with self._lock:
+                    for produto_id, contadores in lote.items():
+                        for campo, n in contadores.items():
+                            self._pendentes[produto_id][campo] += n
+                            self._total += n
+                raise
+
+            return len(lote)
+
+
+agregador = AgregadorContadores(engine, max_pendentes=settings.COUNTER_MAX_PENDING)
+
+
+async def gravar_periodicamente(intervalo: float = settings.COUNTER_FLUSH_INTERVAL):
+    """Tarefa de fundo: grava a cada ``intervalo`` segundos ou quando o lote enche"""
+    loop = asyncio.get_running_loop()
+    cheio = asyncio.Event()
+    # As rotas síncronas avisam de outras threads
+    agregador._avisar = lambda: loop.call_soon_threadsafe(cheio.set)
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(cheio.wait(), intervalo)
+            except asyncio.TimeoutError:
+                pass
+            cheio.clear()
+            try:
+                await run_in_threadpool(agregador.flush)
+            except Exception:
+                # Já registrado no flush; não insiste a cada aviso
+                await asyncio.sleep(intervalo)
+    finally:
+        agregador._avisar = None
@@ -0,0 +1,63 @@
+"""
+Estatísticas do dashboard do admin
+
+No SQLite os números vêm da tabela ``estatisticas``, mantida por triggers a
+cada escrita em produtos, categorias e usuários: o dashboard lê poucas linhas
+em vez de contar as tabelas. Em outros bancos (sem os triggers) cai para uma
+única consulta com agregação condicional.
+"""
+
+from typing import Dict
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.categoria import Categoria
+from app.models.estatistica import Estatistica
+from app.models.produto import Produto, StatusProduto
+from app.models.usuario import Usuario
+
+
+def _por_status(status: StatusProduto):
+    return func.coalesce(func.sum(case((Produto.status == status, 1), else_=0)), 0)
+
+
+def contar_estatisticas(db: Session) -> Dict[str, int]:
+    """Todas as contagens numa consulta (uma varredura de produtos)"""
+    linha = db.execute(
+        select(
+            func.count(Produto.id),
+            _por_status(StatusProduto.DISPONIVEL),
+            _por_status(StatusProduto.VENDIDO),
+            select(func.count(Categoria.id)).scalar_subquery(),
+            select(func.count(Usuario.id)).scalar_subquery(),
+        )
+    ).one()
+    return dict(
+        zip(
+            (
+                "total_produtos",
+                "produtos_disponiveis",
+                "produtos_vendidos",
+                "total_categorias",
+                "total_usuarios",
+            ),
+            linha,
+        )
+    )
+
+
+def ler_estatisticas(db: Session) -> Dict[str, int]:
+    if db.get_bind().dialect.name != "sqlite":
+        return contar_estatisticas(db)
+
+    valores = dict(db.execute(select(Estatistica.chave, Estatistica.valor)).all())
+    return {
+        "total_produtos": valores.get("produtos", 0),
+        "produtos_disponiveis": valores.get(
+            f"produtos:{StatusProduto.DISPONIVEL.name}", 0
+        ),
+        "produtos_vendidos": valores.get(f"produtos:{StatusProduto.VENDIDO.name}", 0),
+        "total_categorias": valores.get("categorias", 0),
+        "total_usuarios": valores.get("usuarios", 0),
+    }
@@ -0,0 +1,112 @@
+"""
+Requisições condicionais (ETag / Last-Modified / 304) do catálogo
+
+Cada representação guarda o JSON já serializado junto com os validadores,
+calculados uma vez quando entra no cache do catálogo. Uma requisição com
+``If-None-Match``/``If-Modified-Since`` que ainda confere recebe 304 sem
+consultar o banco nem serializar nada.
+
+O ETag é fraco e vem do hash do corpo, então é o mesmo em todos os workers
+e sobrevive a reinícios. Listagens só têm ETag: o maior ``updated_at`` do
+resultado não muda quando uma peça vendida ou apagada sai da lista, e um
+Last-Modified vindo dele daria 304 com a lista velha. Last-Modified fica para
+um recurso só (a página do produto), em que ele acompanha a própria linha.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class Representacao:
+    corpo: bytes
+    etag: str
+
+
+def gerar_etag(corpo: bytes) -> str:
+    return f'W/"{hashlib.blake2b(corpo, digest_size=16).hexdigest()}"'
+
+
+def _utc(data: datetime) -> datetime:
+    # SQLite devolve datas sem fuso; elas são gravadas em UTC
+    if data.tzinfo is None:
+        return data.replace(tzinfo=timezone.utc)
+    return data.astimezone(timezone.utc)
+
+
+def maior_data(datas: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    datas = [_utc(data) for data in datas if data is not None]
+    return max(datas) if datas else None
+
+
+def representar(corpo: bytes) -> Representacao:
+    return Representacao(corpo, gerar_etag(corpo))
+
+
+def politica_cache(rota: str) -> str:
+    """Cache-Control configurado para a rota (``CACHE_CONTROL`` nas settings)"""
+    return settings.CACHE_CONTROL.get(rota, settings.CACHE_CONTROL["default"])
+
+
+def _etag_confere(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/
+    valor = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == valor
+        for candidato in if_none_match.split(",")
+    )
+
+
+def nao_modificado(
+    request: Request, etag: str, ultima_modificacao: Optional[datetime]
+) -> bool:
+    """Avalia as pré-condições (If-None-Match tem precedência, RFC 9110)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_confere(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and ultima_modificacao:
+        try:
+            desde = _utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return ultima_modificacao.replace(microsecond=0) <= desde
+
+    return False
+
+
+def definir_validadores(
+    response: Response,
+    etag: str,
+    ultima_modificacao: Optional[datetime],
+    rota: str,
+):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = politica_cache(rota)
+    if ultima_modificacao:
+        response.headers["Last-Modified"] = format_datetime(
+            ultima_modificacao, usegmt=True
+        )
+
+
+def resposta_condicional(
+    request: Request, representacao: Representacao, rota: str
+) -> Response:
+    """200 com o corpo em cache, ou 304 vazio se o cliente já o tem"""
+    if nao_modificado(request, representacao.etag, None):
+        response = Response(status_code=304)
+    else:
+        response = Response(representacao.corpo, media_type="application/json")
+
+    definir_validadores(response, representacao.etag, None, rota)
+    return response
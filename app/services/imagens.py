@@ -0,0 +1,341 @@
+"""
+Pipeline de imagens dos produtos
+
+O upload só grava o original em disco e responde: o arquivo é copiado em
+blocos com aiofiles para um temporário (com limite de tamanho e conferência
+dos bytes mágicos no primeiro bloco) e movido para o lugar de forma atômica.
+
+As versões usadas no site são geradas depois num pool de processos, fora da
+thread da requisição e sem disputar o GIL com a API:
+
+- ``thumb``: miniaturas (carrinho, painel admin);
+- ``card``: vitrine e listagens, vira a ``imagem_principal``;
+- ``zoom``: página do produto.
+
+Cada versão sai em WebP e JPEG. O resultado é gravado no produto
+(``imagem_rendicoes`` e ``imagem_status``) quando o processamento termina.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
+from starlette.routing import Match
+from PIL import Image, ImageOps
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_IMAGENS = "app/static/images/produtos"
+URL_IMAGENS = "/static/images/produtos"
+
+# Nome -> maior lado em pixels (a proporção da foto é mantida)
+RENDICOES = {
+    "thumb": 200,
+    "card": 600,
+    "zoom": 1600,
+}
+
+FORMATOS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+EXTENSOES = {"webp": "webp", "jpeg": "jpg"}
+
+# Entra no nome das versões: mudar tamanhos ou qualidade gera arquivos novos
+# em vez de sobrescrever os que CDN e navegadores guardaram para sempre
+ASSINATURA_RENDICOES = hashlib.sha256(
+    repr((sorted(RENDICOES.items()), sorted(FORMATOS.items()))).encode("utf-8")
+).hexdigest()[:8]
+
+SUFIXO_TEMPORARIO = ".parte"
+
+CACHE_CONTROL_IMUTAVEL = "public, max-age=31536000, immutable"
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# Folga para os outros campos e cabeçalhos do multipart
+FOLGA_MULTIPART = 64 * 1024
+
+# Assinaturas dos formatos aceitos (a extensão sai daqui, não do nome enviado)
+ASSINATURAS = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+
+
+def detectar_formato(cabecalho: bytes) -> Optional[str]:
+    """Extensão do arquivo pelos bytes mágicos (None se não for imagem aceita)"""
+    # WebP: "RIFF" + tamanho (4 bytes) + "WEBP"
+    if cabecalho[:4] == b"RIFF" and cabecalho[8:12] == b"WEBP":
+        return "webp"
+    for assinatura, extensao in ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return extensao
+    return None
+
+
+def _mensagem_limite(max_bytes: Optional[int] = None, arquivo: str = "Imagem") -> str:
+    limite = (settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes) / (1024 * 1024)
+    return f"{arquivo} maior que o limite de {limite:.0f} MB"
+
+
+def limites_upload() -> Dict[str, Tuple[int, str]]:
+    """Nome da rota -> (bytes aceitos, mensagem do 413)"""
+    imagem = (settings.UPLOAD_MAX_BYTES, _mensagem_limite())
+    return {
+        "upload_imagem_principal": imagem,
+        "criar_produto_admin": imagem,
+        "importar_produtos_admin": (
+            settings.IMPORT_MAX_BYTES,
+            _mensagem_limite(settings.IMPORT_MAX_BYTES, "Arquivo"),
+        ),
+    }
+
+
+def _nome_rota(request: Request) -> Optional[str]:
+    for rota in request.app.routes:
+        correspondencia, _ = rota.matches(request.scope)
+        if correspondencia == Match.FULL:
+            return getattr(rota, "name", None)
+    return None
+
+
+async def limitar_uploads(request: Request, call_next):
+    """Middleware: recusa uploads pelo Content-Length antes de ler o corpo
+
+    O FastAPI lê o multipart inteiro antes de chamar a rota, então o limite
+    por header precisa vir antes dela. Cada rota de upload tem o seu limite
+    (``limites_upload``): as de imagem, ``UPLOAD_MAX_BYTES``; a importação
+    em lote, ``IMPORT_MAX_BYTES``. Sem Content-Length (chunked), vale o
+    limite aplicado pela própria rota depois da leitura.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        tamanho = request.headers.get("content-length", "")
+        limites = limites_upload()
+        # A rota só é procurada quando o corpo passa do menor dos limites
+        if tamanho.isdigit() and int(tamanho) > min(b for b, _ in limites.values()) + FOLGA_MULTIPART:
+            limite = limites.get(_nome_rota(request))
+            if limite and int(tamanho) > limite[0] + FOLGA_MULTIPART:
+                return ORJSONResponse({"detail": limite[1]}, status_code=413)
+    return await call_next(request)
+
+
+@dataclass(frozen=True)
+class Original:
+    caminho: str
+    nome_base: str  # hash do conteúdo
+    extensao: str
+    url: str
+
+
+def _nome_rendicao(nome_base: str, rendicao: str, formato: str) -> str:
+    return f"{nome_base}_{rendicao}_{ASSINATURA_RENDICOES}.{EXTENSOES[formato]}"
+
+
+async def salvar_original(
+    arquivo: UploadFile,
+    diretorio: str = DIRETORIO_IMAGENS,
+    max_bytes: Optional[int] = None,
+) -> Original:
+    """Copia o upload em blocos para disco, sem carregar o arquivo na memória
+
+    O arquivo recebe o nome do hash do conteúdo: reenviar a mesma foto reusa
+    o arquivo existente. Levanta 400 se os primeiros bytes não forem de uma
+    imagem aceita e 413 ao passar de ``UPLOAD_MAX_BYTES``; nos dois casos o
+    temporário é apagado.
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    originais = os.path.join(diretorio, "originais")
+    await aiofiles.os.makedirs(originais, exist_ok=True)
+
+    temporario = os.path.join(originais, f".{uuid.uuid4().hex}{SUFIXO_TEMPORARIO}")
+    digest = hashlib.sha256()
+    extensao = None
+    tamanho = 0
+    try:
+        async with aiofiles.open(temporario, "wb") as destino:
+            while bloco := await arquivo.read(TAMANHO_BLOCO):
+                if extensao is None:
+                    extensao = detectar_formato(bloco[:16])
+                    if extensao is None:
+                        raise HTTPException(
+                            status_code=400, detail="Arquivo não é uma imagem válida"
+                        )
+
+                tamanho += len(bloco)
+                if tamanho > max_bytes:
+                    raise HTTPException(status_code=413, detail=_mensagem_limite(max_bytes))
+                digest.update(bloco)
+                await destino.write(bloco)
+
+        if extensao is None:
+            raise HTTPException(status_code=400, detail="Arquivo vazio")
+
+        nome_base = digest.hexdigest()[:32]
+        nome = f"{nome_base}.{extensao}"
+        caminho = os.path.join(originais, nome)
+        if await aiofiles.os.path.exists(caminho):
+            # Mesma foto já enviada: o conteúdo é idêntico, fica o existente.
+            # Atualiza o mtime para a coleta de órfãos não apagá-lo agora
+            await aiofiles.os.remove(temporario)
+            os.utime(caminho)
+        else:
+            await aiofiles.os.replace(temporario, caminho)
+    except BaseException:
+        if await aiofiles.os.path.exists(temporario):
+            await aiofiles.os.remove(temporario)
+        raise
+
+    return Original(caminho, nome_base, extensao, f"{URL_IMAGENS}/originais/{nome}")
+
+
+def gerar_rendicoes(
+    caminho_original: str,
+    nome_base: str,
+    diretorio: str = DIRETORIO_IMAGENS,
+    url_base: str = URL_IMAGENS,
+) -> Dict[str, Dict[str, str]]:
+    """Gera todas as versões a partir de uma única decodificação do original
+
+    Roda nos processos do pool, então só recebe e devolve tipos simples. Os
+    nomes dependem só do original e da configuração das versões; se todas
+    já existem (foto repetida), nada é decodificado.
+    """
+    urls = {
+        rendicao: {
+            formato: f"{url_base}/{_nome_rendicao(nome_base, rendicao, formato)}"
+            for formato in FORMATOS
+        }
+        for rendicao in RENDICOES
+    }
+    existentes = [
+        os.path.join(diretorio, _nome_rendicao(nome_base, r, f))
+        for r in RENDICOES
+        for f in FORMATOS
+    ]
+    if all(os.path.exists(caminho) for caminho in existentes):
+        for caminho in existentes:
+            os.utime(caminho)
+        return urls
+
+    maior_lado = max(RENDICOES.values())
+    with Image.open(caminho_original) as img:
+        # JPEG: decodifica já reduzido (DCT scaling), bem mais rápido em fotos
+        # de 12 MP; nunca abaixo do tamanho da maior versão
+        img.draft("RGB", (maior_lado, maior_lado))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # Da maior para a menor, reduzindo a partir da anterior
+        atual = img
+        for rendicao, lado in sorted(RENDICOES.items(), key=lambda r: -r[1]):
+            atual = atual.copy()
+            atual.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+
+            for formato, (formato_pil, opcoes) in FORMATOS.items():
+                caminho = os.path.join(
+                    diretorio, _nome_rendicao(nome_base, rendicao, formato)
+                )
+                # Grava ao lado e renomeia: nunca fica um arquivo pela metade
+                # com o nome definitivo
+                temporario = f"{caminho}.{uuid.uuid4().hex[:8]}{SUFIXO_TEMPORARIO}"
+                atual.save(temporario, formato_pil, **opcoes)
+                os.replace(temporario, caminho)
+
+    return urls
+
+
+# Pool de processos (criado no primeiro upload)
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: fork de um servidor com threads pode herdar locks travados
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def encerrar(esperar: bool = True):
+    """Desliga o pool; com ``esperar`` as imagens na fila terminam antes"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=esperar, cancel_futures=not esperar)
+            _executor = None
+
+
+def registrar_rendicoes(produto_id: int, original: Original, futuro: Future):
+    """Grava no produto o resultado do processamento (roda fora da requisição)"""
+    # Import local: os processos do pool importam este módulo e não precisam
+    # do banco
+    from app.database.connection import SessionLocal
+    from app.models.produto import Produto, StatusImagem
+    from app.services.catalogo_cache import invalidar_catalogo
+
+    with SessionLocal() as db:
+        produto = db.get(Produto, produto_id)
+        # Produto removido ou outra imagem enviada enquanto esta processava
+        if produto is None or produto.imagem_principal != original.url:
+            return
+
+        try:
+            rendicoes = futuro.result()
+        except Exception:
+            logger.exception("Falha ao processar imagem do produto %s", produto_id)
+            produto.imagem_status = StatusImagem.ERRO
+        else:
+            # O original também fica referenciado (coleta de órfãos)
+            produto.imagem_rendicoes = {
+                **rendicoes,
+                "original": {original.extensao: original.url},
+            }
+            produto.imagem_principal = rendicoes["card"]["jpeg"]
+            produto.imagem_status = StatusImagem.PRONTA
+        db.commit()
+
+    invalidar_catalogo()
+
+
+def processar_em_segundo_plano(produto_id: int, original: Original) -> Future:
+    """Enfileira a geração das versões e grava o resultado ao terminar"""
+    futuro = executor().submit(gerar_rendicoes, original.caminho, original.nome_base)
+    futuro.add_done_callback(lambda f: registrar_rendicoes(produto_id, original, f))
+    return futuro
+
+
+class ImagensImutaveis(StaticFiles):
+    """Serve as imagens dos produtos com cache permanente
+
+    Os nomes vêm do hash do conteúdo, então uma URL nunca muda de conteúdo e
+    CDN e navegadores podem guardá-la sem revalidar.
+    """
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = CACHE_CONTROL_IMUTAVEL
+        return response
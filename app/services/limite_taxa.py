@@ -0,0 +1,183 @@
+"""
+Limite de taxa por token bucket, em memória
+
+Cada rota configurada em ``settings.RATE_LIMITS`` tem seu limitador:
+``(capacidade, por_minuto)`` permite rajadas de ``capacidade`` requisições e
+repõe ``por_minuto`` fichas por minuto. As chaves são o IP do cliente (no
+middleware, antes do roteamento e da leitura do corpo) e, no login, também a
+conta (``exigir_limite``), para que trocar de IP não libere mais tentativas
+de senha contra o mesmo email.
+
+A memória é limitada: cada limitador guarda no máximo ``RATE_LIMIT_MAX_KEYS``
+chaves em ordem de uso. Um balde parado por tempo suficiente para encher de
+novo equivale a um balde novo, então as chaves ociosas são descartadas sem
+mudar o resultado; se ainda assim o limite estourar, sai a menos usada.
+
+Como os demais caches, o estado é por processo: com N workers o limite
+efetivo por cliente é até N vezes o configurado.
+
+Atrás de um proxy reverso todas as requisições chegam do IP do proxy. Há duas
+saídas: rodar o uvicorn com ``--proxy-headers --forwarded-allow-ips=<proxy>``
+(o IP da conexão já passa a ser o do cliente), ou listar os proxies em
+``RATE_LIMIT_TRUSTED_PROXIES``: das conexões vindas deles, a chave é o último
+endereço do ``X-Forwarded-For`` que não é um proxy confiável. O header de
+conexões de outros IPs é ignorado, para que o cliente não escolha a chave.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from starlette.routing import Match
+
+from app.config import settings
+
+MENSAGEM_LIMITE = "Muitas requisições, tente novamente mais tarde"
+
+# Listagens com paginação por offset: cada OFFSET_POR_FICHA itens pulados
+# custam uma ficha a mais (offsets profundos são caros e típicos de raspagem)
+OFFSET_POR_FICHA = 500
+
+
+class LimitadorTaxa:
+    def __init__(
+        self,
+        capacidade: int,
+        por_minuto: float,
+        max_chaves: int,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.capacidade = capacidade
+        self.por_segundo = por_minuto / 60
+        self.max_chaves = max_chaves
+        self.relogio = relogio
+        # Tempo para um balde vazio encher: depois disso a chave é descartável
+        self.tempo_para_encher = capacidade / self.por_segundo
+        self._lock = threading.Lock()
+        # chave -> (fichas, instante da última atualização)
+        self._baldes: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self.permitidos = 0
+        self.recusados = 0
+        self.descartados = 0
+
+    def consumir(self, chave: Hashable, custo: float = 1) -> float:
+        """Retira ``custo`` fichas; devolve 0 se permitido ou os segundos até poder"""
+        custo = min(custo, self.capacidade)
+        agora = self.relogio()
+        with self._lock:
+            fichas, ultimo = self._baldes.pop(chave, (self.capacidade, agora))
+            fichas = min(self.capacidade, fichas + (agora - ultimo) * self.por_segundo)
+
+            if fichas >= custo:
+                fichas -= custo
+                espera = 0.0
+                self.permitidos += 1
+            else:
+                espera = (custo - fichas) / self.por_segundo
+                self.recusados += 1
+
+            self._baldes[chave] = (fichas, agora)
+            self._descartar_ociosos(agora)
+            return espera
+
+    def _descartar_ociosos(self, agora: float):
+        # Mais antigos primeiro: para no primeiro que ainda não encheu
+        while self._baldes:
+            chave, (_, ultimo) = next(iter(self._baldes.items()))
+            if (
+                len(self._baldes) <= self.max_chaves
+                and agora - ultimo < self.tempo_para_encher
+            ):
+                break
+            del self._baldes[chave]
+            self.descartados += 1
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "capacidade": self.capacidade,
+                "por_minuto": round(self.por_segundo * 60, 2),
+                "chaves": len(self._baldes),
+                "max_chaves": self.max_chaves,
+                "permitidos": self.permitidos,
+                "recusados": self.recusados,
+                "descartados": self.descartados,
+            }
+
+
+_limitadores: Dict[str, LimitadorTaxa] = {
+    nome: LimitadorTaxa(capacidade, por_minuto, settings.RATE_LIMIT_MAX_KEYS)
+    for nome, (capacidade, por_minuto) in settings.RATE_LIMITS.items()
+}
+
+# Rotas com limite, montadas na primeira requisição (o app já tem as rotas)
+_rotas_limitadas: Optional[List[Tuple[Any, LimitadorTaxa]]] = None
+
+
+def _rotas(request: Request) -> List[Tuple[Any, LimitadorTaxa]]:
+    global _rotas_limitadas
+    if _rotas_limitadas is None:
+        _rotas_limitadas = [
+            (rota, _limitadores[rota.name])
+            for rota in request.app.routes
+            if getattr(rota, "name", None) in _limitadores
+        ]
+    return _rotas_limitadas
+
+
+def ip_cliente(request: Request) -> str:
+    ip = request.client.host if request.client else "desconhecido"
+    confiaveis = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if ip not in confiaveis:
+        return ip
+    # Da direita para a esquerda: os da esquerda quem escreve é o cliente
+    encaminhados = request.headers.get("x-forwarded-for", "").split(",")
+    for endereco in reversed(encaminhados):
+        endereco = endereco.strip()
+        if endereco and endereco not in confiaveis:
+            return endereco
+    return ip
+
+
+def custo_requisicao(request: Request) -> float:
+    skip = request.query_params.get("skip", "")
+    return 1 + (int(skip) // OFFSET_POR_FICHA if skip.isdigit() else 0)
+
+
+def _cabecalhos(espera: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, int(espera + 0.999)))}
+
+
+async def limitar_requisicoes(request: Request, call_next):
+    """Middleware: 429 pelo IP antes de rotear, sem ler o corpo"""
+    for rota, limite in _rotas(request):
+        correspondencia, _ = rota.matches(request.scope)
+        if correspondencia == Match.FULL:
+            espera = limite.consumir(ip_cliente(request), custo_requisicao(request))
+            if espera:
+                return ORJSONResponse(
+                    {"detail": MENSAGEM_LIMITE},
+                    status_code=429,
+                    headers=_cabecalhos(espera),
+                )
+            break
+    return await call_next(request)
+
+
+def exigir_limite(nome: str, chave: Hashable):
+    """Levanta 429 se a chave (ex.: a conta no login) passou do limite ``nome``"""
+    limite = _limitadores.get(nome)
+    if limite is None:
+        return
+    espera = limite.consumir(chave)
+    if espera:
+        raise HTTPException(
+            status_code=429, detail=MENSAGEM_LIMITE, headers=_cabecalhos(espera)
+        )
+
+
+def estatisticas_limites() -> Dict[str, Dict[str, Any]]:
+    return {nome: limite.estatisticas() for nome, limite in _limitadores.items()}
@@ -0,0 +1,140 @@
+"""
+Números de pedido sem colisão, reservados em blocos
+
+O número antigo (``BR`` + data/hora até o segundo) repetia quando dois pedidos
+caíam no mesmo segundo, e a restrição unique de ``numero_pedido`` derrubava o
+checkout justamente nos picos de venda.
+
+Agora cada processo reserva um bloco de ``ORDER_NUMBER_BLOCK`` números na
+tabela ``sequencias`` com um único comando atômico:
+
+    UPDATE sequencias SET proximo = proximo + :bloco
+    WHERE nome = 'pedidos' RETURNING proximo
+
+e entrega os números do bloco a partir da memória. Dois processos (ou
+workers) nunca recebem o mesmo bloco, então os números não colidem; a ida ao
+banco acontece uma vez a cada ``ORDER_NUMBER_BLOCK`` pedidos.
+
+Os números crescem dentro de cada processo e os blocos crescem entre si, mas
+com vários workers um pedido mais novo pode ter número menor que outro (veio
+de um bloco reservado antes). Sobras de bloco de um processo que reinicia e
+números de checkouts que falham ficam como lacunas, como numa sequence.
+
+A reserva usa uma engine própria, com uma conexão só: se viesse do pool das
+rotas, as requisições esperando o bloco novo (cada uma segurando sua
+conexão) podiam esgotar o pool e travar quem está reservando. E deve
+acontecer antes da transação do checkout escrever: no SQLite, esperar o lock
+de escrita que a própria thread segura travaria até o ``busy_timeout``.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database.connection import criar_engine, engine
+from app.models.sequencia import Sequencia
+
+SEQUENCIA_PEDIDOS = "pedidos"
+
+
+def formatar_numero_pedido(numero: int) -> str:
+    """BR + número com 8 dígitos (ex.: BR00001234)"""
+    return f"BR{numero:08d}"
+
+
+class AlocadorNumeros:
+    def __init__(self, bind: Engine, nome: str, bloco: int, inicio: int = 1):
+        # Só quem segura o _lock usa a conexão
+        self.bind = criar_engine(
+            bind.url.render_as_string(hide_password=False), pool_size=1, max_overflow=0
+        )
+        self.nome = nome
+        self.bloco = bloco
+        self.inicio = inicio
+        self._lock = threading.Lock()
+        self._proximo = 0
+        self._fim = 0  # o bloco atual vai até _fim - 1
+        self.emitidos = 0
+        self.blocos = 0
+        self.reserva_total = 0.0
+        self.reserva_max = 0.0
+
+    def _reservar_bloco(self) -> int:
+        """Reserva ``bloco`` números no banco; devolve o primeiro"""
+        while True:
+            with self.bind.begin() as conn:
+                fim = conn.execute(
+                    update(Sequencia)
+                    .where(Sequencia.nome == self.nome)
+                    .values(proximo=Sequencia.proximo + self.bloco)
+                    .returning(Sequencia.proximo)
+                ).scalar()
+            if fim is not None:
+                return fim - self.bloco
+            # Primeira reserva desta sequência: outro processo pode criar junto
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(
+                        insert(Sequencia).values(
+                            nome=self.nome, proximo=self.inicio + self.bloco
+                        )
+                    )
+                return self.inicio
+            except IntegrityError:
+                continue
+
+    def proximo(self) -> int:
+        with self._lock:
+            if self._proximo >= self._fim:
+                inicio = time.perf_counter()
+                self._proximo = self._reservar_bloco()
+                self._fim = self._proximo + self.bloco
+                duracao = time.perf_counter() - inicio
+                self.blocos += 1
+                self.reserva_total += duracao
+                self.reserva_max = max(self.reserva_max, duracao)
+            numero = self._proximo
+            self._proximo += 1
+            self.emitidos += 1
+            return numero
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            blocos = self.blocos or 1
+            return {
+                "bloco": self.bloco,
+                "emitidos": self.emitidos,
+                "blocos_reservados": self.blocos,
+                "restantes_no_bloco": self._fim - self._proximo,
+                "reserva_media_ms": round(self.reserva_total / blocos * 1000, 2),
+                "reserva_max_ms": round(self.reserva_max * 1000, 2),
+            }
+
+
+# Um alocador por engine (a da aplicação, ou a de um script/teste)
+_alocadores: Dict[Engine, AlocadorNumeros] = {}
+_lock_alocadores = threading.Lock()
+
+
+def alocador_pedidos(bind: Optional[Engine] = None) -> AlocadorNumeros:
+    bind = bind or engine
+    with _lock_alocadores:
+        if bind not in _alocadores:
+            _alocadores[bind] = AlocadorNumeros(
+                bind, SEQUENCIA_PEDIDOS, settings.ORDER_NUMBER_BLOCK
+            )
+        return _alocadores[bind]
+
+
+def proximo_numero_pedido(bind: Optional[Engine] = None) -> str:
+    """Próximo número de pedido, sem ir ao banco na maioria das chamadas"""
+    return formatar_numero_pedido(alocador_pedidos(bind).proximo())
+
+
+def estatisticas_numeracao() -> Dict[str, Any]:
+    return alocador_pedidos().estatisticas()
@@ -0,0 +1,175 @@
+"""
+Alterações de status e preço em lote (remarcações, retiradas da vitrine)
+
+Em vez de carregar e gravar produto por produto, o seletor vira o WHERE e a
+regra de preço vira uma expressão SQL, e tudo é aplicado com um único
+``UPDATE``. Só as linhas que de fato mudam entram no WHERE, então reaplicar a
+mesma operação não mexe em ``updated_at`` nem nos triggers.
+
+Regras de preço (sobre ``preco_venda``):
+
+- ``absoluto``: o preço passa a ser ``valor``;
+- ``percentual``: soma ``valor``% ao preço (-30 = 30% de desconto);
+- ``arredondar_90``: depois da regra, desce para o ,90 mais próximo
+  (27,35 -> 26,90; 27,95 -> 27,90). Preços abaixo de 0,90 ficam como estão.
+
+Mudanças de status pulam as peças reservadas por um checkout em andamento
+(``reservado_ate`` preenchido): devolvê-las à vitrine com o pedido ainda
+PENDENTE deixaria um segundo comprador levar a mesma peça, e o varredor de
+reservas, que só olha as peças com prazo, nunca cancelaria o pedido antigo.
+Elas aparecem em ``reservadas_ignoradas``; o prazo vencido o varredor trata.
+
+A simulação (``simular``) faz só um SELECT com as contagens.
+"""
+
+import enum
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel, model_validator
+from sqlalchemy import Integer, case, cast, func, literal, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from app.models.produto import (
+    Produto,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
+
+
+class SeletorProdutos(BaseModel):
+    ids: Optional[List[int]] = None
+    categoria_id: Optional[int] = None
+    tamanho: Optional[TamanhoProduto] = None
+    condicao: Optional[CondicaoProduto] = None
+    status: Optional[StatusProduto] = None  # status atual (ex.: só disponíveis)
+    preco_min: Optional[float] = None
+    preco_max: Optional[float] = None
+
+
+class TipoRegraPreco(enum.Enum):
+    ABSOLUTO = "absoluto"
+    PERCENTUAL = "percentual"
+
+
+class RegraPreco(BaseModel):
+    tipo: TipoRegraPreco
+    valor: float
+    arredondar_90: bool = False
+
+    @model_validator(mode="after")
+    def validar_valor(self):
+        if self.tipo is TipoRegraPreco.ABSOLUTO and self.valor <= 0:
+            raise ValueError("O preço absoluto deve ser positivo")
+        if self.tipo is TipoRegraPreco.PERCENTUAL and self.valor <= -100:
+            raise ValueError("O percentual deve ser maior que -100")
+        return self
+
+
+def condicoes_seletor(seletor: SeletorProdutos) -> List[ColumnElement]:
+    condicoes = []
+    if seletor.ids is not None:
+        condicoes.append(Produto.id.in_(seletor.ids))
+    if seletor.categoria_id is not None:
+        condicoes.append(Produto.categoria_id == seletor.categoria_id)
+    if seletor.tamanho is not None:
+        condicoes.append(Produto.tamanho == seletor.tamanho)
+    if seletor.condicao is not None:
+        condicoes.append(Produto.condicao == seletor.condicao)
+    if seletor.status is not None:
+        condicoes.append(Produto.status == seletor.status)
+    if seletor.preco_min is not None:
+        condicoes.append(Produto.preco_venda >= seletor.preco_min)
+    if seletor.preco_max is not None:
+        condicoes.append(Produto.preco_venda <= seletor.preco_max)
+    return condicoes
+
+
+def expressao_preco(regra: RegraPreco) -> ColumnElement:
+    """Novo ``preco_venda`` em SQL, com duas casas decimais"""
+    if regra.tipo is TipoRegraPreco.ABSOLUTO:
+        preco = func.round(regra.valor, 2)
+    else:
+        preco = func.round(Produto.preco_venda * (1 + regra.valor / 100), 2)
+
+    if regra.arredondar_90:
+        # Sem floor() no SQLite: CAST trunca, e o round evita 26,999... -> 26
+        preco = case(
+            (preco >= 0.9, cast(func.round(preco - 0.9, 2), Integer) + 0.9),
+            else_=preco,
+        )
+    return preco
+
+
+def aplicar_em_lote(
+    db: Session,
+    seletor: SeletorProdutos,
+    status: Optional[StatusProduto] = None,
+    preco: Optional[RegraPreco] = None,
+    simular: bool = False,
+) -> Dict[str, Any]:
+    """Aplica status e/ou regra de preço aos produtos do seletor num UPDATE"""
+    condicoes = condicoes_seletor(seletor)
+    if not condicoes:
+        raise HTTPException(
+            status_code=400, detail="Informe ao menos um critério no seletor"
+        )
+    if status is None and preco is None:
+        raise HTTPException(status_code=400, detail="Nada a alterar")
+
+    valores = {}
+    mudancas = []
+    reservada = Produto.reservado_ate.is_not(None)
+    if status is not None:
+        # Status definido pelo admin: a peça sai do prazo do checkout
+        valores["status"] = status
+        valores["reservado_ate"] = None
+        mudancas.append(Produto.status.is_distinct_from(status))
+    if preco is not None:
+        novo_preco = expressao_preco(preco)
+        valores["preco_venda"] = novo_preco
+        mudancas.append(Produto.preco_venda != novo_preco)
+    muda = mudancas[0] if len(mudancas) == 1 else mudancas[0] | mudancas[1]
+    if status is not None:
+        muda = muda & ~reservada
+
+    if simular:
+        reservadas = literal(0)
+        if status is not None:
+            reservadas = func.coalesce(func.sum(case((reservada, 1), else_=0)), 0)
+        selecionados, alterados, reservadas = db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(case((muda, 1), else_=0)), 0),
+                reservadas,
+            )
+            .select_from(Produto)
+            .where(*condicoes)
+        ).one()
+        return {
+            "simulacao": True,
+            "selecionados": selecionados,
+            "alterados": alterados,
+            "reservadas_ignoradas": reservadas,
+        }
+
+    reservadas = 0
+    if status is not None:
+        reservadas = db.scalar(
+            select(func.count()).select_from(Produto).where(*condicoes, reservada)
+        )
+    resultado = db.execute(
+        update(Produto)
+        .where(*condicoes, muda)
+        .values(**valores)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return {
+        "simulacao": False,
+        "selecionados": None,
+        "alterados": resultado.rowcount,
+        "reservadas_ignoradas": reservadas,
+    }
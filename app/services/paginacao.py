@@ -0,0 +1,105 @@
+"""
+Paginação por cursor (keyset)
+
+O cursor é opaco para o cliente: guarda os valores das chaves de ordenação do
+último item da página, e a próxima página filtra a partir deles em vez de usar
+OFFSET. Assim a página N custa o mesmo que a primeira.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import Query
+
+# Header com o cursor da próxima página (o corpo continua sendo a lista)
+HEADER_PROXIMO_CURSOR = "X-Next-Cursor"
+
+# (coluna, descendente)
+Chave = Tuple[Any, bool]
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    """Serializa os valores das chaves em um token base64 url-safe"""
+    dados = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    bruto = json.dumps(dados, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, chaves: Sequence[Chave]) -> List[Any]:
+    """Recupera os valores das chaves a partir do token"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        if not isinstance(dados, list) or len(dados) != len(chaves):
+            raise ValueError("quantidade de chaves incompatível")
+
+        valores = []
+        for valor, (coluna, _) in zip(dados, chaves):
+            if valor is not None and coluna.type.python_type is datetime:
+                valor = datetime.fromisoformat(valor)
+            valores.append(valor)
+        return valores
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def filtro_apos(chaves: Sequence[Chave], valores: Sequence[Any]):
+    """Condição que seleciona as linhas posteriores ao cursor"""
+    direcoes = {descendente for _, descendente in chaves}
+
+    # Mesma direção em todas as chaves: comparação de row value usa o índice
+    if len(direcoes) == 1:
+        colunas = tuple_(*[coluna for coluna, _ in chaves])
+        if direcoes.pop():
+            return colunas < tuple_(*valores)
+        return colunas > tuple_(*valores)
+
+    condicoes = []
+    for i, (coluna, descendente) in enumerate(chaves):
+        anteriores = [c == v for (c, _), v in zip(chaves[:i], valores[:i])]
+        posterior = coluna < valores[i] if descendente else coluna > valores[i]
+        condicoes.append(and_(*anteriores, posterior))
+    return or_(*condicoes)
+
+
+def paginar(
+    query: Query,
+    chaves: Sequence[Chave],
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """Ordena pelas chaves e devolve (itens da página, cursor da próxima)
+
+    Com cursor o ``skip`` é ignorado; sem cursor mantém o OFFSET antigo para
+    compatibilidade, mas já devolve o cursor para as páginas seguintes.
+    """
+    if cursor:
+        query = query.filter(filtro_apos(chaves, decodificar_cursor(cursor, chaves)))
+
+    query = query.order_by(
+        *[coluna.desc() if descendente else coluna.asc() for coluna, descendente in chaves]
+    ).add_columns(*[coluna for coluna, _ in chaves])
+
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # Uma linha a mais indica se existe próxima página
+    linhas = query.limit(limit + 1).all()
+
+    proximo = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo = codificar_cursor(linhas[-1][1:])
+
+    return [linha[0] for linha in linhas], proximo
+
+
+def definir_proximo_cursor(response: Response, proximo: Optional[str]):
+    """Expõe o cursor da próxima página no header da resposta"""
+    if proximo:
+        response.headers[HEADER_PROXIMO_CURSOR] = proximo
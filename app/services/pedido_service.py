@@ -0,0 +1,112 @@
+"""
+Checkout: criação do pedido com reserva das peças
+
+Cada peça do brechó é única, então reservar é um compare-and-set:
+
+    UPDATE produtos SET status = 'RESERVADO'
+    WHERE id IN (...) AND status = 'DISPONIVEL' RETURNING id, preco_venda
+
+Só um comprador consegue mudar a linha de DISPONIVEL para RESERVADO; os
+outros não a encontram mais no WHERE. Se alguma peça não voltar no RETURNING,
+a transação é desfeita (liberando as que tinham sido pegas) e o checkout
+falha na hora com 409. O UPDATE é o primeiro comando da transação: no SQLite
+ele pega o lock de escrita logo de início, sem leitura anterior que possa
+ficar desatualizada.
+
+Pedido, itens e reserva são gravados no mesmo commit. A reserva vale por
+``RESERVATION_TTL`` segundos (``reservado_ate``); depois disso o varredor de
+``app.services.reservas`` devolve a peça à vitrine e cancela o pedido pendente.
+O número do pedido vem de ``app.services.numeracao``.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.endereco import Endereco
+from app.models.item_pedido import ItemPedido
+from app.models.pedido import FormaPagamento, Pedido, StatusPedido
+from app.models.produto import Produto, StatusProduto
+from app.services.numeracao import proximo_numero_pedido
+
+
+def reservar_produtos(db: Session, produto_ids: List[int]) -> dict:
+    """Marca as peças como reservadas; devolve {id: preço} das que conseguiu"""
+    prazo = datetime.now(timezone.utc) + timedelta(seconds=settings.RESERVATION_TTL)
+    resultado = db.execute(
+        update(Produto)
+        .where(Produto.id.in_(produto_ids), Produto.status == StatusProduto.DISPONIVEL)
+        .values(status=StatusProduto.RESERVADO, reservado_ate=prazo)
+        .returning(Produto.id, Produto.preco_venda)
+        .execution_options(synchronize_session=False)
+    )
+    return {produto_id: preco for produto_id, preco in resultado}
+
+
+def finalizar_pedido(
+    db: Session,
+    usuario_id: int,
+    produto_ids: List[int],
+    endereco_entrega_id: int,
+    forma_pagamento: FormaPagamento,
+    observacoes: Optional[str] = None,
+) -> Pedido:
+    """Reserva as peças e cria o pedido numa transação (409 se alguma já foi)"""
+    ids = sorted(set(produto_ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="Nenhum produto para o pedido")
+
+    endereco = (
+        db.query(Endereco.id)
+        .filter(Endereco.id == endereco_entrega_id, Endereco.usuario_id == usuario_id)
+        .scalar()
+    )
+    if endereco is None:
+        raise HTTPException(status_code=404, detail="Endereço não encontrado")
+
+    # Antes de escrever: um bloco novo de números usa outra conexão
+    numero_pedido = proximo_numero_pedido(db.get_bind())
+    precos = reservar_produtos(db, ids)
+    if len(precos) < len(ids):
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "mensagem": "Alguns produtos não estão mais disponíveis",
+                "indisponiveis": [i for i in ids if i not in precos],
+            },
+        )
+
+    subtotal = sum(precos.values())
+    pedido = Pedido(
+        numero_pedido=numero_pedido,
+        usuario_id=usuario_id,
+        endereco_entrega_id=endereco_entrega_id,
+        status=StatusPedido.PENDENTE,
+        subtotal=subtotal,
+        taxa_entrega=0.0,
+        desconto=0.0,
+        total=subtotal,
+        forma_pagamento=forma_pagamento,
+        observacoes=observacoes,
+        itens=[
+            ItemPedido(
+                produto_id=produto_id,
+                quantidade=1,  # peça única
+                preco_unitario=preco,
+                subtotal=preco,
+            )
+            for produto_id, preco in precos.items()
+        ],
+    )
+    db.add(pedido)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return pedido
@@ -1 +1,110 @@
-# logica de negocio
\ No newline at end of file
+"""
+Consulta e serialização de produtos
+
+Todas as rotas que devolvem produtos passam por aqui: a categoria vem no mesmo
+SELECT (JOIN + contains_eager), então uma página com N produtos custa uma
+consulta só, e não 1 + N.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import Response
+from pydantic import AliasPath, BaseModel, ConfigDict, Field, TypeAdapter
+from sqlalchemy.orm import Query, Session, contains_eager
+
+from app.models.produto import (
+    Produto,
+    StatusImagem,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
+
+
+class ProdutoResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    id: int
+    nome: str
+    descricao: Optional[str]
+    marca: Optional[str]
+    cor_principal: Optional[str]
+    tamanho: TamanhoProduto
+    condicao: CondicaoProduto
+    preco_original: Optional[float]
+    preco_venda: float
+    status: StatusProduto
+    categoria_id: int
+    categoria_nome: Optional[str] = Field(
+        None, validation_alias=AliasPath("categoria", "nome")
+    )
+    ano_aproximado: Optional[int]
+    material: Optional[str]
+    cuidados: Optional[str]
+    historia_peca: Optional[str]
+    imagem_principal: Optional[str]
+    imagens_adicionais: Optional[str]
+    imagem_rendicoes: Optional[Dict[str, Dict[str, str]]] = None
+    imagem_status: Optional[StatusImagem] = None
+    visualizacoes: int
+    favoritado: int
+    created_at: datetime
+    updated_at: datetime
+
+
+# Adapter da lista criado uma vez só (montar o validador é caro)
+_lista_produtos = TypeAdapter(List[ProdutoResponse])
+
+
+class ProdutoJSONResponse(Response):
+    """Resposta com o JSON já serializado pelo pydantic-core
+
+    Rotas que devolvem esta resposta pulam a revalidação do ``response_model``
+    e o ``jsonable_encoder`` do FastAPI: cada produto é serializado uma vez.
+    """
+
+    media_type = "application/json"
+
+
+def consultar_produtos(db: Session) -> Query:
+    """Query de produtos com a categoria carregada no mesmo SELECT"""
+    return db.query(Produto).join(Produto.categoria).options(
+        contains_eager(Produto.categoria)
+    )
+
+
+def serializar_produto(produto: Produto) -> ProdutoResponse:
+    """Converte um produto (com categoria carregada) para a resposta da API"""
+    return ProdutoResponse.model_validate(produto, from_attributes=True)
+
+
+def serializar_produtos(produtos: Iterable[Produto]) -> List[ProdutoResponse]:
+    return _lista_produtos.validate_python(list(produtos), from_attributes=True)
+
+
+def resposta_produto(produto: Produto, status_code: int = 200) -> ProdutoJSONResponse:
+    return ProdutoJSONResponse(
+        serializar_produto(produto).model_dump_json(), status_code=status_code
+    )
+
+
+def json_produtos(produtos: Iterable[Produto]) -> bytes:
+    return _lista_produtos.dump_json(serializar_produtos(produtos))
+
+
+def resposta_produtos(produtos: Iterable[Produto]) -> ProdutoJSONResponse:
+    return ProdutoJSONResponse(json_produtos(produtos))
+
+
+def serializar_produto_admin(produto: Produto) -> dict:
+    """Formato resumido usado na listagem do painel admin"""
+    return {
+        "id": produto.id,
+        "nome": produto.nome,
+        "preco_venda": produto.preco_venda,
+        "status": produto.status.value,
+        "categoria": produto.categoria.nome,
+        "created_at": produto.created_at.strftime("%d/%m/%Y"),
+        "imagem": produto.imagem_principal,
+    }
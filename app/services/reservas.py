@@ -0,0 +1,180 @@
+"""
+Expiração das reservas do checkout
+
+O checkout marca as peças como RESERVADO com prazo em ``reservado_ate``. Uma
+tarefa de fundo (iniciada no lifespan) devolve à vitrine as peças com prazo
+vencido e cancela os pedidos pendentes que as continham.
+
+Cada lote é uma transação curta: um UPDATE limitado a
+``RESERVATION_SWEEP_BATCH`` peças (pelo índice parcial de ``reservado_ate``)
+e o cancelamento dos pedidos. Entre os lotes a tarefa devolve o controle ao
+event loop, e cada varredura para em ``RESERVATION_SWEEP_MAX_BATCHES`` lotes:
+um acúmulo grande é liberado ao longo de várias varreduras, sem segurar o
+lock de escrita do SQLite.
+
+Peças cujo pedido atual (o mais recente que as contém) já saiu de PENDENTE
+(confirmado, enviado...) não voltam à vitrine: só perdem o prazo. Pedidos
+antigos de uma peça devolvida e relistada não contam. Reservas manuais do
+admin não têm prazo.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import and_, case, exists, literal, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database.connection import engine
+from app.models.item_pedido import ItemPedido
+from app.models.pedido import Pedido, StatusPedido
+from app.models.produto import Produto, StatusProduto
+from app.services.catalogo_cache import invalidar_catalogo
+
+logger = logging.getLogger(__name__)
+
+_ESTADOS_ABERTOS = (StatusPedido.PENDENTE, StatusPedido.CANCELADO)
+
+
+class VarredorReservas:
+    def __init__(self, bind, lote: int, max_lotes: int):
+        self.bind = bind
+        self.lote = lote
+        self.max_lotes = max_lotes
+        self._lock = threading.Lock()
+        self.varreduras = 0
+        self.lotes = 0
+        self.liberados = 0
+        self.pedidos_cancelados = 0
+        self.falhas = 0
+        self.ultima_varredura: Optional[datetime] = None
+        self.lote_max_ms = 0.0
+        # A última varredura parou no limite de lotes (ainda há vencidas)
+        self.atrasado = False
+
+    def varrer_lote(self, agora: Optional[datetime] = None) -> Tuple[int, int]:
+        """Libera até ``lote`` reservas vencidas; retorna (processadas, liberadas)"""
+        agora = agora or datetime.now(timezone.utc)
+        vencidas = (
+            select(Produto.id)
+            .where(Produto.reservado_ate.is_not(None), Produto.reservado_ate <= agora)
+            .order_by(Produto.reservado_ate)
+            .limit(self.lote)
+            .scalar_subquery()
+        )
+        # Só o pedido da reserva atual (o mais recente com a peça) a segura:
+        # uma venda antiga de peça devolvida e relistada não conta
+        pedido_atual = (
+            select(ItemPedido.pedido_id)
+            .where(ItemPedido.produto_id == Produto.id)
+            .order_by(ItemPedido.pedido_id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        confirmada = exists().where(
+            Pedido.id == pedido_atual,
+            Pedido.status.not_in(_ESTADOS_ABERTOS),
+        )
+
+        inicio = time.perf_counter()
+        with self.bind.begin() as conn:
+            linhas = conn.execute(
+                update(Produto)
+                .where(Produto.id.in_(vencidas))
+                .values(
+                    status=case(
+                        (
+                            and_(Produto.status == StatusProduto.RESERVADO, ~confirmada),
+                            literal(StatusProduto.DISPONIVEL, Produto.status.type),
+                        ),
+                        else_=Produto.status,
+                    ),
+                    reservado_ate=None,
+                )
+                .returning(Produto.id, Produto.status)
+            ).all()
+
+            liberados = [
+                produto_id
+                for produto_id, status in linhas
+                if status == StatusProduto.DISPONIVEL
+            ]
+            cancelados = 0
+            if liberados:
+                cancelados = conn.execute(
+                    update(Pedido)
+                    .where(
+                        Pedido.status == StatusPedido.PENDENTE,
+                        Pedido.id.in_(
+                            select(ItemPedido.pedido_id).where(
+                                ItemPedido.produto_id.in_(liberados)
+                            )
+                        ),
+                    )
+                    .values(status=StatusPedido.CANCELADO)
+                ).rowcount
+        duracao = (time.perf_counter() - inicio) * 1000
+
+        with self._lock:
+            self.lotes += 1
+            self.liberados += len(liberados)
+            self.pedidos_cancelados += cancelados
+            self.lote_max_ms = max(self.lote_max_ms, duracao)
+        if liberados:
+            invalidar_catalogo()
+        return len(linhas), len(liberados)
+
+    async def varrer(self, agora: Optional[datetime] = None) -> int:
+        """Uma varredura: lotes até esvaziar ou chegar em ``max_lotes``"""
+        liberados = 0
+        atrasado = False
+        for numero in range(self.max_lotes):
+            processadas, n = await run_in_threadpool(self.varrer_lote, agora)
+            liberados += n
+            if processadas < self.lote:
+                break
+            atrasado = numero == self.max_lotes - 1
+            await asyncio.sleep(0)
+
+        with self._lock:
+            self.varreduras += 1
+            self.atrasado = atrasado
+            self.ultima_varredura = datetime.now(timezone.utc)
+        return liberados
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "varreduras": self.varreduras,
+                "lotes": self.lotes,
+                "liberados": self.liberados,
+                "pedidos_cancelados": self.pedidos_cancelados,
+                "falhas": self.falhas,
+                "lote_max_ms": round(self.lote_max_ms, 2),
+                "atrasado": self.atrasado,
+                "ultima_varredura": self.ultima_varredura,
+            }
+
+
+varredor = VarredorReservas(
+    engine,
+    lote=settings.RESERVATION_SWEEP_BATCH,
+    max_lotes=settings.RESERVATION_SWEEP_MAX_BATCHES,
+)
+
+
+async def varrer_periodicamente(
+    intervalo: float = settings.RESERVATION_SWEEP_INTERVAL,
+):
+    """Tarefa de fundo: libera reservas vencidas a cada ``intervalo`` segundos"""
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            await varredor.varrer()
+        except Exception:
+            varredor.falhas += 1
+            logger.exception("Falha ao liberar reservas vencidas")
@@ -0,0 +1,150 @@
+"""
+Hash de senhas (bcrypt) num pool próprio
+
+Cada ``checkpw``/``hashpw`` leva centenas de milissegundos de CPU. Rodando no
+threadpool compartilhado das rotas síncronas, uma rajada de logins ocupava
+todas as threads e a navegação pelo catálogo ficava esperando. Aqui o bcrypt
+roda num pool separado e limitado (threads bastam: o bcrypt libera o GIL
+durante o hash); com a fila cheia a requisição recebe 503 em vez de esperar
+indefinidamente.
+
+O custo vem de ``BCRYPT_ROUNDS``. Hashes gravados com outro custo são
+refeitos no login, quando a senha em texto está disponível.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import bcrypt
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def verificar_senha(senha: str, senha_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(senha.encode("utf-8"), senha_hash.encode("utf-8"))
+    except:
+        # Fallback para pwd_context se houver problemas
+        return pwd_context.verify(senha, senha_hash)
+
+
+def gerar_hash(senha: str, custo: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds=custo or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(senha.encode("utf-8"), salt).decode("utf-8")
+
+
+def custo_do_hash(senha_hash: str) -> Optional[int]:
+    """Custo de um hash bcrypt ("$2b$12$..." -> 12); None se não for bcrypt"""
+    partes = senha_hash.split("$")
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def precisa_rehash(senha_hash: str) -> bool:
+    return custo_do_hash(senha_hash) != settings.BCRYPT_ROUNDS
+
+
+class PoolSenhas:
+    """Executor limitado para o bcrypt, com métricas da fila"""
+
+    def __init__(self, workers: int, max_fila: int):
+        self.workers = workers
+        self.max_fila = max_fila
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pendentes = 0  # na fila ou executando
+        self.executando = 0
+        self.concluidos = 0
+        self.recusados = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.execucao_total = 0.0
+
+    def _obter_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    def _finalizar(self, _: Future):
+        with self._lock:
+            self.pendentes -= 1
+
+    async def executar(self, funcao: Callable[..., Any], *args) -> Any:
+        """Roda ``funcao`` no pool; 503 se já há ``max_fila`` tarefas esperando"""
+        with self._lock:
+            if self.pendentes >= self.workers + self.max_fila:
+                self.recusados += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Muitas autenticações simultâneas, tente novamente",
+                    headers={"Retry-After": "1"},
+                )
+            self.pendentes += 1
+            executor = self._obter_executor()
+
+        enfileirado = time.perf_counter()
+
+        def tarefa():
+            inicio = time.perf_counter()
+            with self._lock:
+                self.executando += 1
+                espera = inicio - enfileirado
+                self.espera_total += espera
+                self.espera_max = max(self.espera_max, espera)
+            try:
+                return funcao(*args)
+            finally:
+                with self._lock:
+                    self.executando -= 1
+                    self.concluidos += 1
+                    self.execucao_total += time.perf_counter() - inicio
+
+        futuro = executor.submit(tarefa)
+        # Também conta tarefas canceladas antes de começar
+        futuro.add_done_callback(self._finalizar)
+        return await asyncio.wrap_future(futuro)
+
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            concluidos = self.concluidos or 1
+            return {
+                "workers": self.workers,
+                "max_fila": self.max_fila,
+                "custo": settings.BCRYPT_ROUNDS,
+                "na_fila": self.pendentes - self.executando,
+                "executando": self.executando,
+                "concluidos": self.concluidos,
+                "recusados": self.recusados,
+                "espera_media_ms": round(self.espera_total / concluidos * 1000, 2),
+                "espera_max_ms": round(self.espera_max * 1000, 2),
+                "execucao_media_ms": round(self.execucao_total / concluidos * 1000, 2),
+            }
+
+
+pool_senhas = PoolSenhas(
+    workers=settings.PASSWORD_HASH_WORKERS, max_fila=settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+
+async def verificar_senha_async(senha: str, senha_hash: str) -> bool:
+    return await pool_senhas.executar(verificar_senha, senha, senha_hash)
+
+
+async def gerar_hash_async(senha: str) -> str:
+    return await pool_senhas.executar(gerar_hash, senha)
@@ -0,0 +1,68 @@
+"""
+Cache dos usuários autenticados
+
+``get_current_user`` resolve o ``sub`` do token (email) para o usuário a cada
+requisição autenticada. Aqui fica uma cópia das colunas do usuário por email,
+com TTL: na próxima requisição a cópia é anexada à sessão com
+``merge(load=False)``, sem SELECT, e continua podendo ser alterada e gravada
+pela rota.
+
+Toda escrita em um usuário chama ``invalidar_usuario(email)`` depois do
+commit. Como no cache do catálogo, a invalidação é por processo; com vários
+workers, o TTL limita por quanto tempo um usuário desativado ou rebaixado
+ainda é aceito pelos outros.
+"""
+
+import itertools
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.models.usuario import Usuario
+from app.services.cache import CacheLRU
+
+cache_usuarios = CacheLRU(
+    max_itens=settings.USER_CACHE_MAX_ITEMS, ttl=settings.USER_CACHE_TTL
+)
+
+_COLUNAS = [coluna.key for coluna in inspect(Usuario).column_attrs]
+
+_geracoes = itertools.count(1)
+_lock = threading.Lock()
+_geracao = next(_geracoes)
+
+
+def _copia(usuario: Usuario) -> Dict[str, Any]:
+    return {coluna: getattr(usuario, coluna) for coluna in _COLUNAS}
+
+
+def invalidar_usuario(email: str):
+    """Chamar depois do commit de qualquer escrita em um usuário"""
+    global _geracao
+    with _lock:
+        _geracao = next(_geracoes)
+    cache_usuarios.remover(email)
+
+
+def usuario_por_email(db: Session, email: str) -> Optional[Usuario]:
+    """Usuário do token, do cache ou do banco, sempre anexado a ``db``"""
+    dados = cache_usuarios.obter(email)
+    if dados is not None:
+        usuario = Usuario(**dados)
+        make_transient_to_detached(usuario)
+        return db.merge(usuario, load=False)
+
+    geracao = _geracao
+    usuario = db.query(Usuario).filter(Usuario.email == email).first()
+    # Uma invalidação durante o SELECT pode ter chegado antes da leitura:
+    # nesse caso o resultado serve a esta requisição mas não vai para o cache
+    if usuario is not None and geracao == _geracao:
+        cache_usuarios.definir(email, _copia(usuario))
+    return usuario
+
+
+def estatisticas_usuarios() -> dict:
+    return cache_usuarios.estatisticas()
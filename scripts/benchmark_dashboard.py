@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark do dashboard do admin com 1 milhão de produtos
+
+Compara as três formas de montar o ``AdminStats``:
+
+1. cinco ``COUNT(*)`` separados (como o dashboard fazia);
+2. uma consulta com agregação condicional (``contar_estatisticas``);
+3. a tabela ``estatisticas`` mantida por triggers (``ler_estatisticas``).
+
+Também mede quanto os triggers acrescentam a cada INSERT em produtos. Os
+produtos são gerados direto no SQLite (CTE recursiva) sem os triggers do
+FTS, que não entram na medição.
+
+Execute com: poetry run python scripts/benchmark_dashboard.py [produtos]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import criar_engine
+from app.models import Base, Categoria, Estatistica, Produto, StatusProduto, Usuario
+from app.services.estatisticas_service import contar_estatisticas, ler_estatisticas
+
+REPETICOES = 5
+INSERCOES = 10000
+
+GERAR_PRODUTOS = """
+    WITH RECURSIVE n(i) AS (SELECT :inicio UNION ALL SELECT i + 1 FROM n WHERE i < :fim)
+    INSERT INTO produtos (nome, tamanho, condicao, preco_venda, status, categoria_id)
+    SELECT 'Peça ' || i, 'M', 'USADO_BOM', 50.0,
+           CASE i % 10 WHEN 0 THEN 'VENDIDO' WHEN 1 THEN 'RESERVADO'
+                       ELSE 'DISPONIVEL' END,
+           i % 20 + 1
+    FROM n
+"""
+
+
+def cinco_counts(db):
+    return {
+        "total_produtos": db.query(Produto).count(),
+        "produtos_disponiveis": db.query(Produto)
+        .filter(Produto.status == StatusProduto.DISPONIVEL)
+        .count(),
+        "produtos_vendidos": db.query(Produto)
+        .filter(Produto.status == StatusProduto.VENDIDO)
+        .count(),
+        "total_categorias": db.query(Categoria).count(),
+        "total_usuarios": db.query(Usuario).count(),
+    }
+
+
+def medir(Session, funcao):
+    tempos = []
+    with Session() as db:
+        for _ in range(REPETICOES):
+            inicio = time.perf_counter()
+            resultado = funcao(db)
+            tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000, resultado
+
+
+def inserir(engine, inicio: int) -> float:
+    """Microssegundos por INSERT de produto (commit único)"""
+    with engine.begin() as conn:
+        t = time.perf_counter()
+        conn.execute(
+            text(GERAR_PRODUTOS), {"inicio": inicio, "fim": inicio + INSERCOES - 1}
+        )
+        return (time.perf_counter() - t) / INSERCOES * 1e6
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    diretorio = tempfile.mkdtemp(prefix="brecho_dashboard_")
+    engine = criar_engine(f"sqlite:///{diretorio}/bench.db")
+    Session = sessionmaker(bind=engine)
+
+    tabelas = [t for t in Base.metadata.sorted_tables if t is not Estatistica.__table__]
+    Base.metadata.create_all(bind=engine, tables=tabelas)
+
+    print(f"Gerando {quantidade:,} produtos...")
+    with engine.begin() as conn:
+        for trigger in ("ai", "ad", "au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS produtos_fts_{trigger}"))
+        conn.execute(
+            text(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+                "WHERE i < 20) INSERT INTO categorias (nome) SELECT 'Categoria ' || i FROM n"
+            )
+        )
+        conn.execute(text("INSERT INTO usuarios (nome, email, senha_hash) VALUES ('a', 'a@b', 'x')"))
+    inserir_sem_trigger = inserir(engine, 1)
+    with engine.begin() as conn:
+        conn.execute(text(GERAR_PRODUTOS), {"inicio": INSERCOES + 1, "fim": quantidade})
+
+    # Cria a tabela agora: os triggers e a contagem inicial vêm no after_create
+    inicio = time.perf_counter()
+    Base.metadata.create_all(bind=engine, tables=[Estatistica.__table__])
+    print(f"Contagem inicial da tabela estatisticas: {time.perf_counter() - inicio:.2f}s\n")
+    inserir_com_trigger = inserir(engine, quantidade + 1)
+
+    print(f"{'dashboard':<28}{'ms (melhor de ' + str(REPETICOES) + ')':>20}")
+    resultados = {}
+    for nome, funcao in (
+        ("5 COUNT(*) separados", cinco_counts),
+        ("agregação condicional", contar_estatisticas),
+        ("tabela estatisticas", ler_estatisticas),
+    ):
+        ms, resultados[nome] = medir(Session, funcao)
+        print(f"{nome:<28}{ms:>20.3f}")
+
+    valores = list(resultados.values())
+    assert all(v == valores[0] for v in valores), resultados
+    print(f"\n{valores[0]}")
+    print(
+        f"\nINSERT em produtos: {inserir_sem_trigger:.1f} µs sem triggers, "
+        f"{inserir_com_trigger:.1f} µs com os triggers das estatísticas"
+    )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
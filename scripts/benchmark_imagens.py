@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pipeline de imagens
+
+1. Latência do upload: o caminho antigo (lê tudo na memória, grava, reabre,
+   thumbnail LANCZOS e re-encode dentro da requisição) contra
+   ``salvar_original`` (cópia em blocos para disco).
+2. Vazão do processamento: versões (thumb, card, zoom em WebP e JPEG) geradas
+   num processo só e no pool de processos, em imagens por segundo.
+
+Usa fotos sintéticas de 12 MP (4000x3000) num diretório temporário.
+
+Execute com: poetry run python scripts/benchmark_imagens.py [quantidade]
+"""
+
+import sys
+import asyncio
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from fastapi import UploadFile
+from PIL import Image
+
+from app.config import settings
+from app.services.imagens import gerar_rendicoes, salvar_original
+
+LARGURA, ALTURA = 4000, 3000
+
+
+def foto_sintetica() -> bytes:
+    """JPEG de 12 MP com gradiente e ruído (comprime como uma foto)"""
+    gradiente = Image.linear_gradient("L").resize((LARGURA, ALTURA))
+    ruido = Image.effect_noise((LARGURA, ALTURA), 40)
+    img = Image.merge("RGB", (gradiente, ruido, gradiente.rotate(180)))
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def upload_antigo(conteudo: bytes, diretorio: str, i: int) -> str:
+    """Como ``save_image`` fazia antes, dentro da requisição"""
+    caminho = os.path.join(diretorio, f"antigo_{i}.jpg")
+    with open(caminho, "wb") as buffer:
+        buffer.write(io.BytesIO(conteudo).read())
+
+    with Image.open(caminho) as img:
+        img.thumbnail((800, 800), Image.Resampling.LANCZOS)
+        img.save(caminho, optimize=True, quality=85)
+    return caminho
+
+
+def medir_upload(foto: bytes, diretorio: str, quantidade: int):
+    tempos = {"antigo": [], "novo": []}
+    originais = []
+    for i in range(quantidade):
+        # Bytes extras depois do fim do JPEG: mesma foto, hash diferente (sem
+        # isso o armazenamento por conteúdo deduplicaria tudo)
+        conteudo = foto + i.to_bytes(4, "big")
+
+        inicio = time.perf_counter()
+        upload_antigo(conteudo, diretorio, i)
+        tempos["antigo"].append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        upload = UploadFile(io.BytesIO(conteudo), filename="foto.jpg")
+        originais.append(asyncio.run(salvar_original(upload, diretorio)))
+        tempos["novo"].append(time.perf_counter() - inicio)
+
+    print(f"{'upload':<10}{'média (ms)':>12}{'máx (ms)':>12}")
+    for nome, valores in tempos.items():
+        print(
+            f"{nome:<10}{sum(valores) / len(valores) * 1000:>12.1f}"
+            f"{max(valores) * 1000:>12.1f}"
+        )
+    media_antigo = sum(tempos["antigo"]) / len(tempos["antigo"])
+    media_novo = sum(tempos["novo"]) / len(tempos["novo"])
+    print(f"⚡ upload {media_antigo / media_novo:.0f}x mais rápido\n")
+    return originais
+
+
+def medir_processamento(originais, diretorio: str):
+    # Cada passada grava num diretório próprio: gerar_rendicoes pula as
+    # versões que já existem, e a segunda passada não mediria nada
+    def argumentos(passada: str):
+        destino = tempfile.mkdtemp(prefix=f"{passada}_", dir=diretorio)
+        return [(o.caminho, o.nome_base, destino) for o in originais]
+
+    sequenciais = argumentos("sequencial")
+    inicio = time.perf_counter()
+    for args in sequenciais:
+        gerar_rendicoes(*args)
+    sequencial = len(sequenciais) / (time.perf_counter() - inicio)
+
+    paralelos = argumentos("pool")
+    with ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS) as pool:
+        pool.submit(int).result()  # sobe os processos antes de medir
+        inicio = time.perf_counter()
+        list(pool.map(gerar_rendicoes, *zip(*paralelos)))
+        paralelo = len(paralelos) / (time.perf_counter() - inicio)
+
+    print(f"{'versões':<22}{'imagens/s':>10}")
+    print(f"{'1 processo':<22}{sequencial:>10.2f}")
+    print(f"{f'pool ({settings.IMAGE_WORKERS} processos)':<22}{paralelo:>10.2f}")
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    diretorio = tempfile.mkdtemp(prefix="brecho_imagens_")
+
+    conteudo = foto_sintetica()
+    print(f"{quantidade} fotos de {LARGURA}x{ALTURA} ({len(conteudo) / 1e6:.1f} MB)\n")
+
+    originais = medir_upload(conteudo, diretorio, quantidade)
+    medir_processamento(originais, diretorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark da importação de produtos em lote (CSV e NDJSON)
+
+Gera arquivos com 50 mil produtos (1% das linhas com erro) e importa cada um
+num banco SQLite novo (WAL + PRAGMAs das settings, triggers do FTS e das
+estatísticas ativos) com ``importar_produtos``. Mede o tempo e, numa segunda
+importação, o pico de memória alocada pelo Python, e compara com gravar uma
+peça por vez como ``criar_produto_admin`` (busca a categoria e faz commit a
+cada produto), numa amostra menor.
+
+Execute com: poetry run python scripts/benchmark_importacao.py [linhas]
+"""
+
+import csv
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+import orjson
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import criar_engine
+from app.models import Base, Categoria, CondicaoProduto, Produto, TamanhoProduto
+from app.routes.admin import ProdutoAdmin
+from app.services.importacao import FormatoImportacao, importar_produtos, ler_registros
+
+CATEGORIAS = ["Blusas", "Calças", "Vestidos", "Saias", "Jaquetas", "Acessórios"]
+AMOSTRA_UMA_A_UMA = 1000
+
+
+def gerar_linhas(quantidade: int, semente: int = 42):
+    sorteio = random.Random(semente)
+    for i in range(quantidade):
+        linha = {
+            "nome": f"Peça {i}",
+            "descricao": "Peça de brechó em ótimo estado, lavada e revisada",
+            "marca": sorteio.choice(["Zara", "Farm", "Levi's", "Renner"]),
+            "cor_principal": sorteio.choice(["preto", "azul", "vermelho"]),
+            "tamanho": sorteio.choice([t.value for t in TamanhoProduto]),
+            "condicao": sorteio.choice([c.value for c in CondicaoProduto]),
+            "preco_original": round(sorteio.uniform(80, 400), 2),
+            "preco_venda": round(sorteio.uniform(20, 150), 2),
+            "categoria": sorteio.choice(CATEGORIAS),
+        }
+        if i % 100 == 99:
+            linha["preco_venda"] = "grátis"
+        yield linha
+
+
+def gravar_arquivos(diretorio: Path, quantidade: int):
+    caminho_csv = diretorio / "produtos.csv"
+    caminho_ndjson = diretorio / "produtos.ndjson"
+    with open(caminho_csv, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = None
+        for linha in gerar_linhas(quantidade):
+            if escritor is None:
+                escritor = csv.DictWriter(arquivo, fieldnames=list(linha))
+                escritor.writeheader()
+            escritor.writerow(linha)
+    with open(caminho_ndjson, "wb") as arquivo:
+        for linha in gerar_linhas(quantidade):
+            arquivo.write(orjson.dumps(linha) + b"\n")
+    return caminho_csv, caminho_ndjson
+
+
+def novo_banco(diretorio: Path, nome: str):
+    engine = criar_engine(f"sqlite:///{diretorio}/{nome}.db")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all(Categoria(nome=nome) for nome in CATEGORIAS)
+        db.commit()
+    return engine, Session
+
+
+def importar(diretorio: Path, caminho: Path, formato: FormatoImportacao, medir_memoria: bool):
+    engine, Session = novo_banco(diretorio, f"{formato.value}_{int(medir_memoria)}")
+    with Session() as db, open(caminho, "rb") as arquivo:
+        if medir_memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        relatorio = importar_produtos(db, ler_registros(arquivo, formato), ProdutoAdmin)
+        duracao = time.perf_counter() - inicio
+        pico = 0
+        if medir_memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        gravados = db.query(Produto).count()
+    engine.dispose()
+    assert gravados == relatorio["importadas"], (gravados, relatorio["importadas"])
+    return relatorio, duracao, pico
+
+
+def uma_a_uma(diretorio: Path, quantidade: int) -> float:
+    """Segundos por produto gravando como o formulário do admin"""
+    engine, Session = novo_banco(diretorio, "uma_a_uma")
+    linhas = [linha for linha in gerar_linhas(quantidade) if linha["preco_venda"] != "grátis"]
+    with Session() as db:
+        ids = {c.nome: c.id for c in db.query(Categoria)}
+        inicio = time.perf_counter()
+        for linha in linhas:
+            categoria = db.get(Categoria, ids[linha.pop("categoria")])
+            db.add(Produto(**linha, categoria_id=categoria.id))
+            db.commit()
+        duracao = time.perf_counter() - inicio
+    engine.dispose()
+    return duracao / len(linhas)
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    diretorio = Path(tempfile.mkdtemp(prefix="brecho_importacao_"))
+    caminho_csv, caminho_ndjson = gravar_arquivos(diretorio, quantidade)
+
+    print(f"{quantidade:,} linhas por arquivo\n")
+    print(
+        f"{'formato':<10}{'tamanho':>10}{'importadas':>12}{'com erro':>10}"
+        f"{'tempo':>9}{'linhas/s':>11}{'pico mem.':>11}"
+    )
+    for caminho, formato in (
+        (caminho_csv, FormatoImportacao.CSV),
+        (caminho_ndjson, FormatoImportacao.NDJSON),
+    ):
+        relatorio, duracao, _ = importar(diretorio, caminho, formato, False)
+        # O tracemalloc deixa o Python mais lento: a memória é medida à parte
+        _, _, pico = importar(diretorio, caminho, formato, True)
+        print(
+            f"{formato.value:<10}{caminho.stat().st_size / 2**20:>8.1f}MB"
+            f"{relatorio['importadas']:>12,}{relatorio['com_erro']:>10,}"
+            f"{duracao:>8.2f}s{relatorio['linhas'] / duracao:>11,.0f}"
+            f"{pico / 2**20:>9.1f}MB"
+        )
+
+    por_produto = uma_a_uma(diretorio, AMOSTRA_UMA_A_UMA)
+    print(
+        f"\nUma peça por vez (amostra de {AMOSTRA_UMA_A_UMA}): "
+        f"{por_produto * 1000:.2f} ms por produto, "
+        f"~{por_produto * quantidade:.0f}s para {quantidade:,} linhas"
+    )
+
+
+if __name__ == "__main__":
+    main()
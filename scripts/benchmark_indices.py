@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices das listagens do catálogo
+
+Popula um banco SQLite temporário com um catálogo grande (a maioria das peças
+VENDIDO/INATIVO, como em produção), mostra o plano de execução de cada consulta
+de listagem e compara o tempo com e sem os índices compostos.
+
+Execute com: poetry run python scripts/benchmark_indices.py [quantidade]
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from sqlalchemy import create_engine, insert, text, tuple_
+from sqlalchemy.orm import sessionmaker
+
+from app.models import (
+    Base,
+    Categoria,
+    Produto,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
+
+INDICES = [
+    "ix_produtos_status_created_at",
+    "ix_produtos_status_categoria_created_at",
+    "ix_produtos_status_visualizacoes",
+]
+
+
+def popular(engine, quantidade: int):
+    """Insere categorias e produtos sintéticos"""
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Categoria),
+            [{"nome": f"Categoria {i}", "ativa": True} for i in range(1, 11)],
+        )
+
+        # ~10% disponíveis, o resto vendido, inativo ou reservado
+        status_pesos = (
+            [StatusProduto.DISPONIVEL] * 10
+            + [StatusProduto.VENDIDO] * 60
+            + [StatusProduto.INATIVO] * 28
+            + [StatusProduto.RESERVADO] * 2
+        )
+        inicio = datetime.now(timezone.utc) - timedelta(days=365 * 3)
+        lote = []
+        for i in range(quantidade):
+            criado = inicio + timedelta(seconds=i * 30)
+            lote.append(
+                {
+                    "nome": f"Peça {i}",
+                    "tamanho": random.choice(list(TamanhoProduto)),
+                    "condicao": random.choice(list(CondicaoProduto)),
+                    "preco_venda": round(random.uniform(10, 400), 2),
+                    "status": random.choice(status_pesos),
+                    "categoria_id": random.randint(1, 10),
+                    "visualizacoes": random.randint(0, 5000),
+                    "favoritado": 0,
+                    "created_at": criado,
+                    "updated_at": criado,
+                }
+            )
+            if len(lote) == 10_000:
+                conn.execute(insert(Produto), lote)
+                lote = []
+        if lote:
+            conn.execute(insert(Produto), lote)
+        conn.execute(text("ANALYZE"))
+
+
+def consultas(session):
+    """Consultas equivalentes às das rotas de listagem"""
+    disponivel = Produto.status == StatusProduto.DISPONIVEL
+    return {
+        "listar_produtos": session.query(Produto)
+        .join(Categoria, Produto.categoria_id == Categoria.id)
+        .filter(disponivel)
+        .order_by(Produto.created_at.desc())
+        .limit(20),
+        "listar_produtos (categoria)": session.query(Produto)
+        .join(Categoria, Produto.categoria_id == Categoria.id)
+        .filter(Produto.categoria_id == 3, disponivel)
+        .order_by(Produto.created_at.desc())
+        .limit(20),
+        "listar_produtos (cursor)": session.query(Produto)
+        .filter(disponivel)
+        .filter(
+            tuple_(Produto.created_at, Produto.id)
+            < tuple_(datetime(2024, 1, 1), 1_000_000)
+        )
+        .order_by(Produto.created_at.desc(), Produto.id.desc())
+        .limit(20),
+        "produtos_por_categoria": session.query(Produto)
+        .filter(Produto.categoria_id == 3, disponivel)
+        .order_by(Produto.created_at.desc())
+        .limit(20),
+        "lancamentos": session.query(Produto)
+        .filter(disponivel)
+        .order_by(Produto.created_at.desc())
+        .limit(10),
+        "produtos_mais_vistos": session.query(Produto)
+        .filter(disponivel)
+        .order_by(Produto.visualizacoes.desc())
+        .limit(10),
+    }
+
+
+def compilar(query):
+    return str(
+        query.statement.compile(
+            dialect=query.session.bind.dialect,
+            compile_kwargs={"literal_binds": True},
+        )
+    )
+
+
+def plano(conn, sql: str) -> str:
+    linhas = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return " | ".join(linha[-1] for linha in linhas)
+
+
+def cronometrar(conn, sql: str, repeticoes: int = 50) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        conn.exec_driver_sql(sql).fetchall()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    caminho = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    print(f"📦 Populando {quantidade} produtos em {caminho}...")
+    popular(engine, quantidade)
+
+    session = Session()
+    sqls = {nome: compilar(q) for nome, q in consultas(session).items()}
+    session.close()
+
+    falhas = []
+    resultados = {}
+    with engine.connect() as conn:
+        print("\n🔎 Planos com índices:")
+        for nome, sql in sqls.items():
+            p = plano(conn, sql)
+            print(f"  {nome}: {p}")
+            if "TEMP B-TREE" in p or "SCAN produtos" in p:
+                falhas.append(nome)
+            resultados[nome] = [cronometrar(conn, sql)]
+
+        for indice in INDICES:
+            conn.exec_driver_sql(f"DROP INDEX {indice}")
+        conn.exec_driver_sql("ANALYZE")
+
+        print("\n🐢 Planos sem índices:")
+        for nome, sql in sqls.items():
+            print(f"  {nome}: {plano(conn, sql)}")
+            resultados[nome].append(cronometrar(conn, sql, repeticoes=5))
+
+    print(f"\n{'consulta':<30}{'com índice (ms)':>18}{'sem índice (ms)':>18}")
+    for nome, (com, sem) in resultados.items():
+        print(f"{nome:<30}{com:>18.3f}{sem:>18.3f}")
+
+    if falhas:
+        print(f"\n❌ Consultas sem range scan no índice: {', '.join(falhas)}")
+        sys.exit(1)
+    print("\n✅ Todas as listagens usam índice, sem ordenação em B-tree temporária")
+
+
+if __name__ == "__main__":
+    main()
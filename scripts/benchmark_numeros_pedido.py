@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos números de pedido com vários processos gravando pedidos
+
+Cada processo (como um worker do uvicorn) cria pedidos o mais rápido que
+consegue, um commit por pedido, num banco SQLite novo (WAL + PRAGMAs das
+settings). Compara:
+
+1. data/hora até o segundo (o ``gerar_numero_pedido`` antigo): conta os
+   pedidos perdidos na restrição unique;
+2. ``AlocadorNumeros`` com bloco 1: uma ida ao banco por pedido;
+3. ``AlocadorNumeros`` com o bloco das settings (``ORDER_NUMBER_BLOCK``).
+
+Confere que nenhum número se repete, que os números de cada processo só
+crescem e que a vazão passa de 1.000 pedidos/s (código de saída 1 se não).
+
+Execute com: poetry run python scripts/benchmark_numeros_pedido.py [processos] [pedidos_por_processo]
+"""
+
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database.connection import criar_engine
+from app.models import Base, Endereco, FormaPagamento, Pedido, Usuario
+from app.services.numeracao import (
+    SEQUENCIA_PEDIDOS,
+    AlocadorNumeros,
+    formatar_numero_pedido,
+)
+
+META_PEDIDOS_POR_SEGUNDO = 1000
+
+
+def preparar(url: str):
+    engine = criar_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        usuario = Usuario(nome="Comprador", email="c@carga.com", senha_hash="x")
+        db.add(usuario)
+        db.flush()
+        endereco = Endereco(
+            usuario_id=usuario.id,
+            nome="Casa",
+            cep="90000-000",
+            logradouro="Rua",
+            numero="1",
+            bairro="Centro",
+            cidade="Porto Alegre",
+            estado="RS",
+        )
+        db.add(endereco)
+        db.commit()
+        ids = usuario.id, endereco.id
+    engine.dispose()
+    return ids
+
+
+def worker(url: str, bloco: int, pedidos: int, usuario_id: int, endereco_id: int):
+    """Grava ``pedidos`` pedidos; bloco 0 usa o número por data/hora"""
+    engine = criar_engine(url)
+    Session = sessionmaker(bind=engine)
+    alocador = AlocadorNumeros(engine, SEQUENCIA_PEDIDOS, bloco) if bloco else None
+    numeros, colisoes = [], 0
+
+    with Session() as db:
+        for _ in range(pedidos):
+            if alocador:
+                numero = formatar_numero_pedido(alocador.proximo())
+            else:
+                numero = f"BR{datetime.now():%Y%m%d%H%M%S}"
+            db.add(
+                Pedido(
+                    numero_pedido=numero,
+                    usuario_id=usuario_id,
+                    endereco_entrega_id=endereco_id,
+                    subtotal=50.0,
+                    total=50.0,
+                    forma_pagamento=FormaPagamento.PIX,
+                )
+            )
+            try:
+                db.commit()
+                numeros.append(numero)
+            except IntegrityError:
+                db.rollback()
+                colisoes += 1
+
+    engine.dispose()
+    return numeros, colisoes, alocador.blocos if alocador else 0
+
+
+def executar(nome: str, bloco: int, processos: int, pedidos: int):
+    diretorio = tempfile.mkdtemp(prefix="brecho_numeros_")
+    url = f"sqlite:///{diretorio}/bench.db"
+    usuario_id, endereco_id = preparar(url)
+
+    with ProcessPoolExecutor(processos) as executor:
+        inicio = time.perf_counter()
+        futuros = [
+            executor.submit(worker, url, bloco, pedidos, usuario_id, endereco_id)
+            for _ in range(processos)
+        ]
+        resultados = [f.result() for f in futuros]
+        duracao = time.perf_counter() - inicio
+
+    gravados = [numeros for numeros, _, _ in resultados]
+    total = sum(len(n) for n in gravados)
+    colisoes = sum(c for _, c, _ in resultados)
+    idas = sum(b for _, _, b in resultados)
+    todos = [n for numeros in gravados for n in numeros]
+    unicos = len(set(todos)) == len(todos)
+    crescentes = all(numeros == sorted(numeros) for numeros in gravados)
+    vazao = total / duracao
+
+    print(
+        f"{nome:<22}{total:>10}{colisoes:>10}{idas:>8}{vazao:>12,.0f}"
+        f"{'sim' if unicos else 'NÃO':>8}{'sim' if crescentes else 'NÃO':>12}"
+    )
+    return vazao, colisoes, unicos and crescentes
+
+
+def main():
+    processos = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    pedidos = int(sys.argv[2]) if len(sys.argv) > 2 else 2500
+
+    print(f"{processos} processos x {pedidos} pedidos (um commit por pedido)\n")
+    print(
+        f"{'número':<22}{'gravados':>10}{'colisões':>10}{'idas':>8}"
+        f"{'pedidos/s':>12}{'únicos':>8}{'crescentes':>12}"
+    )
+    executar("data/hora (antigo)", 0, processos, pedidos)
+    executar("bloco de 1", 1, processos, pedidos)
+    vazao, colisoes, ok = executar(
+        f"bloco de {settings.ORDER_NUMBER_BLOCK}",
+        settings.ORDER_NUMBER_BLOCK,
+        processos,
+        pedidos,
+    )
+
+    if colisoes or not ok or vazao < META_PEDIDOS_POR_SEGUNDO:
+        print(f"\n❌ Abaixo da meta de {META_PEDIDOS_POR_SEGUNDO} pedidos/s sem colisão")
+        sys.exit(1)
+    print(f"\n✅ {vazao:,.0f} pedidos/s sem colisão (meta: {META_PEDIDOS_POR_SEGUNDO})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da serialização de uma página com 100 produtos
+
+Compara o caminho antigo (``__dict__.copy()`` + ``isoformat()`` +
+``ProdutoResponse(**dict)`` e depois a revalidação do ``response_model`` com
+``jsonable_encoder`` + ``json.dumps``) com o caminho atual (``TypeAdapter``
+com ``from_attributes`` e ``dump_json`` do pydantic-core).
+
+Execute com: poetry run python scripts/benchmark_serializacao.py
+"""
+
+import sys
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+from app.models import (
+    Categoria,
+    Produto,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
+from app.services.produto_service import resposta_produtos
+
+REPETICOES = 200
+
+
+class ProdutoResponseAntigo(BaseModel):
+    """Schema como era antes (datas como string, from_attributes)"""
+
+    id: int
+    nome: str
+    descricao: Optional[str]
+    marca: Optional[str]
+    cor_principal: Optional[str]
+    tamanho: TamanhoProduto
+    condicao: CondicaoProduto
+    preco_original: Optional[float]
+    preco_venda: float
+    status: StatusProduto
+    categoria_id: int
+    categoria_nome: Optional[str] = None
+    ano_aproximado: Optional[int]
+    material: Optional[str]
+    cuidados: Optional[str]
+    historia_peca: Optional[str]
+    imagem_principal: Optional[str]
+    imagens_adicionais: Optional[str]
+    visualizacoes: int
+    favoritado: int
+    created_at: str
+    updated_at: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# O FastAPI revalida o retorno contra o response_model
+response_model_antigo = TypeAdapter(List[ProdutoResponseAntigo])
+
+
+def montar_pagina(quantidade: int = 100) -> List[Produto]:
+    categoria = Categoria(id=1, nome="Vestidos")
+    agora = datetime.now(timezone.utc)
+    return [
+        Produto(
+            id=i,
+            nome=f"Vestido Midi Estampado {i}",
+            descricao="Vestido midi com estampa tropical, muito confortável",
+            marca="Farm",
+            cor_principal="Verde",
+            tamanho=TamanhoProduto.G,
+            condicao=CondicaoProduto.SEMI_NOVO,
+            preco_original=159.90,
+            preco_venda=120.00,
+            status=StatusProduto.DISPONIVEL,
+            categoria_id=1,
+            categoria=categoria,
+            ano_aproximado=2020,
+            material="Modal",
+            cuidados=None,
+            historia_peca=None,
+            imagem_principal=f"/static/images/produtos/produto_{i}.jpg",
+            imagens_adicionais=None,
+            visualizacoes=i * 3,
+            favoritado=i,
+            created_at=agora,
+            updated_at=agora,
+        )
+        for i in range(1, quantidade + 1)
+    ]
+
+
+def caminho_antigo(produtos: List[Produto]) -> bytes:
+    result = []
+    for produto in produtos:
+        produto_dict = produto.__dict__.copy()
+        produto_dict["categoria_nome"] = produto.categoria.nome
+        produto_dict["created_at"] = produto.created_at.isoformat()
+        produto_dict["updated_at"] = produto.updated_at.isoformat()
+        result.append(ProdutoResponseAntigo(**produto_dict))
+
+    validado = response_model_antigo.validate_python(result, from_attributes=True)
+    conteudo = jsonable_encoder(validado)
+    return json.dumps(conteudo, ensure_ascii=False).encode("utf-8")
+
+
+def caminho_novo(produtos: List[Produto]) -> bytes:
+    return resposta_produtos(produtos).body
+
+
+def medir(nome: str, funcao, produtos: List[Produto]):
+    funcao(produtos)  # aquecimento
+
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao(produtos)
+    tempo = (time.perf_counter() - inicio) / REPETICOES * 1000
+
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    funcao(produtos)
+    depois = tracemalloc.take_snapshot()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    estatisticas = depois.compare_to(antes, "filename")
+    blocos = sum(max(stat.count_diff, 0) for stat in estatisticas)
+
+    print(f"{nome:<10}{tempo:>14.3f}{pico / 1024:>16.1f}{blocos:>16}")
+    return tempo, pico
+
+
+def main():
+    produtos = montar_pagina()
+
+    assert json.loads(caminho_antigo(produtos))[0]["categoria_nome"] == "Vestidos"
+    assert json.loads(caminho_novo(produtos))[0]["categoria_nome"] == "Vestidos"
+
+    print(f"{'caminho':<10}{'ms/resposta':>14}{'pico (KiB)':>16}{'blocos vivos':>16}")
+    tempo_antigo, pico_antigo = medir("antigo", caminho_antigo, produtos)
+    tempo_novo, pico_novo = medir("novo", caminho_novo, produtos)
+
+    print(
+        f"\n⚡ {tempo_antigo / tempo_novo:.1f}x mais rápido, "
+        f"{pico_antigo / pico_novo:.1f}x menos memória alocada no pico"
+    )
+
+
+if __name__ == "__main__":
+    main()
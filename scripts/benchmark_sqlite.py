@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência do SQLite: leituras e escritas misturadas
+
+Roda leitores (listagem do catálogo) e escritores (UPDATE de preço, um commit
+por operação) em threads ao mesmo tempo, primeiro com a engine como era
+(``create_engine`` com os padrões do SQLite: journal de rollback,
+``synchronous=FULL``) e depois com ``criar_engine`` (WAL + PRAGMAs e pool das
+settings). Cada configuração usa um arquivo próprio, já que o modo WAL fica
+gravado no banco.
+
+Execute com: poetry run python scripts/benchmark_sqlite.py [segundos]
+"""
+
+import sys
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.database.connection import criar_engine
+from app.models import (
+    Base,
+    Categoria,
+    Produto,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
+
+PRODUTOS = 5000
+LEITORES = 8
+ESCRITORES = 4
+
+CONSULTA_LISTAGEM = (
+    select(Produto.id, Produto.nome, Produto.preco_venda, Categoria.nome)
+    .join(Produto.categoria)
+    .where(Produto.status == StatusProduto.DISPONIVEL)
+    .order_by(Produto.created_at.desc(), Produto.id.desc())
+    .limit(20)
+)
+
+
+def popular(engine):
+    Base.metadata.create_all(bind=engine)
+    inicio = datetime.now(timezone.utc) - timedelta(days=365)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Categoria), [{"nome": f"Categoria {i}"} for i in range(1, 11)]
+        )
+        conn.execute(
+            insert(Produto),
+            [
+                {
+                    "nome": f"Peça {i}",
+                    "tamanho": TamanhoProduto.M,
+                    "condicao": CondicaoProduto.USADO_BOM,
+                    "preco_venda": 50.0,
+                    "status": StatusProduto.DISPONIVEL,
+                    "categoria_id": i % 10 + 1,
+                    "created_at": inicio + timedelta(minutes=i),
+                    "updated_at": inicio + timedelta(minutes=i),
+                }
+                for i in range(PRODUTOS)
+            ],
+        )
+
+
+def executar(engine, segundos: float) -> dict:
+    parar = threading.Event()
+    lock = threading.Lock()
+    resultado = {"leituras": 0, "escritas": 0, "bloqueios": 0, "latencias": []}
+
+    def leitor():
+        leituras, latencias = 0, []
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(CONSULTA_LISTAGEM).all()
+            except OperationalError:
+                with lock:
+                    resultado["bloqueios"] += 1
+                continue
+            latencias.append(time.perf_counter() - inicio)
+            leituras += 1
+        with lock:
+            resultado["leituras"] += leituras
+            resultado["latencias"].extend(latencias)
+
+    def escritor():
+        escritas = 0
+        while not parar.is_set():
+            produto_id = random.randint(1, PRODUTOS)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        update(Produto)
+                        .where(Produto.id == produto_id)
+                        .values(preco_venda=Produto.preco_venda + 1)
+                    )
+            except OperationalError:
+                with lock:
+                    resultado["bloqueios"] += 1
+                continue
+            escritas += 1
+        with lock:
+            resultado["escritas"] += escritas
+
+    threads = [threading.Thread(target=leitor) for _ in range(LEITORES)]
+    threads += [threading.Thread(target=escritor) for _ in range(ESCRITORES)]
+    for thread in threads:
+        thread.start()
+    time.sleep(segundos)
+    parar.set()
+    for thread in threads:
+        thread.join()
+
+    latencias = sorted(resultado["latencias"]) or [0.0]
+    resultado["p95"] = latencias[int(len(latencias) * 0.95)] * 1000
+    return resultado
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    diretorio = tempfile.mkdtemp(prefix="brecho_bench_")
+
+    configuracoes = {
+        "antes": lambda url: create_engine(url),
+        "depois": lambda url: criar_engine(url),
+    }
+
+    print(f"{LEITORES} leitores + {ESCRITORES} escritores, {segundos:.0f}s cada\n")
+    print(
+        f"{'engine':<8}{'leituras/s':>12}{'escritas/s':>12}"
+        f"{'p95 leitura (ms)':>18}{'locked':>8}"
+    )
+
+    resultados = {}
+    for nome, fabrica in configuracoes.items():
+        engine = fabrica(f"sqlite:///{diretorio}/{nome}.db")
+        popular(engine)
+        r = executar(engine, segundos)
+        engine.dispose()
+
+        resultados[nome] = r
+        print(
+            f"{nome:<8}{r['leituras'] / segundos:>12.0f}"
+            f"{r['escritas'] / segundos:>12.0f}{r['p95']:>18.2f}{r['bloqueios']:>8}"
+        )
+
+    antes, depois = resultados["antes"], resultados["depois"]
+    print(
+        f"\n⚡ {depois['escritas'] / max(antes['escritas'], 1):.1f}x escritas, "
+        f"{depois['leituras'] / max(antes['leituras'], 1):.1f}x leituras, "
+        f"p95 de leitura {antes['p95'] / max(depois['p95'], 1e-6):.1f}x menor"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Coleta de imagens órfãs dos produtos
+
+Apaga de app/static/images/produtos os arquivos que nenhum produto referencia
+mais (``imagem_principal``, ``imagens_adicionais`` ou ``imagem_rendicoes``,
+que inclui o original). Arquivos modificados há menos de ``--idade-minima``
+horas são mantidos: podem ser de um upload cujo produto ainda não foi gravado
+ou de uma imagem ainda em processamento.
+
+Sem ``--apagar`` só lista o que seria removido.
+
+Execute com: poetry run python scripts/gc_imagens.py [--apagar] [--idade-minima 24]
+"""
+
+import sys
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, Set
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import engine
+from app.models import Produto
+from app.services.imagens import DIRETORIO_IMAGENS, URL_IMAGENS
+
+Session = sessionmaker(bind=engine)
+
+
+def urls_adicionais(valor) -> List[str]:
+    """``imagens_adicionais`` é uma lista JSON ou URLs separadas por vírgula"""
+    if not valor:
+        return []
+    try:
+        urls = json.loads(valor)
+    except ValueError:
+        urls = valor.split(",")
+    if isinstance(urls, str):
+        urls = [urls]
+    return [url.strip() for url in urls if isinstance(url, str) and url.strip()]
+
+
+def urls_referenciadas(db) -> Set[str]:
+    urls = set()
+    consulta = db.query(
+        Produto.imagem_principal, Produto.imagens_adicionais, Produto.imagem_rendicoes
+    )
+    for principal, adicionais, rendicoes in consulta.yield_per(500):
+        if principal:
+            urls.add(principal)
+        urls.update(urls_adicionais(adicionais))
+        for formatos in (rendicoes or {}).values():
+            urls.update(formatos.values())
+    return urls
+
+
+def caminhos(urls: Iterable[str], diretorio: str) -> Set[str]:
+    """Converte as URLs /static/images/produtos/... em caminhos no disco"""
+    prefixo = URL_IMAGENS.rstrip("/") + "/"
+    return {
+        os.path.normpath(os.path.join(diretorio, url[len(prefixo) :]))
+        for url in urls
+        if url.startswith(prefixo)
+    }
+
+
+def coletar(
+    diretorio: str, referenciados: Set[str], idade_minima: float, apagar: bool
+):
+    limite = time.time() - idade_minima
+    removidos, liberados = 0, 0
+
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            caminho = os.path.normpath(os.path.join(raiz, nome))
+            if caminho in referenciados:
+                continue
+
+            estatistica = os.stat(caminho)
+            if estatistica.st_mtime > limite:
+                continue
+
+            marcador = "🗑️ " if apagar else "·"
+            print(f"   {marcador} {os.path.relpath(caminho, diretorio)}")
+            if apagar:
+                os.remove(caminho)
+            removidos += 1
+            liberados += estatistica.st_size
+
+    return removidos, liberados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apagar", action="store_true", help="remove os órfãos")
+    parser.add_argument(
+        "--idade-minima",
+        type=float,
+        default=24,
+        help="horas desde a última modificação para um órfão ser removido",
+    )
+    parser.add_argument("--diretorio", default=DIRETORIO_IMAGENS)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.diretorio):
+        print(f"Nada a fazer: {args.diretorio} não existe")
+        return
+
+    db = Session()
+    try:
+        referenciados = caminhos(urls_referenciadas(db), args.diretorio)
+    finally:
+        db.close()
+
+    print(f"🔍 {len(referenciados)} arquivos referenciados por produtos")
+    removidos, liberados = coletar(
+        args.diretorio, referenciados, args.idade_minima * 3600, args.apagar
+    )
+
+    acao = "removidos" if args.apagar else "seriam removidos (use --apagar)"
+    print(f"\n✅ {removidos} órfãos {acao}, {liberados / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do checkout: compradores simultâneos disputando as mesmas peças
+
+200 compradores (threads, cada um com sua sessão) tentam comprar ao mesmo
+tempo 1 a 3 peças sorteadas entre 50. Cada peça só pode terminar em um
+pedido. Roda duas vezes num banco SQLite novo (WAL + PRAGMAs das settings):
+
+1. ingênuo: confere o status com SELECT e depois faz o UPDATE, como uma
+   rota sem reserva atômica faria;
+2. ``finalizar_pedido``: compare-and-set ``UPDATE ... WHERE status =
+   'DISPONIVEL'``.
+
+Falha (código de saída 1) se o compare-and-set vender alguma peça duas vezes.
+
+Execute com: poetry run python scripts/teste_carga_checkout.py [compradores] [pecas]
+"""
+
+import sys
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import criar_engine
+from app.models import (
+    Base,
+    Categoria,
+    Produto,
+    Usuario,
+    Pedido,
+    ItemPedido,
+    StatusPedido,
+    StatusProduto,
+    FormaPagamento,
+    CondicaoProduto,
+    TamanhoProduto,
+)
+from app.models.endereco import Endereco
+from app.services.numeracao import proximo_numero_pedido
+from app.services.pedido_service import finalizar_pedido
+
+
+def checkout_ingenuo(db, usuario_id, produto_ids, endereco_id, forma_pagamento):
+    """Confere e depois reserva, em dois passos: a janela entre eles é o bug"""
+    status = dict(
+        db.query(Produto.id, Produto.status).filter(Produto.id.in_(produto_ids))
+    )
+    if any(status.get(i) != StatusProduto.DISPONIVEL for i in produto_ids):
+        raise HTTPException(status_code=409, detail="Indisponível")
+
+    numero_pedido = proximo_numero_pedido(db.get_bind())
+    db.query(Produto).filter(Produto.id.in_(produto_ids)).update(
+        {Produto.status: StatusProduto.RESERVADO}, synchronize_session=False
+    )
+    db.add(
+        Pedido(
+            numero_pedido=numero_pedido,
+            usuario_id=usuario_id,
+            endereco_entrega_id=endereco_id,
+            status=StatusPedido.PENDENTE,
+            subtotal=0.0,
+            total=0.0,
+            forma_pagamento=forma_pagamento,
+            itens=[
+                ItemPedido(produto_id=i, preco_unitario=0.0, subtotal=0.0)
+                for i in produto_ids
+            ],
+        )
+    )
+    db.commit()
+
+
+def preparar(engine, compradores: int, pecas: int):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        categoria = Categoria(nome="Carga")
+        db.add(categoria)
+        db.flush()
+        db.add_all(
+            Produto(
+                nome=f"Peça {i}",
+                tamanho=TamanhoProduto.M,
+                condicao=CondicaoProduto.USADO_BOM,
+                preco_venda=50.0,
+                categoria_id=categoria.id,
+            )
+            for i in range(pecas)
+        )
+        usuarios = [
+            Usuario(nome=f"Comprador {i}", email=f"c{i}@carga.com", senha_hash="x")
+            for i in range(compradores)
+        ]
+        db.add_all(usuarios)
+        db.flush()
+        enderecos = [
+            Endereco(
+                usuario_id=u.id,
+                nome="Casa",
+                cep="90000-000",
+                logradouro="Rua",
+                numero="1",
+                bairro="Centro",
+                cidade="Porto Alegre",
+                estado="RS",
+            )
+            for u in usuarios
+        ]
+        db.add_all(enderecos)
+        db.commit()
+        produto_ids = [p for (p,) in db.query(Produto.id)]
+        return Session, [(u.id, e.id) for u, e in zip(usuarios, enderecos)], produto_ids
+
+
+def executar(nome: str, checkout, compradores: int, pecas: int, semente: int = 42):
+    diretorio = tempfile.mkdtemp(prefix="brecho_checkout_")
+    engine = criar_engine(f"sqlite:///{diretorio}/carga.db")
+    Session, clientes, produto_ids = preparar(engine, compradores, pecas)
+
+    sorteio = random.Random(semente)
+    carrinhos = [sorteio.sample(produto_ids, sorteio.randint(1, 3)) for _ in clientes]
+    largada = threading.Barrier(len(clientes))
+    resultado = Counter()
+    lock = threading.Lock()
+
+    def comprador(cliente, carrinho):
+        usuario_id, endereco_id = cliente
+        largada.wait()
+        with Session() as db:
+            try:
+                checkout(db, usuario_id, carrinho, endereco_id, FormaPagamento.PIX)
+                chave = "pedidos"
+            except HTTPException as e:
+                chave = "conflitos" if e.status_code == 409 else f"http_{e.status_code}"
+            except Exception as e:
+                chave = type(e).__name__
+        with lock:
+            resultado[chave] += 1
+
+    threads = [
+        threading.Thread(target=comprador, args=(c, carrinho))
+        for c, carrinho in zip(clientes, carrinhos)
+    ]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    with Session() as db:
+        vendas = Counter(p for (p,) in db.query(ItemPedido.produto_id))
+        reservadas = (
+            db.query(func.count(Produto.id))
+            .filter(Produto.status == StatusProduto.RESERVADO)
+            .scalar()
+        )
+    engine.dispose()
+
+    duplicadas = sum(1 for n in vendas.values() if n > 1)
+    outros = {k: v for k, v in resultado.items() if k not in ("pedidos", "conflitos")}
+    print(
+        f"{nome:<18}{resultado['pedidos']:>8}{resultado['conflitos']:>11}"
+        f"{len(vendas):>9}{reservadas:>11}{duplicadas:>12}{duracao:>9.2f}s"
+        + (f"  erros: {outros}" if outros else "")
+    )
+    return duplicadas, len(vendas), reservadas
+
+
+def main():
+    compradores = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pecas = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"{compradores} compradores simultâneos, {pecas} peças únicas\n")
+    print(
+        f"{'checkout':<18}{'pedidos':>8}{'conflitos':>11}{'vendidas':>9}"
+        f"{'reservadas':>11}{'duplicadas':>12}{'tempo':>10}"
+    )
+    executar("ingênuo", checkout_ingenuo, compradores, pecas)
+    duplicadas, vendidas, reservadas = executar(
+        "compare-and-set", finalizar_pedido, compradores, pecas
+    )
+
+    if duplicadas or vendidas != reservadas:
+        print("\n❌ Peça vendida duas vezes com o compare-and-set")
+        sys.exit(1)
+    print("\n✅ Nenhuma peça vendida duas vezes com o compare-and-set")
+
+
+if __name__ == "__main__":
+    main()
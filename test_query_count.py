@@ -0,0 +1,897 @@
+"""
+Regressão de N+1: cada listagem de produtos deve executar um número constante
+de comandos SQL, independente de quantos produtos/categorias há na página, e
+nenhum quando a mesma consulta é repetida (cache do catálogo); o cursor da
+busca não pula nem repete itens quando há escritas entre as páginas, e uma
+listagem de que saiu uma peça vendida não responde 304. O usuário do token
+também só é buscado no banco na primeira requisição, e o dashboard do admin lê
+os contadores mantidos pelos triggers em vez de contar as tabelas. O varredor
+de reservas libera cada lote com dois UPDATEs, sem ler as peças (e olhando só
+o pedido da reserva atual de cada uma), e os números de pedido só vão ao banco
+uma vez por bloco. A importação em lote lê as categorias uma vez e grava cada
+lote com um único INSERT (e aceita arquivos maiores que o limite das imagens),
+e as alterações em lote do admin são um único UPDATE (e as de status não
+devolvem à vitrine peças reservadas por um checkout em andamento). O checkout
+grava os preços devolvidos pela reserva e tira as peças do carrinho, responde
+409 sem deixar peça reservada, 404 para endereço de outro cliente e 400 com o
+carrinho vazio. O carrinho recusa cookie com assinatura inválida, migra o
+cookie legado, é mesclado no login e, de visitante, vence junto com o cookie. O rollup de vendas recalcula dias já
+agregados quando um pedido muda de status, não passa a marca d'água de ``agora
+- ANALYTICS_ROLLUP_LAG``, e a receita por categoria fecha com o total dos
+pedidos. O limite de taxa repõe fichas, descarta baldes ociosos e responde 429
+com Retry-After.
+
+Execute com: poetry run pytest test_query_count.py
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database.connection import get_async_db, get_db
+from app.models import (
+    Base,
+    Carrinho,
+    Categoria,
+    Endereco,
+    ItemPedido,
+    Pedido,
+    StatusPedido,
+    Produto,
+    Usuario,
+    TipoUsuario,
+    StatusProduto,
+    CondicaoProduto,
+    TamanhoProduto,
+)
+from app.routes.admin import router as admin_router
+from app.routes.auth import create_access_token, get_current_admin_user, get_current_user
+from app.routes.auth import router as auth_router
+from app.routes.carrinho import router as carrinho_router
+from app.routes.pedidos import router as pedidos_router
+from app.routes.produtos import router as produtos_router
+from app.services.analytics_service import (
+    AgrupamentoVendas,
+    atualizar_vendas_diarias,
+    consultar_vendas,
+    processado_ate,
+)
+from app.services.carrinho_store import (
+    COOKIE_CARRINHO,
+    BancoCarrinhoStore,
+    get_carrinho_store,
+    verificar_carrinho_id,
+)
+from app.services.catalogo_cache import chave_catalogo, invalidar_catalogo
+from app.services.estatisticas_service import contar_estatisticas
+from app.services import limite_taxa
+from app.services.contadores import AgregadorContadores, gravar_periodicamente
+from app.services.imagens import limitar_uploads
+from app.services.limite_taxa import LimitadorTaxa
+from app.services.numeracao import AlocadorNumeros
+from app.services.reservas import VarredorReservas
+from app.services.senhas import gerar_hash
+from app.services.usuarios_cache import invalidar_usuario
+
+ENDPOINTS = [
+    "/produtos/?limit=100",
+    "/produtos/?limit=100&busca=peca",
+    "/produtos/categoria/1?limit=100",
+    "/produtos/mais-vistos/?limit=50",
+    "/produtos/lancamentos/?limit=50",
+    "/admin/produtos?limit=100",
+]
+
+
+@pytest.fixture()
+def contexto(tmp_path):
+    # Arquivo (e não :memory:) para as engines síncrona e assíncrona verem o mesmo banco
+    url = f"sqlite:///{tmp_path / 'teste.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(url.replace("sqlite", "sqlite+aiosqlite", 1))
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    TestingAsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with TestingAsyncSession() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(produtos_router)
+    app.include_router(admin_router)
+    app.include_router(auth_router)
+    app.include_router(carrinho_router)
+    app.include_router(pedidos_router)
+    app.middleware("http")(limitar_uploads)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    store = BancoCarrinhoStore(TestingSession, TestingAsyncSession)
+    app.dependency_overrides[get_carrinho_store] = lambda: store
+    app.dependency_overrides[get_current_admin_user] = lambda: Usuario(
+        id=1, nome="Admin", email="admin@teste.com", tipo=TipoUsuario.ADMIN, ativo=True
+    )
+
+    comandos = []
+    for alvo in (engine, async_engine.sync_engine):
+        event.listen(
+            alvo,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: comandos.append(statement),
+        )
+
+    with TestClient(app) as client:
+        yield client, TestingSession, comandos
+        client.portal.call(async_engine.dispose)
+    engine.dispose()
+
+
+def popular(Session, quantidade: int):
+    """Cria uma categoria por produto, para que lazy loads aparecessem"""
+    db = Session()
+    for i in range(quantidade):
+        categoria = Categoria(nome=f"Categoria {db.query(Categoria).count() + 1}")
+        db.add(categoria)
+        db.flush()
+        db.add(
+            Produto(
+                nome=f"Peca {i}",
+                tamanho=TamanhoProduto.M,
+                condicao=CondicaoProduto.USADO_BOM,
+                preco_venda=10 + i,
+                categoria_id=1 if i % 2 else categoria.id,
+            )
+        )
+    db.commit()
+    db.close()
+    invalidar_catalogo()
+
+
+def novo_cliente(Session, email: str):
+    """Cliente com um endereço; devolve o cabeçalho de autenticação e o endereço"""
+    with Session() as db:
+        usuario = Usuario(nome="Cliente", email=email, senha_hash="x")
+        db.add(usuario)
+        db.flush()
+        endereco = Endereco(
+            usuario_id=usuario.id, nome="Casa", cep="01000-000", logradouro="Rua A",
+            numero="1", bairro="Centro", cidade="São Paulo", estado="SP",
+        )
+        db.add(endereco)
+        db.commit()
+        endereco_id = endereco.id
+    token = create_access_token({"sub": email})
+    return {"Authorization": f"Bearer {token}"}, endereco_id
+
+
+def criar_pedido(db, produto_ids, status: StatusPedido) -> Pedido:
+    """Pedido com as peças dadas (cria cliente e endereço na primeira vez)"""
+    endereco = db.query(Endereco).first()
+    if endereco is None:
+        usuario = Usuario(nome="Cliente", email="cliente@teste.com", senha_hash="x")
+        db.add(usuario)
+        db.flush()
+        endereco = Endereco(
+            usuario_id=usuario.id, nome="Casa", cep="01000-000", logradouro="Rua A",
+            numero="1", bairro="Centro", cidade="São Paulo", estado="SP",
+        )
+        db.add(endereco)
+        db.flush()
+    itens = [
+        ItemPedido(produto_id=i, preco_unitario=10.0, subtotal=10.0) for i in produto_ids
+    ]
+    pedido = Pedido(
+        numero_pedido=f"T{db.query(Pedido).count() + 1}",
+        usuario_id=endereco.usuario_id,
+        endereco_entrega_id=endereco.id,
+        status=status,
+        subtotal=10.0 * len(itens),
+        total=10.0 * len(itens),
+        itens=itens,
+    )
+    db.add(pedido)
+    db.commit()
+    return pedido
+
+
+def contar(client, comandos, url: str) -> int:
+    comandos.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return len(comandos)
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_listagem_executa_numero_constante_de_queries(contexto, url):
+    client, Session, comandos = contexto
+
+    popular(Session, 2)
+    poucos = contar(client, comandos, url)
+
+    popular(Session, 30)
+    muitos = contar(client, comandos, url)
+
+    assert muitos == poucos
+
+
+@pytest.mark.parametrize("url", ENDPOINTS[:5])
+def test_catalogo_repetido_vem_do_cache(contexto, url):
+    client, Session, comandos = contexto
+
+    popular(Session, 5)
+    primeira = client.get(url)
+    assert contar(client, comandos, url) == 0
+    assert client.get(url).content == primeira.content
+
+    # Escrita no catálogo invalida as entradas anteriores
+    invalidar_catalogo()
+    assert contar(client, comandos, url) > 0
+
+
+def test_cursor_da_busca_sobrevive_a_escritas_entre_paginas(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 12)
+    with Session() as db:
+        # Relevâncias diferentes: o termo no nome, na marca ou nos dois
+        for produto in db.query(Produto).filter(Produto.id % 3 == 0):
+            produto.marca = "Peca Rara"
+        db.commit()
+    invalidar_catalogo()
+
+    response = client.get("/produtos/?limit=5&busca=peca")
+    vistos = [p["id"] for p in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+
+    # Escritas entre as páginas mudam as estatísticas do índice inteiro
+    with Session() as db:
+        db.add_all(
+            Produto(
+                nome=f"Peca nova {i}",
+                descricao="peca peca peca " * i,
+                tamanho=TamanhoProduto.P,
+                condicao=CondicaoProduto.NOVO,
+                preco_venda=50,
+                categoria_id=1,
+            )
+            for i in range(20)
+        )
+        db.commit()
+    invalidar_catalogo()
+
+    while cursor:
+        response = client.get(f"/produtos/?limit=5&busca=peca&cursor={cursor}")
+        assert response.status_code == 200, response.text
+        vistos += [p["id"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert len(vistos) == len(set(vistos))
+    assert set(range(1, 13)) <= set(vistos)
+
+
+def test_listagem_sem_peca_vendida_nao_responde_304(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 3)
+    response = client.get("/produtos/")
+    assert "Last-Modified" not in response.headers
+    etag = response.headers["ETag"]
+    assert client.get("/produtos/", headers={"If-None-Match": etag}).status_code == 304
+
+    # A peça vendida sai da lista sem mudar o updated_at das que ficam
+    with Session() as db:
+        db.get(Produto, 1).status = StatusProduto.VENDIDO
+        db.commit()
+    invalidar_catalogo()
+
+    no_futuro = "Sun, 01 Jan 2090 00:00:00 GMT"
+    for cabecalho in ({"If-None-Match": etag}, {"If-Modified-Since": no_futuro}):
+        response = client.get("/produtos/", headers=cabecalho)
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+
+def test_chave_do_cache_so_normaliza_texto_livre():
+    assert chave_catalogo("listar_produtos", busca="  Saia  JEANS!", marca="Zara") == (
+        chave_catalogo("listar_produtos", busca="saia jeans", marca="zara")
+    )
+    # O cursor é base64: "AbC" e "abc" são páginas diferentes
+    assert chave_catalogo("listar_produtos", cursor="AbC") != (
+        chave_catalogo("listar_produtos", cursor="abc")
+    )
+
+
+def test_usuario_autenticado_vem_do_cache(contexto):
+    _, Session, comandos = contexto
+
+    with Session() as db:
+        db.add(Usuario(nome="Cliente", email="cliente@teste.com", senha_hash="x"))
+        db.commit()
+    token = create_access_token({"sub": "cliente@teste.com"})
+    invalidar_usuario("cliente@teste.com")
+
+    with Session() as db:
+        get_current_user(token, db)
+
+    comandos.clear()
+    with Session() as db:
+        usuario = get_current_user(token, db)
+        assert usuario.nome == "Cliente"
+
+        # A cópia do cache fica anexada à sessão e pode ser gravada
+        usuario.ativo = False
+        db.commit()
+    assert [c for c in comandos if c.lstrip().startswith("SELECT")] == []
+
+    invalidar_usuario("cliente@teste.com")
+    with Session() as db:
+        assert get_current_user(token, db).ativo is False
+
+
+def test_contadores_nao_falham_a_requisicao_quando_o_flush_falha(tmp_path):
+    # Banco que não abre: todo flush falha
+    inacessivel = create_engine(f"sqlite:///{tmp_path / 'nao' / 'existe.db'}")
+    agregador = AgregadorContadores(inacessivel, max_pendentes=2)
+
+    assert agregador.incrementar(1, "visualizacoes") == 1
+    assert agregador.incrementar(1, "visualizacoes") == 2  # encheu: flush falha
+    assert agregador.incrementar(1, "visualizacoes") == 3  # não tenta de novo já
+    assert agregador.falhas == 1
+    assert agregador.pendentes(1, "visualizacoes") == 3
+
+
+def test_lote_cheio_e_gravado_pela_tarefa_de_fundo(contexto, monkeypatch):
+    _, Session, _ = contexto
+
+    popular(Session, 1)
+    with Session() as db:
+        agregador = AgregadorContadores(db.get_bind(), max_pendentes=2)
+    monkeypatch.setattr("app.services.contadores.agregador", agregador)
+
+    async def cenario():
+        tarefa = asyncio.create_task(gravar_periodicamente(intervalo=3600))
+        await asyncio.sleep(0)
+        # A requisição só avisa; quem grava é a tarefa, sem esperar o intervalo
+        await agregador.incrementar_async(1, "visualizacoes")
+        await agregador.incrementar_async(1, "visualizacoes")
+        for _ in range(100):
+            if not agregador.pendentes(1, "visualizacoes"):
+                break
+            await asyncio.sleep(0.01)
+        tarefa.cancel()
+
+    asyncio.run(cenario())
+    with Session() as db:
+        assert db.get(Produto, 1).visualizacoes == 2
+
+
+def test_dashboard_le_contadores(contexto):
+    client, Session, comandos = contexto
+
+    popular(Session, 10)
+    with Session() as db:
+        produtos = db.query(Produto).order_by(Produto.id).all()
+        for produto in produtos[:3]:
+            produto.status = StatusProduto.VENDIDO
+        db.delete(produtos[-1])
+        db.add(Usuario(nome="Cliente", email="dash@teste.com", senha_hash="x"))
+        db.commit()
+
+    comandos.clear()
+    estatisticas = client.get("/admin/dashboard").json()
+    assert len(comandos) == 1
+
+    with Session() as db:
+        assert estatisticas == contar_estatisticas(db)
+    assert estatisticas["produtos_vendidos"] == 3
+    assert estatisticas["total_produtos"] == 9
+
+
+def test_carrinho_recusa_cookie_com_assinatura_invalida(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 2)
+    response = client.post("/carrinho/adicionar", json={"produto_id": 1})
+    carrinho_id = verificar_carrinho_id(response.cookies[COOKIE_CARRINHO])
+
+    # Id de outro carrinho com a assinatura trocada: ignorado
+    client.cookies.clear()
+    client.cookies.set(COOKIE_CARRINHO, f"{carrinho_id}.assinaturaforjada")
+    assert client.get("/carrinho/").json() == []
+
+    response = client.post("/carrinho/adicionar", json={"produto_id": 2})
+    novo_id = verificar_carrinho_id(response.cookies[COOKIE_CARRINHO])
+    assert novo_id and novo_id != carrinho_id
+    store = client.app.dependency_overrides[get_carrinho_store]()
+    assert store.obter(carrinho_id) == {"1": 1}
+
+
+def test_cookie_legado_migra_para_o_servidor(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 2)
+    client.cookies.set("carrinho", orjson.dumps({"1": 1}).decode())
+    assert [item["produto_id"] for item in client.get("/carrinho/").json()] == [1]
+
+    response = client.post("/carrinho/adicionar", json={"produto_id": 2})
+    assert 'carrinho=""' in response.headers["set-cookie"]  # cookie legado apagado
+    carrinho_id = verificar_carrinho_id(response.cookies[COOKIE_CARRINHO])
+    store = client.app.dependency_overrides[get_carrinho_store]()
+    assert store.obter(carrinho_id) == {"1": 1, "2": 1}
+
+
+def test_login_mescla_carrinho_de_visitante(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 2)
+    with Session() as db:
+        usuario = Usuario(nome="Cliente", email="cliente@teste.com", senha_hash=gerar_hash("segredo"))
+        db.add(usuario)
+        db.commit()
+        usuario_id = usuario.id
+    store = client.app.dependency_overrides[get_carrinho_store]()
+    carrinho_usuario = store.carrinho_do_usuario(usuario_id)
+    store.salvar(carrinho_usuario, {"2": 1})
+
+    client.post("/carrinho/adicionar", json={"produto_id": 1})
+    visitante = verificar_carrinho_id(client.cookies[COOKIE_CARRINHO])
+
+    response = client.post(
+        "/auth/login", data={"username": "cliente@teste.com", "password": "segredo"}
+    )
+    assert response.status_code == 200, response.text
+    assert verificar_carrinho_id(response.cookies[COOKIE_CARRINHO]) == carrinho_usuario
+    assert store.obter(carrinho_usuario) == {"1": 1, "2": 1}
+    with Session() as db:
+        assert db.query(Carrinho).filter(Carrinho.token == visitante).count() == 0
+
+
+def test_carrinho_de_visitante_vence_com_o_cookie(contexto):
+    client, Session, _ = contexto
+
+    store = client.app.dependency_overrides[get_carrinho_store]()
+    store.salvar("visitante", {"1": 1})
+    usuario = store.carrinho_do_usuario(1)
+    store.salvar(usuario, {"2": 1})
+
+    depois = datetime.now(timezone.utc) + timedelta(seconds=settings.CART_COOKIE_MAX_AGE + 1)
+    assert store.remover_expirados(datetime.now(timezone.utc)) == 0
+    assert store.remover_expirados(depois) == 1
+    assert store.obter("visitante") == {}
+    assert store.obter(usuario) == {"2": 1}
+
+
+def test_limitador_repoe_fichas_com_o_tempo():
+    agora = [0.0]
+    limite = LimitadorTaxa(2, por_minuto=60, max_chaves=10, relogio=lambda: agora[0])
+
+    assert limite.consumir("a") == 0
+    assert limite.consumir("a") == 0
+    assert limite.consumir("a") == 1.0  # uma ficha por segundo
+    agora[0] = 0.5
+    assert limite.consumir("a") == 0.5
+    agora[0] = 1.0
+    assert limite.consumir("a") == 0
+    assert limite.consumir("b") == 0  # cada chave tem seu balde
+
+
+def test_limitador_descarta_baldes_cheios_e_menos_usados():
+    agora = [0.0]
+    limite = LimitadorTaxa(2, por_minuto=60, max_chaves=2, relogio=lambda: agora[0])
+
+    limite.consumir("a")
+    limite.consumir("b")
+    limite.consumir("c")  # passou do máximo: sai "a", a menos usada
+    assert limite.estatisticas()["chaves"] == 2
+    assert limite.descartados == 1
+
+    # Depois de encher de novo, o balde parado é descartado
+    agora[0] = 2.0
+    limite.consumir("c")
+    assert limite.estatisticas()["chaves"] == 1
+    assert limite.descartados == 2
+
+
+def test_middleware_responde_429_com_retry_after(monkeypatch):
+    app = FastAPI()
+    app.get("/limitada", name="limitada")(lambda: {"ok": True})
+    app.middleware("http")(limite_taxa.limitar_requisicoes)
+    monkeypatch.setattr(
+        limite_taxa, "_limitadores", {"limitada": LimitadorTaxa(2, 6, 100)}
+    )
+    monkeypatch.setattr(limite_taxa, "_rotas_limitadas", None)
+
+    with TestClient(app) as client:
+        assert client.get("/limitada").status_code == 200
+        assert client.get("/limitada").status_code == 200
+        response = client.get("/limitada")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "10"  # 6 fichas por minuto
+
+        # O X-Forwarded-For só vale vindo de um proxy confiável
+        encaminhado = {"X-Forwarded-For": "203.0.113.7"}
+        assert client.get("/limitada", headers=encaminhado).status_code == 429
+        monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", ["testclient"])
+        assert client.get("/limitada", headers=encaminhado).status_code == 200
+
+
+def test_varredor_libera_reservas_em_lotes(contexto):
+    _, Session, comandos = contexto
+
+    popular(Session, 5)
+    vencida = datetime.now(timezone.utc) - timedelta(minutes=1)
+    with Session() as db:
+        for produto in db.query(Produto).all():
+            produto.status = StatusProduto.RESERVADO
+            produto.reservado_ate = vencida
+        db.commit()
+        varredor = VarredorReservas(db.get_bind(), lote=2, max_lotes=10)
+
+    comandos.clear()
+    assert varredor.varrer_lote() == (2, 2)
+    assert len(comandos) == 2
+
+    assert varredor.varrer_lote() == (2, 2)
+    assert varredor.varrer_lote() == (1, 1)
+    assert varredor.varrer_lote() == (0, 0)
+    with Session() as db:
+        assert {p.status for p in db.query(Produto)} == {StatusProduto.DISPONIVEL}
+        assert db.query(Produto).filter(Produto.reservado_ate.is_not(None)).count() == 0
+
+
+def test_varredor_libera_peca_revendida_com_reserva_vencida(contexto):
+    _, Session, _ = contexto
+
+    popular(Session, 1)
+    with Session() as db:
+        # Vendida e entregue, devolvida e relistada, reservada de novo
+        vendido = criar_pedido(db, [1], StatusPedido.ENTREGUE).id
+        atual = criar_pedido(db, [1], StatusPedido.PENDENTE).id
+        produto = db.get(Produto, 1)
+        produto.status = StatusProduto.RESERVADO
+        produto.reservado_ate = datetime.now(timezone.utc) - timedelta(minutes=1)
+        db.commit()
+        varredor = VarredorReservas(db.get_bind(), lote=10, max_lotes=1)
+
+    assert varredor.varrer_lote() == (1, 1)
+    with Session() as db:
+        assert db.get(Produto, 1).status == StatusProduto.DISPONIVEL
+        assert db.get(Pedido, atual).status == StatusPedido.CANCELADO
+        assert db.get(Pedido, vendido).status == StatusPedido.ENTREGUE
+
+        # Com o pedido atual confirmado, a peça só perde o prazo
+        db.get(Pedido, atual).status = StatusPedido.CONFIRMADO
+        produto = db.get(Produto, 1)
+        produto.status = StatusProduto.RESERVADO
+        produto.reservado_ate = datetime.now(timezone.utc) - timedelta(minutes=1)
+        db.commit()
+
+    assert varredor.varrer_lote() == (1, 0)
+    with Session() as db:
+        assert db.get(Produto, 1).status == StatusProduto.RESERVADO
+
+
+def depois_do_atraso() -> datetime:
+    """Um ``agora`` cuja marca d'água do rollup é o instante atual"""
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG)
+
+
+def vendas(Session, agrupar_por: AgrupamentoVendas):
+    hoje = datetime.now(timezone.utc).date()
+    with Session() as db:
+        return {
+            linha["chave"]: linha
+            for linha in consultar_vendas(db, hoje, hoje, agrupar_por, True)
+        }
+
+
+def test_rollup_recalcula_dia_com_status_alterado(contexto):
+    _, Session, _ = contexto
+
+    popular(Session, 2)
+    with Session() as db:
+        pedido_id = criar_pedido(db, [1, 2], StatusPedido.PENDENTE).id
+        assert atualizar_vendas_diarias(db, depois_do_atraso()) == 1
+    assert set(vendas(Session, AgrupamentoVendas.STATUS)) == {"pendente"}
+
+    # O dia já foi agregado: a mudança de status entra no próximo ciclo
+    with Session() as db:
+        db.get(Pedido, pedido_id).status = StatusPedido.CONFIRMADO
+        db.commit()
+        assert atualizar_vendas_diarias(db, depois_do_atraso()) == 1
+    por_status = vendas(Session, AgrupamentoVendas.STATUS)
+    assert set(por_status) == {"confirmado"}
+    assert por_status["confirmado"]["pedidos"] == 1
+
+
+def test_marca_dagua_do_rollup_fica_atras_de_agora(contexto):
+    _, Session, _ = contexto
+
+    popular(Session, 2)
+    agora = datetime.now(timezone.utc)
+    with Session() as db:
+        atualizar_vendas_diarias(db, agora)
+        marca = agora - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG)
+        assert processado_ate(db) == marca
+
+        # Escrita depois da marca: fica para quando a marca passar dela
+        criar_pedido(db, [1], StatusPedido.CONFIRMADO)
+        assert atualizar_vendas_diarias(db, agora + timedelta(seconds=1)) == 0
+        assert processado_ate(db) == marca + timedelta(seconds=1)
+    assert vendas(Session, AgrupamentoVendas.DIA) == {}
+
+    with Session() as db:
+        assert atualizar_vendas_diarias(db, depois_do_atraso()) == 1
+    assert len(vendas(Session, AgrupamentoVendas.DIA)) == 1
+
+
+def test_receita_por_categoria_soma_o_total_dos_pedidos(contexto):
+    _, Session, _ = contexto
+
+    popular(Session, 4)  # peças 1, 2 e 4 na categoria 1; a 3 na categoria 3
+    with Session() as db:
+        totais = [
+            criar_pedido(db, ids, StatusPedido.CONFIRMADO).total
+            for ids in ([1, 3], [2], [4])
+        ]
+        atualizar_vendas_diarias(db, depois_do_atraso())
+
+    por_categoria = vendas(Session, AgrupamentoVendas.CATEGORIA)
+    assert {chave: linha["receita"] for chave, linha in por_categoria.items()} == {
+        "Categoria 1": 30.0,
+        "Categoria 3": 10.0,
+    }
+    (por_dia,) = vendas(Session, AgrupamentoVendas.DIA).values()
+    assert por_dia["pedidos"] == 3
+    assert sum(linha["receita"] for linha in por_categoria.values()) == por_dia["receita"]
+    assert por_dia["receita"] == sum(totais)
+
+
+def test_numeros_de_pedido_reservados_em_bloco(contexto):
+    _, Session, _ = contexto
+
+    with Session() as db:
+        bind = db.get_bind()
+    alocadores = [AlocadorNumeros(bind, "pedidos", bloco=10) for _ in range(2)]
+    comandos = []
+    for alocador in alocadores:
+        event.listen(
+            alocador.bind,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: comandos.append(statement),
+        )
+
+    # Dois "processos" intercalados: sem repetição e crescente em cada um
+    numeros = [[a.proximo() for a in alocadores] for _ in range(25)]
+    por_alocador = list(zip(*numeros))
+    assert all(list(n) == sorted(n) for n in por_alocador)
+    assert len({n for linha in numeros for n in linha}) == 50
+    assert len([c for c in comandos if c.lstrip().startswith("UPDATE")]) == 6
+
+
+def test_importacao_le_categorias_uma_vez_e_grava_em_lote(contexto):
+    client, Session, comandos = contexto
+
+    popular(Session, 3)
+    linhas = [
+        {
+            "nome": f"Importada {i}",
+            "tamanho": "M",
+            "condicao": "novo",
+            "preco_venda": 20 + i,
+            "categoria": "categoria 2",
+        }
+        for i in range(50)
+    ]
+    linhas[10]["preco_venda"] = "caro"
+    arquivo = b"".join(orjson.dumps(linha) + b"\n" for linha in linhas)
+
+    comandos.clear()
+    relatorio = client.post(
+        "/admin/produtos/import", files={"arquivo": ("lote.ndjson", arquivo)}
+    ).json()
+    assert relatorio["importadas"] == 49
+    assert [erro["linha"] for erro in relatorio["erros"]] == [11]
+    assert len([c for c in comandos if c.lstrip().startswith("SELECT")]) == 1
+    assert len([c for c in comandos if c.lstrip().startswith("INSERT")]) == 1
+
+    with Session() as db:
+        assert db.query(Produto).filter(Produto.categoria_id == 2).count() == 49
+
+
+def test_importacao_aceita_arquivo_maior_que_limite_de_imagem(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 1)
+    historia = "Peça garimpada, " * 128  # ~2 KB por linha
+    linha = {
+        "nome": "Importada",
+        "tamanho": "M",
+        "condicao": "novo",
+        "preco_venda": 30,
+        "categoria_id": 1,
+        "historia_peca": historia,
+    }
+    arquivo = (orjson.dumps(linha) + b"\n") * 8000
+    assert len(arquivo) > settings.UPLOAD_MAX_BYTES
+
+    response = client.post(
+        "/admin/produtos/import", files={"arquivo": ("grande.ndjson", arquivo)}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["importadas"] == 8000
+
+    # As rotas de imagem continuam com o limite delas
+    response = client.post(
+        "/produtos/1/imagem-principal", files={"file": ("foto.jpg", arquivo)}
+    )
+    assert response.status_code == 413
+
+
+def test_operacao_em_lote_e_um_update(contexto):
+    client, Session, comandos = contexto
+
+    popular(Session, 10)  # preços 10 a 19; 10, 11, 13, 15, 17 e 19 na categoria 1
+    remarcacao = {
+        "seletor": {"categoria_id": 1, "status": "disponivel"},
+        "preco": {"tipo": "percentual", "valor": -30, "arredondar_90": True},
+    }
+
+    comandos.clear()
+    simulacao = client.post(
+        "/admin/produtos/lote", json={**remarcacao, "simular": True}
+    ).json()
+    assert simulacao == {
+        "simulacao": True,
+        "selecionados": 6,
+        "alterados": 6,
+        "reservadas_ignoradas": 0,
+    }
+    assert len(comandos) == 1
+
+    comandos.clear()
+    assert client.post("/admin/produtos/lote", json=remarcacao).json()["alterados"] == 6
+    assert len([c for c in comandos if c.lstrip().startswith("UPDATE")]) == 1
+    assert not [c for c in comandos if c.lstrip().startswith("SELECT")]
+
+    with Session() as db:
+        precos = sorted(
+            p.preco_venda for p in db.query(Produto).filter(Produto.categoria_id == 1)
+        )
+    # 10 * 0,7 = 7 -> 6,90; 11 * 0,7 = 7,7 -> 6,90; 19 * 0,7 = 13,3 -> 12,90
+    assert precos == [6.9, 6.9, 8.9, 9.9, 11.9, 12.9]
+
+
+def test_lote_de_status_nao_libera_peca_em_checkout(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 2)  # as duas peças na categoria 1
+    autenticacao, endereco_id = novo_cliente(Session, "a@teste.com")
+    checkout = {"endereco_entrega_id": endereco_id, "forma_pagamento": "pix", "produto_ids": [1]}
+    assert client.post("/pedidos/checkout", json=checkout, headers=autenticacao).status_code == 201
+
+    response = client.post(
+        "/admin/produtos/lote",
+        json={"seletor": {"categoria_id": 1}, "status": "disponivel"},
+    )
+    assert response.json() == {
+        "simulacao": False,
+        "selecionados": None,
+        "alterados": 0,
+        "reservadas_ignoradas": 1,
+    }
+    with Session() as db:
+        peca = db.get(Produto, 1)
+        assert peca.status == StatusProduto.RESERVADO
+        assert peca.reservado_ate is not None
+
+    # Outro cliente não consegue comprar a mesma peça
+    autenticacao, endereco_id = novo_cliente(Session, "b@teste.com")
+    checkout = {**checkout, "endereco_entrega_id": endereco_id}
+    response = client.post("/pedidos/checkout", json=checkout, headers=autenticacao)
+    assert response.status_code == 409
+    assert response.json()["detail"]["indisponiveis"] == [1]
+    with Session() as db:
+        assert db.query(ItemPedido).filter(ItemPedido.produto_id == 1).count() == 1
+
+
+def test_checkout_grava_precos_da_reserva_e_limpa_carrinho(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 3)  # preços 10, 11 e 12
+    autenticacao, endereco_id = novo_cliente(Session, "a@teste.com")
+    for produto_id in (1, 2, 3):
+        response = client.post("/carrinho/adicionar", json={"produto_id": produto_id})
+    carrinho_id = verificar_carrinho_id(response.cookies[COOKIE_CARRINHO])
+
+    # Remarcada depois de ir para o carrinho: vale o preço lido na reserva
+    with Session() as db:
+        db.get(Produto, 1).preco_venda = 7.9
+        db.commit()
+
+    response = client.post(
+        "/pedidos/checkout",
+        json={"endereco_entrega_id": endereco_id, "forma_pagamento": "pix", "produto_ids": [1, 2]},
+        headers=autenticacao,
+    )
+    assert response.status_code == 201, response.text
+    pedido = response.json()
+    assert sorted((i["produto_id"], i["preco_unitario"]) for i in pedido["itens"]) == [
+        (1, 7.9),
+        (2, 11.0),
+    ]
+    assert pedido["total"] == pytest.approx(18.9)
+    with Session() as db:
+        itens = db.query(ItemPedido).filter(ItemPedido.pedido_id == pedido["id"])
+        assert sorted((i.produto_id, i.preco_unitario) for i in itens) == [(1, 7.9), (2, 11.0)]
+        assert db.get(Produto, 1).status == StatusProduto.RESERVADO
+
+    store = client.app.dependency_overrides[get_carrinho_store]()
+    assert store.obter(carrinho_id) == {"3": 1}
+
+
+def test_checkout_com_peca_indisponivel_nao_deixa_reserva(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 2)
+    with Session() as db:
+        db.get(Produto, 2).status = StatusProduto.VENDIDO
+        db.commit()
+    autenticacao, endereco_id = novo_cliente(Session, "a@teste.com")
+
+    response = client.post(
+        "/pedidos/checkout",
+        json={"endereco_entrega_id": endereco_id, "forma_pagamento": "pix", "produto_ids": [1, 2]},
+        headers=autenticacao,
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"]["indisponiveis"] == [2]
+    with Session() as db:
+        peca = db.get(Produto, 1)
+        assert peca.status == StatusProduto.DISPONIVEL
+        assert peca.reservado_ate is None
+        assert db.query(Pedido).count() == 0
+
+
+def test_checkout_recusa_endereco_de_outro_cliente(contexto):
+    client, Session, _ = contexto
+
+    popular(Session, 1)
+    autenticacao, _ = novo_cliente(Session, "a@teste.com")
+    _, endereco_alheio = novo_cliente(Session, "b@teste.com")
+
+    response = client.post(
+        "/pedidos/checkout",
+        json={"endereco_entrega_id": endereco_alheio, "forma_pagamento": "pix", "produto_ids": [1]},
+        headers=autenticacao,
+    )
+    assert response.status_code == 404
+    with Session() as db:
+        assert db.get(Produto, 1).status == StatusProduto.DISPONIVEL
+
+
+def test_checkout_com_carrinho_vazio(contexto):
+    client, Session, _ = contexto
+
+    autenticacao, endereco_id = novo_cliente(Session, "a@teste.com")
+    response = client.post(
+        "/pedidos/checkout",
+        json={"endereco_entrega_id": endereco_id, "forma_pagamento": "pix"},
+        headers=autenticacao,
+    )
+    assert response.status_code == 400